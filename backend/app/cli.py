@@ -0,0 +1,105 @@
+"""
+Command Line Interface
+Offline maintenance commands for the API
+
+Usage (from the backend directory):
+    python -m app.cli build-snapshot --output formulary.snap [--input formulary.jsonl]
+    python -m app.cli import-appointments --input appointments.csv [--report errors.jsonl]
+    python -m app.cli export-appointments --output appointments.csv [--category Cardiologist]
+"""
+from app.core.logging import setup_logging
+import argparse
+import json
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+def _build_snapshot(args: argparse.Namespace) -> None:
+    """
+    Compile the medicine catalog and search index into a snapshot file
+    """
+    from app.services.formulary_snapshot import build_snapshot
+
+    build_snapshot(args.output, args.input)
+
+
+def _import_appointments(args: argparse.Namespace) -> None:
+    """
+    Stream a CSV/JSONL file of appointment requests into the appointment store
+    Rejected rows are written to the report (stdout by default) as JSON lines
+    """
+    from app.core.config import settings
+    from app.services.appointment_bulk import detect_format, import_appointments, iter_appointment_rows
+    from app.services.appointment_service import appointment_service
+
+    fmt = args.format or detect_format(args.input)
+    report = open(args.report, "w", encoding="utf-8") if args.report else sys.stdout
+    try:
+        with open(args.input, encoding="utf-8-sig", newline="") as handle:
+            rows = iter_appointment_rows(handle, fmt)
+            chunk_size = args.chunk_size or settings.APPOINTMENT_IMPORT_CHUNK_SIZE
+            for entry in import_appointments(appointment_service, rows, chunk_size):
+                if "summary" in entry:
+                    logger.info(f"Import summary: {entry['summary']}")
+                else:
+                    report.write(json.dumps(entry) + "\n")
+    finally:
+        if report is not sys.stdout:
+            report.close()
+        appointment_service.close()
+
+
+def _export_appointments(args: argparse.Namespace) -> None:
+    """
+    Stream stored appointment requests to a CSV/JSONL file
+    """
+    from app.services.appointment_bulk import detect_format, export_appointments
+    from app.services.appointment_service import appointment_service
+
+    fmt = args.format or detect_format(args.output)
+    category = appointment_service.canonical_category(args.category) if args.category else None
+    records = appointment_service.store.iter_records(
+        category=category, from_date=args.from_date, to_date=args.to_date
+    )
+    with open(args.output, "w", encoding="utf-8", newline="") as handle:
+        for chunk in export_appointments(records, fmt):
+            handle.write(chunk)
+    logger.info(f"Exported appointments to {args.output}")
+
+
+def main() -> None:
+    """
+    Parse arguments and run the selected command
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="AI Medical Assistant API tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    snapshot = subparsers.add_parser("build-snapshot", help="Build a memory-mappable formulary snapshot")
+    snapshot.add_argument("--output", required=True, help="Snapshot file to write")
+    snapshot.add_argument("--input", help="CSV/JSONL formulary (built-in sample data if omitted)")
+    snapshot.set_defaults(handler=_build_snapshot)
+
+    importer = subparsers.add_parser("import-appointments", help="Bulk import appointment requests")
+    importer.add_argument("--input", required=True, help="CSV (with header) or JSONL file")
+    importer.add_argument("--format", choices=("csv", "jsonl"), help="File format (from extension if omitted)")
+    importer.add_argument("--report", help="Write rejected rows here as JSON lines (default: stdout)")
+    importer.add_argument("--chunk-size", type=int, help="Rows committed per transaction")
+    importer.set_defaults(handler=_import_appointments)
+
+    exporter = subparsers.add_parser("export-appointments", help="Export stored appointment requests")
+    exporter.add_argument("--output", required=True, help="CSV or JSONL file to write")
+    exporter.add_argument("--format", choices=("csv", "jsonl"), help="File format (from extension if omitted)")
+    exporter.add_argument("--category", help="Only this doctor category")
+    exporter.add_argument("--from", dest="from_date", help="Only appointments on or after this day (YYYY-MM-DD)")
+    exporter.add_argument("--to", dest="to_date", help="Only appointments on or before this day (YYYY-MM-DD)")
+    exporter.set_defaults(handler=_export_appointments)
+
+    args = parser.parse_args()
+    setup_logging()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
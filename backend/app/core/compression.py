@@ -0,0 +1,298 @@
+"""
+Response Compression
+Brotli/gzip content negotiation for text responses: bodies below a size
+threshold are sent as is, versioned responses (those with an ETag) are
+compressed once and replayed, and streams (SSE, exports) are compressed
+chunk by chunk without buffering the whole body
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.metrics import http_compression_bytes_total
+import logging
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without brotli
+    brotli = None
+
+BROTLI_AVAILABLE = brotli is not None
+
+logger = logging.getLogger(__name__)
+
+# Content types worth compressing (prefix match on the media type)
+COMPRESSIBLE_TYPES = (
+    b"text/",
+    b"application/json",
+    b"application/javascript",
+    b"application/xml",
+    b"application/x-ndjson",
+)
+
+# Compressed once per ETag, so the slower, denser settings pay off
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 9
+
+
+def negotiate_encoding(accept_encoding: bytes, brotli_enabled: bool = True) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header
+
+    Args:
+        accept_encoding: Header value, e.g. b"gzip, deflate, br;q=0.9"
+        brotli_enabled: Whether brotli may be chosen
+
+    Returns:
+        "br", "gzip" or None (send uncompressed); brotli wins ties
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.decode("latin-1").lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    candidates = (("br", "gzip") if brotli_enabled else ("gzip",))
+    best, best_weight = None, 0.0
+    for coding in candidates:
+        weight = weights.get(coding, wildcard)
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class _StreamEncoder:
+    """
+    Incremental encoder for one response body
+    """
+    __slots__ = ("_compress", "_flush", "_finish")
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress = compressor.process
+            self._flush = compressor.flush
+            self._finish = compressor.finish
+        else:
+            # wbits 16 + MAX_WBITS writes the gzip header and trailer
+            compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._compress = compressor.compress
+            self._flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = compressor.flush
+
+    def encode(self, data: bytes, flush: bool) -> bytes:
+        """
+        Compress a chunk, flushing it to the output if the client needs it now
+        """
+        output = self._compress(data)
+        return output + self._flush() if flush else output
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def compress(data: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    """
+    Compress a complete body
+
+    Args:
+        data: Uncompressed body
+        encoding: "br" or "gzip"
+        gzip_level: zlib level (1-9)
+        brotli_quality: Brotli quality (0-11)
+
+    Returns:
+        Compressed body
+    """
+    encoder = _StreamEncoder(encoding, gzip_level, brotli_quality)
+    return encoder.encode(data, False) + encoder.finish()
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing text responses with brotli or gzip
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        brotli_enabled: bool = True,
+        static_cache_entries: int = 1024,
+    ):
+        """
+        Args:
+            app: ASGI application
+            minimum_size: Smaller complete bodies are sent uncompressed
+            gzip_level: zlib level for per-request compression
+            brotli_quality: Brotli quality for per-request compression
+            brotli_enabled: Offer brotli (only if the brotli package is installed)
+            static_cache_entries: Compressed bodies of ETag-versioned responses kept
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli_enabled = brotli_enabled and BROTLI_AVAILABLE
+        self.static_cache_entries = static_cache_entries
+        self._static: "OrderedDict[Tuple[str, bytes, str], bytes]" = OrderedDict()
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                encoding = negotiate_encoding(value, self.brotli_enabled)
+                break
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[dict] = None
+        encoder: Optional[_StreamEncoder] = None
+        flush_chunks = False
+        passthrough = False
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal start, encoder, flush_chunks, passthrough
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                if message["status"] == 304:
+                    # Same validators as the 200 this client would get
+                    passthrough = True
+                    message["headers"] = self._varied_headers(headers)
+                    await send(message)
+                    return
+                content_type = _header(headers, b"content-type") or b""
+                if (
+                    message["status"] < 200
+                    or message["status"] == 204
+                    or _header(headers, b"content-encoding") is not None
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether this is a stream
+                    start = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                headers = start["headers"]
+                if not more_body:
+                    # Complete body: compress (or reuse) it unless it is too small
+                    passthrough = True
+                    if len(body) < self.minimum_size:
+                        start["headers"] = self._varied_headers(headers)
+                        await send(start)
+                        await send(message)
+                        return
+                    compressed = self._compress_complete(scope["path"], headers, body, encoding)
+                    start["headers"] = self._encoded_headers(headers, encoding, len(compressed))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                # Stream: no Content-Length, each chunk compressed as it arrives.
+                # Server-sent events are flushed per chunk so events are never held back
+                flush_chunks = (_header(headers, b"content-type") or b"").startswith(b"text/event-stream")
+                encoder = _StreamEncoder(encoding, self.gzip_level, self.brotli_quality)
+                start["headers"] = self._encoded_headers(headers, encoding, None)
+                await send(start)
+
+            if more_body:
+                chunk = encoder.encode(body, flush_chunks)
+            else:
+                chunk = encoder.encode(body, False) + encoder.finish()
+            http_compression_bytes_total.labels(encoding, "raw").inc(len(body))
+            http_compression_bytes_total.labels(encoding, "compressed").inc(len(chunk))
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _compress_complete(self, path: str, headers: List[Tuple[bytes, bytes]], body: bytes, encoding: str) -> bytes:
+        """
+        Compress a complete body, reusing the stored result for versioned responses
+        A strong ETag identifies the exact bytes, so their compressed form can be
+        computed once (at higher settings) and replayed on later requests
+        """
+        etag = _header(headers, b"etag")
+        key = (path, etag, encoding) if etag is not None and not etag.startswith(b"W/") else None
+        if key is not None:
+            compressed = self._static.get(key)
+            if compressed is not None:
+                self._static.move_to_end(key)
+            else:
+                compressed = compress(body, encoding, STATIC_GZIP_LEVEL, STATIC_BROTLI_QUALITY)
+                self._static[key] = compressed
+                while len(self._static) > self.static_cache_entries:
+                    self._static.popitem(last=False)
+        else:
+            compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+        http_compression_bytes_total.labels(encoding, "raw").inc(len(body))
+        http_compression_bytes_total.labels(encoding, "compressed").inc(len(compressed))
+        return compressed
+
+    @staticmethod
+    def _varied_headers(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+        """
+        Response headers for a client that negotiated an encoding
+        The ETag is weakened because encoded bytes differ from the identity
+        representation it names. It is weakened whether or not this body ends up
+        compressed (small bodies, 304s), so a client always sees one ETag per
+        resource; conditional requests still match it weakly
+        """
+        varied = [
+            (name, b"W/" + value if name == b"etag" and not value.startswith(b"W/") else value)
+            for name, value in headers
+        ]
+        varied.append((b"vary", b"Accept-Encoding"))
+        return varied
+
+    @classmethod
+    def _encoded_headers(
+        cls, headers: List[Tuple[bytes, bytes]], encoding: str, length: Optional[int]
+    ) -> List[Tuple[bytes, bytes]]:
+        """
+        Response headers for the encoded body
+        """
+        encoded = cls._varied_headers([(name, value) for name, value in headers if name != b"content-length"])
+        encoded.append((b"content-encoding", encoding.encode("ascii")))
+        if length is not None:
+            encoded.append((b"content-length", str(length).encode("ascii")))
+        return encoded
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get compressed payload cache size
+
+        Returns:
+            Dictionary with the number of stored compressed bodies
+        """
+        return {"entries": len(self._static), "max_entries": self.static_cache_entries}
@@ -3,7 +3,7 @@ Application Configuration
 Centralized configuration management using environment variables
 """
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Any, Dict, List, Optional
 import os
 
 
@@ -28,6 +28,158 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-3.5-turbo"
     OPENAI_TEMPERATURE: float = 0.7
     OPENAI_MAX_TOKENS: int = 500
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    OPENAI_TIMEOUT: float = 30.0
+    
+    # Upstream HTTP connection pool (shared for the application lifetime)
+    HTTP_POOL_MAX_CONNECTIONS: int = 100
+    HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = True
+    
+    # Additional OpenAI-compatible upstreams (e.g. a local model server) as a JSON list:
+    # [{"name": "local", "base_url": "http://localhost:8080/v1", "model": "llama3",
+    #   "api_key_env": "LOCAL_LLM_KEY", "timeout": 20, "max_concurrency": 4}]
+    LLM_PROVIDERS: List[Dict[str, Any]] = []
+    LLM_PROVIDER_EWMA_ALPHA: float = 0.2
+    LLM_PROVIDER_EXPLORE_RATIO: float = 0.05
+    # Circuit breaker per provider: opens after consecutive failures (errors,
+    # timeouts, calls slower than LLM_SLOW_CALL_SECONDS), probes after the reset timeout
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_TIMEOUT: float = 10.0
+    LLM_CIRCUIT_HALF_OPEN_CALLS: int = 1
+    LLM_SLOW_CALL_SECONDS: float = 20.0  # 0 disables the latency SLO
+    # Adaptive timeouts: LLM_TIMEOUT_MULTIPLIER x recent latency quantile,
+    # clamped between LLM_TIMEOUT_MIN and the provider timeout (OPENAI_TIMEOUT)
+    LLM_ADAPTIVE_TIMEOUT: bool = True
+    LLM_TIMEOUT_QUANTILE: float = 0.99
+    LLM_TIMEOUT_MULTIPLIER: float = 3.0
+    LLM_TIMEOUT_MIN: float = 2.0
+    # Hedged requests: ask the next provider too when the first is slower than its p95
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_QUANTILE: float = 0.95
+    LLM_HEDGE_MIN_DELAY: float = 0.05
+    LLM_HEDGE_MAX_RATIO: float = 0.1
+    
+    # Upstream LLM admission control (per provider)
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_REQUESTS_PER_SECOND: float = 10.0  # 0 disables rate limiting
+    LLM_BURST: int = 20
+    LLM_QUEUE_MAX_SIZE: int = 100
+    LLM_QUEUE_MAX_WAIT: float = 5.0
+    LLM_COALESCE_REQUESTS: bool = True
+    # Overrides by model (or provider name) as JSON, e.g. {"gpt-4": {"max_concurrency": 4, "requests_per_second": 2}}
+    LLM_MODEL_LIMITS: Dict[str, Dict[str, float]] = {}
+    
+    # Chat response cache ("memory" per process, or "sqlite" shared across workers)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_TTL_SECONDS: int = 3600
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_SQLITE_PATH: str = "response_cache.sqlite3"
+    RESPONSE_CACHE_STEMMING: bool = False
+    
+    # Conversation memory ("memory" per process, or "sqlite" shared across workers)
+    CONVERSATION_STORE_BACKEND: str = "memory"
+    CONVERSATION_MAX_CONVERSATIONS: int = 50000
+    CONVERSATION_TTL_SECONDS: int = 86400
+    CONVERSATION_SQLITE_PATH: str = "conversations.sqlite3"
+    CONVERSATION_CONTEXT_TOKENS: int = 1500
+    CONVERSATION_COMPACT_AFTER_TURNS: int = 12
+    CONVERSATION_SUMMARY_TOKENS: int = 200
+    # Key for signing conversation ids (random per process when unset; set it
+    # when running several workers so ids are accepted by all of them)
+    CONVERSATION_ID_SECRET: Optional[str] = None
+    
+    # Medicine formulary (CSV/JSONL file; built-in sample data when unset)
+    MEDICINE_DATA_PATH: Optional[str] = None
+    # Prebuilt snapshot from `python -m app.cli build-snapshot` (takes precedence)
+    MEDICINE_SNAPSHOT_PATH: Optional[str] = None
+    
+    # Medicine name autocomplete
+    MEDICINE_SUGGEST_PRECOMPUTE_DEPTH: int = 3
+    MEDICINE_SUGGEST_CACHE_SIZE: int = 10000
+    MEDICINE_SUGGEST_MAX_AGE: int = 3600
+    # Catalog entries kept pre-serialized as JSON for search responses
+    MEDICINE_JSON_CACHE_SIZE: int = 10000
+    
+    # Appointment persistence (SQLite with write-behind batching)
+    APPOINTMENT_SQLITE_PATH: str = "appointments.sqlite3"
+    APPOINTMENT_WRITE_BEHIND: bool = True
+    APPOINTMENT_FLUSH_INTERVAL_MS: float = 5.0
+    APPOINTMENT_MAX_BATCH_SIZE: int = 500
+    APPOINTMENT_QUEUE_MAX_SIZE: int = 10000
+    APPOINTMENT_SQLITE_SYNCHRONOUS: str = "FULL"
+    # Appointment notifications (outbox drained in the background)
+    # Email confirmations are sent when NOTIFICATION_SMTP_HOST is set,
+    # staff webhooks when NOTIFICATION_WEBHOOK_URL is set
+    NOTIFICATION_SMTP_HOST: Optional[str] = None
+    NOTIFICATION_SMTP_PORT: int = 25
+    NOTIFICATION_SMTP_USERNAME: Optional[str] = None
+    NOTIFICATION_SMTP_PASSWORD: Optional[str] = None
+    NOTIFICATION_SMTP_STARTTLS: bool = False
+    NOTIFICATION_EMAIL_FROM: str = "appointments@medicare.local"
+    NOTIFICATION_WEBHOOK_URL: Optional[str] = None
+    NOTIFICATION_WORKERS: int = 4
+    NOTIFICATION_BATCH_SIZE: int = 50
+    NOTIFICATION_POLL_INTERVAL: float = 1.0
+    NOTIFICATION_LEASE_SECONDS: float = 60.0
+    NOTIFICATION_MAX_ATTEMPTS: int = 8
+    NOTIFICATION_BACKOFF_BASE: float = 2.0
+    NOTIFICATION_BACKOFF_MAX: float = 600.0
+    
+    # Bulk appointment import/export (disabled unless ADMIN_API_KEY is set)
+    ADMIN_API_KEY: Optional[str] = None
+    APPOINTMENT_IMPORT_CHUNK_SIZE: int = 1000
+    APPOINTMENT_IMPORT_MAX_BYTES: int = 256 * 1024 * 1024
+    
+    # Days ahead searched for free appointment slots
+    AVAILABILITY_HORIZON_DAYS: int = 90
+    # Longest date range served by GET /appointment/availability
+    AVAILABILITY_MAX_RANGE_DAYS: int = 31
+    # (category, day) entries kept in the free-times cache
+    AVAILABILITY_CACHE_MAX_DAYS: int = 4096
+    
+    # HTTP caching of read-only endpoints (/, /health/version, /medicine/search):
+    # ETags, 304s for conditional GETs and an LRU of rendered responses
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_MAX_ENTRIES: int = 2048
+    HTTP_CACHE_MAX_BODY_BYTES: int = 256 * 1024
+    HTTP_CACHE_MAX_AGE: int = 300
+    
+    # Response compression (brotli needs the optional brotli package)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_ENABLED: bool = True
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_STATIC_CACHE_ENTRIES: int = 1024
+    
+    # Per-client rate limits by path prefix ("memory" per process, or "sqlite"
+    # shared across workers); clients are known API keys (X-API-Key) or IPs
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SQLITE_PATH: str = "rate_limits.sqlite3"
+    RATE_LIMIT_POLICIES: Dict[str, Dict[str, float]] = {
+        "/chat": {"requests_per_minute": 20, "burst": 5},
+        "/appointment/request": {"requests_per_minute": 10, "burst": 5},
+        "/medicine": {"requests_per_minute": 600, "burst": 60},
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_API_KEYS: List[str] = []
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+    
+    # Prometheus metrics: GET /metrics plus per-request instrumentation
+    METRICS_ENABLED: bool = True
+    
+    # Request tracing: "none", "jsonl" (spans appended to TRACING_JSONL_PATH)
+    # or "otlp" (OTLP/HTTP JSON to a collector such as the OpenTelemetry Collector)
+    TRACING_EXPORTER: str = "none"
+    TRACING_JSONL_PATH: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATIO: float = 1.0
+    TRACING_EXPORT_INTERVAL: float = 1.0
+    TRACING_MAX_QUEUE_SIZE: int = 10000
     
     # Medical Disclaimer
     INCLUDE_DISCLAIMERS: bool = True
@@ -2,11 +2,19 @@
 Dependency Injection
 Centralized dependency management for FastAPI
 """
+from fastapi import Header, HTTPException
+from typing import Optional
+from app.core.config import settings
 from app.services.ai_service import AIService
+from app.services.conversation_store import ConversationMemory, create_conversation_memory
+import secrets
 
 # Global AI service instance (can be replaced for testing)
 _ai_service_instance = None
 
+# Global conversation memory instance (can be replaced for testing)
+_conversation_memory_instance = None
+
 
 def get_ai_service() -> AIService:
     """
@@ -32,3 +40,42 @@ def set_ai_service(service: AIService) -> None:
     global _ai_service_instance
     _ai_service_instance = service
 
+
+def get_conversation_memory() -> ConversationMemory:
+    """
+    Get conversation memory instance (dependency injection)
+    
+    Returns:
+        ConversationMemory instance
+    """
+    global _conversation_memory_instance
+    if _conversation_memory_instance is None:
+        _conversation_memory_instance = create_conversation_memory()
+    return _conversation_memory_instance
+
+
+def set_conversation_memory(memory: ConversationMemory) -> None:
+    """
+    Set conversation memory instance (for testing)
+    
+    Args:
+        memory: ConversationMemory instance to use
+    """
+    global _conversation_memory_instance
+    _conversation_memory_instance = memory
+
+
+def require_admin_key(x_admin_key: Optional[str] = Header(None)) -> None:
+    """
+    Guard administrative endpoints (e.g. bulk appointment import/export)
+    
+    Args:
+        x_admin_key: Value of the X-Admin-Key header
+    
+    Raises:
+        HTTPException: 403 if ADMIN_API_KEY is not configured, 401 if the key is wrong
+    """
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Administrative endpoints are disabled.")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin key.")
@@ -0,0 +1,193 @@
+"""
+HTTP Response Cache
+Conditional GET and an in-process LRU of rendered responses for read-only
+endpoints whose output only changes when a version (e.g. the catalog) changes
+Strong ETags are derived from that version and the normalized request, so a
+matching If-None-Match is answered with 304 without running the handler
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from app.core.metrics import http_cache_requests_total
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CacheRule:
+    """
+    Caching policy for one path
+    """
+    __slots__ = ("path", "version", "max_age", "defaults", "endpoint")
+
+    def __init__(
+        self,
+        path: str,
+        version: Callable[[], str],
+        max_age: int,
+        defaults: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Args:
+            path: Exact request path
+            version: Returns the current version of the data behind the path;
+                cached responses and ETags of other versions are never served
+            max_age: Cache-Control max-age in seconds
+            defaults: Query parameter defaults, so omitted and explicit
+                defaults share a cache entry
+        """
+        self.path = path
+        self.version = version
+        self.max_age = max_age
+        self.defaults = defaults or {}
+        # Endpoint the router resolved for the path (learned on the first miss)
+        self.endpoint = None
+
+
+class CachedResponse:
+    """
+    Rendered 200 response
+    """
+    __slots__ = ("headers", "body")
+
+    def __init__(self, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.headers = headers
+        self.body = body
+
+
+def _etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+    """
+    Check an If-None-Match header against an ETag
+
+    Args:
+        if_none_match: Header value (may list several tags or be "*")
+        etag: Current entity tag
+
+    Returns:
+        True if the client's cached copy is still valid
+    """
+    tags = [tag.strip() for tag in if_none_match.split(b",")]
+    return b"*" in tags or etag in tags or b"W/" + etag in tags
+
+
+class HTTPCacheMiddleware:
+    """
+    Pure ASGI middleware adding ETag/Cache-Control to configured GET endpoints,
+    answering conditional requests with 304 and replaying cached responses
+    """
+
+    def __init__(self, app, rules: List[CacheRule], max_entries: int = 2048, max_body_bytes: int = 256 * 1024):
+        """
+        Args:
+            app: ASGI application
+            rules: Cacheable paths
+            max_entries: Rendered responses kept in the LRU
+            max_body_bytes: Larger responses get headers but are not stored
+        """
+        self.app = app
+        self.rules = {rule.path: rule for rule in rules}
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    @staticmethod
+    def _normalize_query(query_string: bytes, defaults: Dict[str, str]) -> str:
+        """
+        Canonical form of a query string: decoded, defaults filled in, sorted
+
+        Args:
+            query_string: Raw query string
+            defaults: Defaults of omitted parameters
+
+        Returns:
+            Query string usable as a cache key
+        """
+        params = dict(defaults)
+        params.update(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+        return urlencode(sorted(params.items()))
+
+    def _store(self, key: str, response: CachedResponse) -> None:
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        rule = self.rules.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"{rule.version()}|{rule.path}?{self._normalize_query(scope['query_string'], rule.defaults)}"
+        etag = b'"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20].encode("ascii") + b'"'
+        cache_headers = [(b"etag", etag), (b"cache-control", f"public, max-age={rule.max_age}".encode("ascii"))]
+
+        if_none_match = None
+        no_cache = False
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value
+            elif name == b"cache-control" and b"no-cache" in value:
+                no_cache = True
+
+        if rule.endpoint is not None:
+            # Lets metrics and tracing label requests answered here by route
+            scope["endpoint"] = rule.endpoint
+
+        # The ETag is only ever issued with a 200 for this exact key and version
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            http_cache_requests_total.labels("not_modified").inc()
+            await send({"type": "http.response.start", "status": 304, "headers": cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        cached = None if no_cache else self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            http_cache_requests_total.labels("hit").inc()
+            # Copied because outer middleware (e.g. CORS) may append to the list
+            await send({"type": "http.response.start", "status": 200, "headers": list(cached.headers)})
+            await send({"type": "http.response.body", "body": cached.body})
+            return
+
+        http_cache_requests_total.labels("miss").inc()
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        size = 0
+        cacheable = False
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal headers, size, cacheable
+            if message["type"] == "http.response.start":
+                # Only successful responses are cacheable (errors may be transient)
+                cacheable = message["status"] == 200
+                if cacheable:
+                    headers = [
+                        (name, value) for name, value in message.get("headers", ())
+                        if name not in (b"etag", b"cache-control")
+                    ] + cache_headers
+                    message["headers"] = list(headers)
+            elif message["type"] == "http.response.body" and cacheable:
+                size += len(message.get("body", b""))
+                if size > self.max_body_bytes:
+                    cacheable = False
+                    chunks.clear()
+                else:
+                    chunks.append(message.get("body", b""))
+                    if not message.get("more_body", False):
+                        self._store(key, CachedResponse(headers, b"".join(chunks)))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+        if rule.endpoint is None and cacheable:
+            rule.endpoint = scope.get("endpoint")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache size
+
+        Returns:
+            Dictionary with the number of stored responses
+        """
+        return {"entries": len(self._entries), "max_entries": self.max_entries}
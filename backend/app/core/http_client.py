@@ -0,0 +1,95 @@
+"""
+Shared HTTP Client
+Application-lifetime connection pool for upstream API calls
+"""
+import httpx
+from typing import Optional
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Global pooled client (opened at startup, closed at shutdown)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    """
+    Check whether HTTP/2 support (the h2 package) is installed
+
+    Returns:
+        True if httpx can negotiate HTTP/2
+    """
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create a pooled async HTTP client from application settings
+    Keep-alive connections are reused across requests
+
+    Returns:
+        Configured httpx.AsyncClient instance
+    """
+    http2 = settings.HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("HTTP/2 requested but 'h2' is not installed, falling back to HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=limits,
+        timeout=httpx.Timeout(settings.OPENAI_TIMEOUT),
+    )
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """
+    Open the shared HTTP client (called on application startup)
+
+    Returns:
+        Shared httpx.AsyncClient instance
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+        logger.info(
+            f"HTTP client pool started (max_connections={settings.HTTP_POOL_MAX_CONNECTIONS}, "
+            f"keepalive={settings.HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS})"
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """
+    Close the shared HTTP client (called on application shutdown)
+    """
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("HTTP client pool closed")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client
+    Lazily creates the pool if the application startup hook has not run
+    (e.g. when services are used from scripts)
+
+    Returns:
+        Shared httpx.AsyncClient instance
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
@@ -1,11 +1,27 @@
 """
 Logging Configuration
 Centralized logging setup for the application
+Every record carries the id of the request being served (or "-")
 """
 import logging
 import sys
+from contextvars import ContextVar
 from typing import Optional
 
+# Id of the request being served; set by the tracing middleware and inherited
+# by tasks spawned while handling the request
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Adds the current request id to log records as %(request_id)s
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
 
 def setup_logging(level: Optional[str] = None) -> None:
     """
@@ -19,13 +35,14 @@ def setup_logging(level: Optional[str] = None) -> None:
     
     # Create formatter
     formatter = logging.Formatter(
-        fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        fmt="%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
     )
     
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
+    console_handler.addFilter(RequestIdFilter())
     
     # Root logger configuration
     root_logger = logging.getLogger()
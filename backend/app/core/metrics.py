@@ -0,0 +1,395 @@
+"""
+Metrics
+In-process Prometheus-style counters, gauges and histograms plus the ASGI
+middleware that records per-route HTTP metrics
+Most updates happen on the event loop, but some come from executor threads
+(SQLite-backed caches and limiters, scrape-time collectors), so every update
+takes the lock of the value it changes
+"""
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Route label for requests that did not match any route (bounds label cardinality)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bucket plus the +Inf overflow; made cumulative on export
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric:
+    """
+    Base class for a metric family with optional labels
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names; children are created per label-value tuple
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._children_lock = threading.Lock()
+        self._default = None if self.labelnames else self.labels()
+
+    def _new_child(self):
+        return _Value()
+
+    def labels(self, *values: str):
+        """
+        Get the child for a label-value tuple (created on first use)
+
+        Args:
+            *values: Label values in labelnames order
+
+        Returns:
+            Child to update
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            # Created under a lock so two threads never replace each other's child
+            with self._children_lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def clear(self) -> None:
+        """
+        Drop every labelled child (e.g. before re-populating a gauge at scrape time)
+        """
+        self._children.clear()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{_label_text(self.labelnames, values)} {_format_value(child.value)}"
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count
+    """
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down
+    """
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values in fixed buckets
+    """
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        """
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names
+            buckets: Sorted bucket upper bounds (+Inf is implicit)
+        """
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                labels = _label_text(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _label_text(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    Collection of metric families rendered together
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Add a metric family to the exposition
+
+        Args:
+            metric: Metric to add
+
+        Returns:
+            The same metric (for assignment at module level)
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            Exposition text
+        """
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry instance
+registry = MetricsRegistry()
+
+# HTTP
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response body completes", ("method", "route")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+))
+
+http_cache_requests_total = registry.register(Counter(
+    "http_cache_requests_total", "Cacheable GET requests by result (hit, miss or not_modified)", ("result",)
+))
+
+http_compression_bytes_total = registry.register(Counter(
+    "http_compression_bytes_total", "Response body bytes before (raw) and after (compressed) compression", ("encoding", "kind")
+))
+
+rate_limit_requests_total = registry.register(Counter(
+    "rate_limit_requests_total", "Requests on rate limited routes by policy and result (allowed, limited)", ("policy", "result")
+))
+
+# Upstream LLM
+llm_requests_total = registry.register(Counter(
+    "llm_requests_total", "Upstream LLM calls by provider and outcome", ("provider", "outcome")
+))
+llm_request_duration_seconds = registry.register(Histogram(
+    "llm_request_duration_seconds", "Upstream LLM call latency", ("provider",)
+))
+llm_tokens_total = registry.register(Counter(
+    "llm_tokens_total", "Tokens reported by upstream LLM responses", ("provider", "kind")
+))
+llm_in_flight = registry.register(Gauge(
+    "llm_in_flight", "Upstream LLM calls holding an admission slot", ("provider",)
+))
+llm_queue_depth = registry.register(Gauge(
+    "llm_queue_depth", "Requests waiting for upstream LLM admission", ("provider",)
+))
+llm_circuit_open = registry.register(Gauge(
+    "llm_circuit_open", "Whether the provider's circuit is open (1) or half-open (0.5)", ("provider",)
+))
+response_cache_lookups_total = registry.register(Counter(
+    "response_cache_lookups_total", "Chat response cache lookups by result (hit or miss)", ("result",)
+))
+response_cache_entries = registry.register(Gauge(
+    "response_cache_entries", "Cached chat responses at scrape time"
+))
+chat_responses_total = registry.register(Counter(
+    "chat_responses_total", "Chat answers by source (upstream, cache, fallback or shed)", ("source",)
+))
+
+# Conversation memory
+conversation_store_conversations = registry.register(Gauge(
+    "conversation_store_conversations", "Stored conversations"
+))
+conversation_memory_bytes = registry.register(Gauge(
+    "conversation_memory_bytes", "Approximate memory held by in-process conversations (0 for SQLite)"
+))
+conversation_prompt_tokens = registry.register(Gauge(
+    "conversation_prompt_tokens", "History tokens sent per prompt since startup (avg or max)", ("stat",)
+))
+
+# Medicine search
+medicine_searches_total = registry.register(Counter(
+    "medicine_searches_total", "Medicine search queries by whether anything matched", ("result",)
+))
+medicine_search_results = registry.register(Histogram(
+    "medicine_search_results", "Number of results returned per medicine search query",
+    buckets=(0, 1, 2, 5, 10, 20, 50),
+))
+
+# Appointments
+appointment_requests_total = registry.register(Counter(
+    "appointment_requests_total", "Appointment requests by outcome", ("outcome",)
+))
+
+
+def observe_medicine_search(result_count: int) -> None:
+    """
+    Record one medicine search query
+
+    Args:
+        result_count: Number of results returned
+    """
+    medicine_searches_total.labels("hit" if result_count else "miss").inc()
+    medicine_search_results.observe(result_count)
+
+
+# Route template per endpoint function, filled on first request to each route
+_route_templates: Dict[Any, str] = {}
+
+
+def route_template(scope: dict) -> str:
+    """
+    Get the path template of the route that served a request
+
+    Args:
+        scope: ASGI scope after routing (Starlette records the matched endpoint)
+
+    Returns:
+        Path template such as /medicine/search, or UNMATCHED_ROUTE
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    template = _route_templates.get(endpoint)
+    if template is None:
+        template = UNMATCHED_ROUTE
+        for route in getattr(scope.get("app"), "routes", ()):
+            if getattr(route, "endpoint", None) is endpoint:
+                template = route.path
+                break
+        _route_templates[endpoint] = template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request counts, latency and in-flight requests
+    Requests are labelled by route template (e.g. /medicine/search), never by raw
+    path, so label cardinality stays bounded
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = perf_counter()
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            method = scope["method"]
+            route = route_template(scope)
+            http_request_duration_seconds.labels(method, route).observe(perf_counter() - started)
+            http_requests_total.labels(method, route, str(status)).inc()
@@ -0,0 +1,391 @@
+"""
+Rate Limiting
+Per-client request limits for expensive routes (e.g. /chat, which spends LLM
+quota), enforced with GCRA (generic cell rate algorithm): each client and
+policy needs a single timestamp, so limits are exact without keeping a window
+of past requests. State lives in-process, or in SQLite shared by all workers
+"""
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import rate_limit_requests_total
+from app.utils.serialization import dumps
+import asyncio
+import hashlib
+import logging
+import math
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitPolicy:
+    """
+    Limit for every path under a prefix (e.g. "/chat" covers /chat/stream)
+    """
+    __slots__ = ("prefix", "limit", "burst", "interval", "tolerance", "limit_headers", "allowed", "limited")
+
+    def __init__(self, prefix: str, requests_per_minute: float, burst: int = 1):
+        """
+        Args:
+            prefix: Path prefix the policy applies to
+            requests_per_minute: Sustained rate per client
+            burst: Requests a client may send at once before being paced
+        """
+        self.prefix = prefix
+        self.limit = requests_per_minute
+        self.burst = max(1, int(burst))
+        # GCRA: one request is "worth" interval seconds; up to tolerance ahead is allowed
+        self.interval = 60.0 / requests_per_minute
+        self.tolerance = self.interval * self.burst
+        # Limit is the sustained per-minute rate; the policy also names the burst,
+        # which bounds RateLimit-Remaining
+        self.limit_headers = (
+            (b"ratelimit-limit", b"%d" % math.ceil(requests_per_minute)),
+            (b"ratelimit-policy", b"%d;w=60;burst=%d" % (math.ceil(requests_per_minute), self.burst)),
+        )
+        self.allowed = rate_limit_requests_total.labels(prefix, "allowed")
+        self.limited = rate_limit_requests_total.labels(prefix, "limited")
+
+
+class RateLimitStore(ABC):
+    """
+    Storage of per-key theoretical arrival times (TATs)
+    """
+
+    # Whether acquire() does disk I/O and should run off the event loop
+    blocking = False
+
+    @abstractmethod
+    def acquire(self, key: str, now: float, interval: float, tolerance: float) -> Tuple[bool, float]:
+        """
+        Atomically apply GCRA to one request
+
+        Args:
+            key: Policy and client
+            now: Current wall-clock time
+            interval: Seconds per request at the sustained rate
+            tolerance: Seconds a client may run ahead of the sustained rate
+
+        Returns:
+            (allowed, theoretical arrival time after this request)
+        """
+
+    @abstractmethod
+    def sweep(self, now: float) -> int:
+        """
+        Drop keys whose TAT has passed (they behave exactly like absent keys)
+
+        Returns:
+            Number of keys removed
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """
+        Number of tracked keys
+        """
+
+    def close(self) -> None:
+        """
+        Release resources held by the store
+        """
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Per-process store: one float per active client and policy
+    Only touched from the event loop, so no locking is needed
+    """
+
+    # Seconds between sweeps of expired keys
+    SWEEP_INTERVAL = 10.0
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._tats: Dict[str, float] = {}
+        self._next_sweep = 0.0
+
+    def acquire(self, key: str, now: float, interval: float, tolerance: float) -> Tuple[bool, float]:
+        tats = self._tats
+        tat = tats.get(key, now)
+        if tat < now:
+            tat = now
+        new_tat = tat + interval
+        if new_tat - now > tolerance:
+            return False, tat
+        if key not in tats and len(tats) >= self.max_keys:
+            self._make_room(now)
+        tats[key] = new_tat
+        if now >= self._next_sweep:
+            self.sweep(now)
+        return True, new_tat
+
+    def _make_room(self, now: float) -> None:
+        """
+        Free a slot when full: sweep expired keys, else drop the oldest key
+        (dropping a key forgives at most one burst for that client)
+        """
+        if not self.sweep(now):
+            del self._tats[next(iter(self._tats))]
+
+    def sweep(self, now: float) -> int:
+        self._next_sweep = now + self.SWEEP_INTERVAL
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """
+    Store shared by every worker through one SQLite file (WAL mode)
+    Each check is a single atomic upsert, so concurrent workers never both
+    admit the last request of a burst
+    """
+
+    blocking = True
+
+    # Sweep expired keys at most every N writes to keep acquire() cheap
+    SWEEP_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    def acquire(self, key: str, now: float, interval: float, tolerance: float) -> Tuple[bool, float]:
+        with self._lock:
+            # The update only happens (and only returns a row) if the request fits
+            row = self._conn.execute(
+                "INSERT INTO rate_limits (key, tat) VALUES (?1, ?2 + ?3) "
+                "ON CONFLICT (key) DO UPDATE SET tat = max(tat, ?2) + ?3 "
+                "WHERE max(tat, ?2) + ?3 - ?2 <= ?4 "
+                "RETURNING tat",
+                (key, now, interval, tolerance),
+            ).fetchone()
+            if row is not None:
+                self._writes += 1
+                if self._writes % self.SWEEP_EVERY == 0:
+                    self._conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+                return True, row[0]
+            row = self._conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            return False, row[0] if row is not None else now
+
+    def sweep(self, now: float) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,)).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RateLimiter:
+    """
+    Resolves the policy and client of a request and applies the limit
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        policies: List[RateLimitPolicy],
+        api_keys: Optional[List[str]] = None,
+        trust_forwarded_for: bool = False,
+    ):
+        """
+        Args:
+            store: TAT storage
+            policies: Limited path prefixes (other paths are not limited)
+            api_keys: Known API keys; requests sending one in X-API-Key are
+                limited per key instead of per IP (unknown keys are ignored so
+                they cannot be rotated to dodge the IP limit)
+            trust_forwarded_for: Use the first X-Forwarded-For address as the
+                client IP (only behind a proxy that sets it)
+        """
+        self.store = store
+        self.policies = {policy.prefix.rstrip("/") or "/": policy for policy in policies}
+        # Keys are stored hashed so raw API keys never reach the (shared) store
+        self.api_keys = {
+            key.encode("latin-1"): "key:" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+            for key in (api_keys or ())
+        }
+        self.trust_forwarded_for = trust_forwarded_for
+
+    def policy_for(self, path: str) -> Optional[RateLimitPolicy]:
+        """
+        Get the policy of the longest matching prefix
+
+        Args:
+            path: Request path
+
+        Returns:
+            Policy, or None if the path is not limited
+        """
+        policies = self.policies
+        while path:
+            policy = policies.get(path)
+            if policy is not None:
+                return policy
+            path = path[:path.rfind("/")]
+        return policies.get("/")
+
+    def client_key(self, scope: dict) -> str:
+        """
+        Identify the client of a request: known API key, else IP address
+        """
+        forwarded = None
+        for name, value in scope["headers"]:
+            if name == b"x-api-key":
+                label = self.api_keys.get(value)
+                if label is not None:
+                    return label
+            elif name == b"x-forwarded-for" and self.trust_forwarded_for:
+                forwarded = value.split(b",", 1)[0].strip().decode("latin-1")
+        if forwarded:
+            return forwarded
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def check(self, policy: RateLimitPolicy, client: str) -> Tuple[bool, int, float, float]:
+        """
+        Apply a policy to one request from a client
+
+        Args:
+            policy: Matched policy
+            client: Client key
+
+        Returns:
+            (allowed, remaining requests in the current burst, seconds until
+            the full burst is available again, seconds until the next request
+            would be allowed)
+        """
+        now = time.time()
+        allowed, tat = self.store.acquire(f"{policy.prefix}|{client}", now, policy.interval, policy.tolerance)
+        # Requests that would still fit right now, when the burst is fully
+        # replenished (the TAT), and when the next one fits
+        headroom = policy.tolerance - (tat - now)
+        remaining = max(0, int(headroom / policy.interval + 1e-9))
+        reset = max(0.0, tat - now)
+        retry_after = 0.0 if remaining else max(0.0, -headroom + policy.interval)
+        if allowed:
+            policy.allowed.inc()
+        else:
+            policy.limited.inc()
+        return allowed, remaining, reset, retry_after
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of tracked clients
+
+        Returns:
+            Dictionary with the number of keys in the store
+        """
+        return {"keys": len(self.store)}
+
+    def close(self) -> None:
+        self.store.close()
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware answering 429 (with Retry-After) to clients over their
+    limit and adding RateLimit-* headers to limited routes
+    """
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        policy = self.limiter.policy_for(scope["path"]) if scope["type"] == "http" else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = self.limiter.client_key(scope)
+        if self.limiter.store.blocking:
+            # A shared SQLite file may be locked by another worker for a while
+            allowed, remaining, reset, retry_after = await asyncio.get_running_loop().run_in_executor(
+                None, self.limiter.check, policy, client
+            )
+        else:
+            allowed, remaining, reset, retry_after = self.limiter.check(policy, client)
+        rate_headers = (
+            *policy.limit_headers,
+            (b"ratelimit-remaining", b"%d" % remaining),
+            (b"ratelimit-reset", b"%d" % math.ceil(reset)),
+        )
+
+        if not allowed:
+            logger.warning(f"Rate limit exceeded on {policy.prefix}")
+            wait = math.ceil(retry_after)
+            body = dumps({"detail": f"Too many requests. Please try again in {wait} seconds."})
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", b"%d" % len(body)),
+                    (b"retry-after", b"%d" % wait),
+                    *rate_headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_wrapper(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *rate_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def create_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Create the rate limiter configured in settings
+
+    Returns:
+        RateLimiter instance, or None if rate limiting is disabled
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        store: RateLimitStore = SQLiteRateLimitStore(settings.RATE_LIMIT_SQLITE_PATH)
+    elif settings.RATE_LIMIT_BACKEND == "memory":
+        store = InMemoryRateLimitStore(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
+
+    policies = [
+        RateLimitPolicy(prefix, limits["requests_per_minute"], int(limits.get("burst", 1)))
+        for prefix, limits in settings.RATE_LIMIT_POLICIES.items()
+    ]
+    logger.info(f"Rate limiting enabled ({settings.RATE_LIMIT_BACKEND} backend, {len(policies)} policies)")
+    return RateLimiter(
+        store,
+        policies,
+        api_keys=settings.RATE_LIMIT_API_KEYS,
+        trust_forwarded_for=settings.RATE_LIMIT_TRUST_FORWARDED_FOR,
+    )
+
+
+# Global rate limiter instance (None when disabled)
+rate_limiter = create_rate_limiter()
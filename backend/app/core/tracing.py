@@ -0,0 +1,510 @@
+"""
+Tracing
+Lightweight request tracing with OpenTelemetry-compatible spans
+Spans use W3C trace context ids (incoming `traceparent` headers are continued
+and propagated to upstream LLM calls) and are exported in batches from a
+background thread, either as JSON lines or to an OTLP/HTTP collector
+"""
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, ContextManager, Deque, Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging import request_id_var
+from app.core.metrics import route_template
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Incoming X-Request-ID values are only trusted if they look like an id
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# OTLP status codes
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+
+class Span:
+    """
+    One timed operation within a trace
+    """
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "kind",
+        "start_ns", "end_ns", "attributes", "error", "request_id",
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.request_id = request_id_var.get()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Flat JSON form used by the JSON lines exporter
+        """
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "request_id": self.request_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """
+        OTLP/JSON span representation
+        """
+        attributes = [
+            {"key": key, "value": _otlp_value(value)}
+            for key, value in {**self.attributes, "request.id": self.request_id}.items()
+        ]
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": attributes,
+            "status": {"code": _STATUS_ERROR, "message": self.error} if self.error else {"code": _STATUS_OK},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+# Marks a request whose trace was not sampled, so child spans are skipped too
+_NOT_SAMPLED = object()
+
+_current_span: ContextVar[Any] = ContextVar("current_span", default=None)
+
+_NO_SPAN = nullcontext()
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished spans to a file, one JSON object per line
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Output file (appended to)
+        """
+        self.path = path
+        self._file = None
+
+    def export(self, spans: List[Span]) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(json.dumps(span.to_dict(), separators=(",", ":")) + "\n" for span in spans))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class OtlpHttpSpanExporter:
+    """
+    Sends finished spans to an OpenTelemetry collector (OTLP/HTTP, JSON encoding)
+    """
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        """
+        Args:
+            endpoint: Collector traces URL, e.g. http://localhost:4318/v1/traces
+            service_name: service.name resource attribute
+            timeout: Seconds allowed per export request
+        """
+        import httpx
+
+        self.endpoint = endpoint
+        self.resource = {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]}
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: List[Span]) -> None:
+        body = {
+            "resourceSpans": [{
+                "resource": self.resource,
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+        response = self._client.post(self.endpoint, json=body)
+        response.raise_for_status()
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class Tracer:
+    """
+    Creates spans and exports finished ones in batches from a background thread
+    """
+
+    def __init__(
+        self,
+        exporter: Any = None,
+        sample_ratio: float = 1.0,
+        max_queue: int = 10000,
+        export_interval: float = 1.0,
+        batch_size: int = 512,
+    ):
+        """
+        Args:
+            exporter: Object with export(spans) and close(), or None to disable tracing
+            sample_ratio: Fraction of new traces recorded (continued traces follow the caller)
+            max_queue: Finished spans buffered for export; more are dropped
+            export_interval: Seconds between export batches
+            batch_size: Spans sent per export call
+        """
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self.max_queue = max_queue
+        self.export_interval = export_interval
+        self.batch_size = batch_size
+        self._queue: Deque[Span] = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.exported = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start(self) -> None:
+        """
+        Start the export thread
+        """
+        if self.enabled and self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Export buffered spans, stop the export thread and close the exporter
+        """
+        if self._thread is not None:
+            self._stopping = True
+            self._wake.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self.exporter is not None:
+            self.exporter.close()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.export_interval)
+            self._wake.clear()
+            self._export_pending()
+        self._export_pending()
+
+    def _export_pending(self) -> None:
+        while self._queue:
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            try:
+                self.exporter.export(batch)
+                self.exported += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.warning(f"Span export failed, dropped {len(batch)} spans: {e}")
+                return
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append(span)
+
+    def start_span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Optional[Span]:
+        """
+        Start a child of the current span without making it current
+        For work that is suspended and resumed across yields (e.g. streams),
+        where the span cannot be bound to the context; finish with end_span
+
+        Args:
+            name: Span name
+            kind: OTLP span kind
+            **attributes: Initial span attributes
+
+        Returns:
+            The span, or None if the current trace is not being recorded
+        """
+        parent = current_span()
+        if not self.enabled or parent is None:
+            return None
+        span = Span(name, parent.trace_id, parent.span_id, kind)
+        span.attributes.update(attributes)
+        return span
+
+    def end_span(self, span: Optional[Span]) -> None:
+        """
+        Finish a span from start_span (no-op for None)
+        """
+        if span is not None:
+            self._finish(span)
+
+    def span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        remote_parent: Optional[Tuple[str, str, bool]] = None,
+        **attributes: Any,
+    ) -> ContextManager[Optional[Span]]:
+        """
+        Time the enclosed block as a child of the current span
+        A span with no current span starts a new (possibly unsampled) trace
+
+        Args:
+            name: Span name
+            kind: OTLP span kind
+            remote_parent: (trace_id, span_id, sampled) from an incoming traceparent
+            **attributes: Initial span attributes
+
+        Returns:
+            Context manager yielding the span, or None if the trace is not being recorded
+        """
+        if self.exporter is None or _current_span.get() is _NOT_SAMPLED:
+            # Shared no-op, so disabled tracing costs no more than a function call
+            return _NO_SPAN
+        return self._span(name, kind, remote_parent, attributes)
+
+    @contextmanager
+    def _span(
+        self,
+        name: str,
+        kind: int,
+        remote_parent: Optional[Tuple[str, str, bool]],
+        attributes: Dict[str, Any],
+    ) -> Iterator[Optional[Span]]:
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent.span_id, kind)
+        elif remote_parent is not None:
+            trace_id, parent_id, sampled = remote_parent
+            if not sampled:
+                yield from _unsampled()
+                return
+            span = Span(name, trace_id, parent_id, kind)
+        elif random.random() < self.sample_ratio:
+            span = Span(name, f"{random.getrandbits(128):032x}", None, kind)
+        else:
+            yield from _unsampled()
+            return
+
+        span.attributes.update(attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if not isinstance(e, (GeneratorExit, asyncio.CancelledError)):
+                span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": len(self._queue), "exported": self.exported, "dropped": self.dropped}
+
+
+def _unsampled() -> Iterator[None]:
+    token = _current_span.set(_NOT_SAMPLED)
+    try:
+        yield None
+    finally:
+        _current_span.reset(token)
+
+
+def current_span() -> Optional[Span]:
+    """
+    Get the span being recorded in this context
+
+    Returns:
+        Current span, or None if nothing is being recorded
+    """
+    span = _current_span.get()
+    return None if span is _NOT_SAMPLED else span
+
+
+def trace_headers() -> Dict[str, str]:
+    """
+    Get headers propagating the current trace to an upstream service
+
+    Returns:
+        {"traceparent": ...} while a span is recorded, otherwise an empty dict
+    """
+    span = current_span()
+    return {"traceparent": span.traceparent()} if span is not None else {}
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator recording a span around each call of a function (sync or async)
+    The wrapped signature is preserved, so FastAPI handlers can be decorated
+
+    Args:
+        name: Span name
+
+    Returns:
+        Decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    match = _TRACEPARENT_RE.match(value or "")
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware assigning each request an id (X-Request-ID, echoed in
+    the response and attached to every log record) and a root server span
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")
+            elif key == b"traceparent":
+                traceparent = value.decode("latin-1")
+        if request_id is None or not _REQUEST_ID_RE.match(request_id):
+            request_id = f"{random.getrandbits(64):016x}"
+        token = request_id_var.set(request_id)
+        span: Optional[Span] = None
+
+        async def send_wrapper(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (b"x-request-id", request_id.encode("latin-1"))]
+                if span is not None:
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.error = f"HTTP {message['status']}"
+            await send(message)
+
+        if not tracer.enabled:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                request_id_var.reset(token)
+            return
+
+        try:
+            with tracer.span(
+                scope["method"],
+                kind=SPAN_KIND_SERVER,
+                remote_parent=_parse_traceparent(traceparent),
+                **{"http.method": scope["method"], "http.target": scope["path"]},
+            ) as span:
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    if span is not None:
+                        route = route_template(scope)
+                        span.name = f"{scope['method']} {route}"
+                        span.set_attribute("http.route", route)
+        finally:
+            request_id_var.reset(token)
+
+
+def create_tracer() -> Tracer:
+    """
+    Create the tracer configured in settings
+
+    Returns:
+        Tracer instance (disabled when TRACING_EXPORTER is "none")
+    """
+    exporter = None
+    if settings.TRACING_EXPORTER == "jsonl":
+        exporter = JsonlSpanExporter(settings.TRACING_JSONL_PATH)
+    elif settings.TRACING_EXPORTER == "otlp":
+        exporter = OtlpHttpSpanExporter(settings.TRACING_OTLP_ENDPOINT, settings.APP_NAME)
+    elif settings.TRACING_EXPORTER != "none":
+        logger.warning(f"Unknown TRACING_EXPORTER {settings.TRACING_EXPORTER!r}, tracing disabled")
+    return Tracer(
+        exporter,
+        sample_ratio=settings.TRACING_SAMPLE_RATIO,
+        max_queue=settings.TRACING_MAX_QUEUE_SIZE,
+        export_interval=settings.TRACING_EXPORT_INTERVAL,
+    )
+
+
+# Global tracer instance
+tracer = create_tracer()
@@ -5,9 +5,20 @@ Entry point for the AI Medical Assistant API
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
 from app.core.cors import setup_cors
+from app.core.http_cache import CacheRule, HTTPCacheMiddleware
 from app.core.logging import setup_logging
-from app.routers import health, chat, medicine, appointment
+from app.core.http_client import start_http_client, close_http_client
+from app.core.metrics import MetricsMiddleware
+from app.core.rate_limit import RateLimitMiddleware, rate_limiter
+from app.core.tracing import TracingMiddleware, tracer
+from app.utils.serialization import FastJSONResponse
+from app.routers import health, chat, medicine, appointment, metrics
+from app.services.appointment_service import appointment_service
+from app.services.medicine_service import medicine_service
+from app.services.notifications import start_notifications, stop_notifications
+import asyncio
 import logging
 
 # Setup logging
@@ -25,16 +36,69 @@ app = FastAPI(
     ),
     docs_url="/docs",
     redoc_url="/redoc",
+    # orjson rendering for every route that returns plain data
+    default_response_class=FastJSONResponse,
 )
 
+# Cache read-only responses until the app or catalog version changes
+# (added before CORS so per-origin CORS headers are never stored)
+if settings.HTTP_CACHE_ENABLED:
+    app.add_middleware(
+        HTTPCacheMiddleware,
+        rules=[
+            CacheRule("/", lambda: settings.APP_VERSION, settings.HTTP_CACHE_MAX_AGE),
+            CacheRule("/health/version", lambda: settings.APP_VERSION, settings.HTTP_CACHE_MAX_AGE),
+            CacheRule("/openapi.json", lambda: settings.APP_VERSION, settings.HTTP_CACHE_MAX_AGE),
+            CacheRule(
+                "/medicine/search",
+                lambda: f"{settings.APP_VERSION}:{medicine_service.catalog_version}",
+                settings.HTTP_CACHE_MAX_AGE,
+                defaults={"limit": "10"},
+            ),
+            CacheRule(
+                "/medicine/suggest",
+                lambda: f"{settings.APP_VERSION}:{medicine_service.catalog_version}",
+                settings.MEDICINE_SUGGEST_MAX_AGE,
+                defaults={"limit": "8"},
+            ),
+        ],
+        max_entries=settings.HTTP_CACHE_MAX_ENTRIES,
+        max_body_bytes=settings.HTTP_CACHE_MAX_BODY_BYTES,
+    )
+
+# Compress text responses (outside the cache, so it stores identity bodies and
+# versioned responses are compressed once per ETag)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        brotli_enabled=settings.COMPRESSION_BROTLI_ENABLED,
+        static_cache_entries=settings.COMPRESSION_STATIC_CACHE_ENTRIES,
+    )
+
+# Per-client limits on expensive routes (inside CORS, so browsers can read 429s)
+if rate_limiter is not None:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # Setup CORS
 setup_cors(app)
 
+# Record per-route request metrics (outermost, so CORS preflights are counted too)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Request ids and root spans (outermost, so every log line of a request carries its id)
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(health.router)
 app.include_router(chat.router)
 app.include_router(medicine.router)
 app.include_router(appointment.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 
 @app.get("/", tags=["Root"])
@@ -72,15 +136,40 @@ async def global_exception_handler(request, exc):
 async def startup_event():
     """
     Startup event handler
-    Logs application startup information
+    Logs application startup information, opens shared resources and
+    precomputes medicine suggestions
     """
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"Debug mode: {settings.DEBUG}")
     logger.info(f"CORS origins: {settings.cors_origins_list}")
-    if settings.OPENAI_API_KEY:
-        logger.info("OpenAI integration enabled")
+    if settings.OPENAI_API_KEY or settings.LLM_PROVIDERS:
+        logger.info("LLM integration enabled")
     else:
-        logger.info("OpenAI integration disabled - using safe fallback responses")
+        logger.info("LLM integration disabled - using safe fallback responses")
+    if tracer.enabled:
+        logger.info(f"Tracing enabled ({settings.TRACING_EXPORTER} exporter, sample ratio {settings.TRACING_SAMPLE_RATIO:g})")
+        tracer.start()
+    await start_http_client()
+    await start_notifications(settings.APPOINTMENT_SQLITE_PATH)
+    # Build the autocomplete table before serving, off the event loop
+    await asyncio.get_running_loop().run_in_executor(None, medicine_service.suggester.warm)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Shutdown event handler
+    Flushes queued appointment writes to disk, lets in-flight notifications
+    finish, exports buffered spans and releases shared resources such as pooled
+    upstream connections and the rate limit store
+    """
+    await asyncio.get_running_loop().run_in_executor(None, appointment_service.close)
+    await stop_notifications()
+    await close_http_client()
+    await asyncio.get_running_loop().run_in_executor(None, tracer.stop)
+    if rate_limiter is not None:
+        rate_limiter.close()
+    logger.info(f"Stopped {settings.APP_NAME}")
 
 
 if __name__ == "__main__":
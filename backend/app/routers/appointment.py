@@ -1,14 +1,33 @@
 """
 Appointment Router
-Handles appointment request submissions
-UI-only support - no actual scheduling
+Handles appointment requests, slot availability and the admin export
+A request reserves its preferred slot when a doctor is free then; bookings are
+confirmed by staff
 """
-from fastapi import APIRouter, HTTPException
-from app.schemas.appointment import AppointmentRequest, AppointmentResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from app.core.config import settings
+from app.core.dependencies import require_admin_key
+from app.core.metrics import appointment_requests_total
+from app.core.tracing import traced
+from app.schemas.appointment import (
+    AppointmentRequest,
+    AppointmentResponse,
+    AvailabilityResponse,
+    DayAvailability,
+)
+from app.services.appointment_bulk import export_appointments, import_appointments, iter_appointment_rows
 from app.services.appointment_service import appointment_service
 from app.utils.disclaimers import get_appointment_disclaimer
-from datetime import date
+from app.utils.serialization import model_response
+from datetime import date, timedelta
+from typing import Iterator, Optional
+import asyncio
+import io
+import json
 import logging
+import tempfile
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +35,14 @@ router = APIRouter(prefix="/appointment", tags=["Appointment"])
 
 
 @router.post("/request", response_model=AppointmentResponse)
+@traced("create_appointment_request")
 async def create_appointment_request(
     request: AppointmentRequest
-) -> AppointmentResponse:
+) -> Response:
     """
     Create an appointment request
-    This is UI-only - does not actually schedule appointments
+    The preferred slot is reserved if a doctor of the category is free then,
+    and the request is stored for staff to confirm
     
     Args:
         request: Appointment request data
@@ -35,15 +56,17 @@ async def create_appointment_request(
     try:
         # Validate date is not in the past
         if request.preferred_date < date.today():
+            appointment_requests_total.labels("rejected").inc()
             raise HTTPException(
                 status_code=400,
                 detail="Preferred date cannot be in the past."
             )
         
         # Process appointment request
-        result = appointment_service.process_appointment_request(request)
+        result = await appointment_service.process_appointment_request(request)
         
         if not result["valid"]:
+            appointment_requests_total.labels("rejected").inc()
             raise HTTPException(
                 status_code=400,
                 detail=result["message"]
@@ -53,19 +76,182 @@ async def create_appointment_request(
         disclaimer = get_appointment_disclaimer()
         
         logger.info(f"Appointment request processed for: {request.name}")
+        appointment_requests_total.labels("recorded").inc()
         
-        return AppointmentResponse(
+        return model_response(AppointmentResponse(
             message="Your appointment request has been recorded.",
+            reference=result["reference"],
             note="This does not confirm a booking. Our team will contact you shortly to confirm your appointment.",
             disclaimer=disclaimer
-        )
+        ))
     
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error processing appointment request: {e}")
+        appointment_requests_total.labels("error").inc()
         raise HTTPException(
             status_code=500,
             detail="An error occurred while processing your appointment request. Please try again."
         )
 
+
+@router.get("/availability", response_model=AvailabilityResponse)
+async def get_availability(
+    category: str = Query(..., min_length=1, max_length=100, description="Doctor category"),
+    from_date: date = Query(..., alias="from", description="First day (YYYY-MM-DD)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day (defaults to a week from `from`)")
+) -> AvailabilityResponse:
+    """
+    Get free appointment times per day for a doctor category
+    
+    Args:
+        category: Doctor category (e.g., Cardiologist)
+        from_date: First day of the range
+        to_date: Last day of the range (inclusive)
+    
+    Returns:
+        Free times per day
+    
+    Raises:
+        HTTPException: If the category or range is invalid, or the lookup fails
+    """
+    if to_date is None:
+        to_date = from_date + timedelta(days=6)
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="`to` must not be before `from`.")
+    if (to_date - from_date).days >= settings.AVAILABILITY_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {settings.AVAILABILITY_MAX_RANGE_DAYS} days."
+        )
+    
+    try:
+        canonical = appointment_service.availability.resolve_category(category)
+        if canonical is None:
+            categories = ", ".join(appointment_service.availability.categories())
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown category. Available categories: {categories}."
+            )
+        
+        days = appointment_service.get_availability(canonical, from_date, to_date)
+        
+        return AvailabilityResponse(
+            category=canonical,
+            from_date=from_date,
+            to_date=to_date,
+            days=[DayAvailability(day=day, times=list(times)) for day, times in days]
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting appointment availability: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while checking availability. Please try again."
+        )
+
+
+# Upload bytes kept in memory before spooling to a temporary file
+IMPORT_SPOOL_MEMORY_BYTES = 1024 * 1024
+
+_MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+def _import_report(upload, fmt: str) -> Iterator[str]:
+    """
+    Run an import over a spooled upload and render the report as JSON lines
+    """
+    try:
+        handle = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+        rows = iter_appointment_rows(handle, fmt)
+        for entry in import_appointments(appointment_service, rows, settings.APPOINTMENT_IMPORT_CHUNK_SIZE):
+            yield json.dumps(entry) + "\n"
+    finally:
+        upload.close()
+
+
+@router.post("/import", dependencies=[Depends(require_admin_key)])
+async def import_appointment_file(
+    request: Request,
+    format: str = Query("jsonl", pattern="^(csv|jsonl)$", description="Body format: csv (with header) or jsonl")
+) -> StreamingResponse:
+    """
+    Bulk import appointment requests from a CSV or JSONL request body
+    Rows are validated like POST /appointment/request and stored in batched
+    transactions while the report streams back; the body is spooled to disk
+    first so memory use stays bounded
+    
+    Args:
+        request: Incoming request with the file as raw body
+        format: Body format
+    
+    Returns:
+        Streamed JSON lines: one {"row", "error"} entry per rejected row,
+        then a {"summary"} entry
+    
+    Raises:
+        HTTPException: If the body is too large
+    """
+    upload = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES)
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > settings.APPOINTMENT_IMPORT_MAX_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Import file cannot exceed {settings.APPOINTMENT_IMPORT_MAX_BYTES} bytes."
+                )
+            upload.write(chunk)
+        upload.seek(0)
+    except BaseException:
+        upload.close()
+        raise
+    
+    # Build the availability engine here so the import thread never races
+    # the event loop to create it
+    _ = appointment_service.availability
+    logger.info(f"Appointment import started ({received} bytes, {format})")
+    return StreamingResponse(
+        iterate_in_threadpool(_import_report(upload, format)),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get("/export", dependencies=[Depends(require_admin_key)])
+async def export_appointment_file(
+    format: str = Query("csv", pattern="^(csv|jsonl)$", description="Output format"),
+    category: Optional[str] = Query(None, description="Only this doctor category"),
+    from_date: Optional[date] = Query(None, alias="from", description="Only appointments on or after this day"),
+    to_date: Optional[date] = Query(None, alias="to", description="Only appointments on or before this day")
+) -> StreamingResponse:
+    """
+    Stream stored appointment requests as CSV or JSONL
+    
+    Args:
+        format: Output format
+        category: Category filter
+        from_date: First day filter
+        to_date: Last day filter
+    
+    Returns:
+        Streamed file download
+    """
+    store = appointment_service.store
+    # Include requests still waiting in the write-behind queue
+    await asyncio.get_running_loop().run_in_executor(None, store.flush)
+    if category:
+        category = appointment_service.canonical_category(category)
+    records = store.iter_records(
+        category=category,
+        from_date=from_date.isoformat() if from_date else None,
+        to_date=to_date.isoformat() if to_date else None,
+    )
+    return StreamingResponse(
+        iterate_in_threadpool(export_appointments(records, format)),
+        media_type=_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="appointments.{format}"'}
+    )
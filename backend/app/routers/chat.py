@@ -2,24 +2,59 @@
 Chat Router
 Handles AI medical assistant chat interactions
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
 from app.schemas.chat import ChatRequest, ChatResponse
-from app.core.dependencies import get_ai_service
-from app.services.ai_service import AIService
+from app.core.dependencies import get_ai_service, get_conversation_memory
+from app.core.tracing import traced
+from app.services.ai_service import AIService, StreamInterrupted
+from app.services.llm_admission import AdmissionRejected
+from app.services.conversation_store import ConversationMemory, issue_conversation_id, verify_conversation_id
 from app.utils.disclaimers import get_chat_disclaimer
-import uuid
+from app.utils.serialization import model_response
+from typing import AsyncIterator
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
+_BUSY_DETAIL = "The assistant is busy right now. Please try again in a moment."
+
+
+def _resolve_conversation_id(request: ChatRequest) -> str:
+    """
+    Get the conversation id for a request, issuing a new one if none was sent
+    
+    Args:
+        request: Chat request
+    
+    Returns:
+        Server-issued conversation id
+    
+    Raises:
+        HTTPException: 400 if the client sent an id this server did not issue
+    """
+    if request.conversation_id is None:
+        return issue_conversation_id()
+    if not verify_conversation_id(request.conversation_id):
+        logger.warning("Rejected chat request with an invalid conversation_id")
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid conversation_id. Omit it to start a new conversation."
+        )
+    return request.conversation_id
+
 
 @router.post("", response_model=ChatResponse)
+@traced("chat")
 async def chat(
     request: ChatRequest,
-    ai_service: AIService = Depends(get_ai_service)
-) -> ChatResponse:
+    ai_service: AIService = Depends(get_ai_service),
+    memory: ConversationMemory = Depends(get_conversation_memory)
+) -> Response:
     """
     Chat endpoint for AI medical assistant
     Provides healthcare-safe, informational responses
@@ -27,29 +62,43 @@ async def chat(
     Args:
         request: Chat request with user message
         ai_service: Injected AI service instance
+        memory: Injected conversation memory
     
     Returns:
         Chat response with AI-generated message and disclaimer
     
     Raises:
-        HTTPException: If message processing fails
+        HTTPException: 400 for an invalid conversation_id, 503 if the upstream
+            is saturated, 500 if message processing fails
     """
+    conversation_id = _resolve_conversation_id(request)
+    
     try:
-        # Generate or use conversation ID
-        conversation_id = request.conversation_id or str(uuid.uuid4())
+        # Load bounded prior context for follow-up messages (off the event
+        # loop, since the store may be on disk)
+        loop = asyncio.get_running_loop()
+        history = await loop.run_in_executor(None, memory.build_context, request.conversation_id)
         
         # Generate AI response using injected service
-        ai_response = await ai_service.generate_response(request.message)
+        ai_response = await ai_service.generate_response(request.message, history)
+        await loop.run_in_executor(None, memory.append_exchange, conversation_id, request.message, ai_response)
         
         # Get disclaimer
         disclaimer = get_chat_disclaimer()
         
         logger.info(f"Chat response generated for conversation: {conversation_id}")
         
-        return ChatResponse(
+        return model_response(ChatResponse(
             response=ai_response,
             conversation_id=conversation_id,
             disclaimer=disclaimer
+        ))
+    
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=_BUSY_DETAIL,
+            headers={"Retry-After": str(int(e.retry_after))}
         )
     
     except Exception as e:
@@ -59,3 +108,87 @@ async def chat(
             detail="An error occurred while processing your request. Please try again."
         )
 
+
+def _sse_event(event: str, data: dict) -> str:
+    """
+    Format a Server-Sent Events message
+    
+    Args:
+        event: Event name
+        data: JSON-serializable event payload
+    
+    Returns:
+        SSE-formatted message string
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    ai_service: AIService = Depends(get_ai_service),
+    memory: ConversationMemory = Depends(get_conversation_memory)
+) -> StreamingResponse:
+    """
+    Streaming chat endpoint for AI medical assistant (Server-Sent Events)
+    Sends response text as it is generated to reduce time-to-first-byte
+    
+    Events:
+        delta: {"content": "..."} - next fragment of the response
+        done: {"conversation_id": "...", "disclaimer": "..."} - final event
+        error: {"detail": "..."} - sent instead of done if the stream fails,
+            including after some deltas were sent ("retry_after" is included
+            when the upstream is saturated)
+    
+    Args:
+        request: Chat request with user message
+        ai_service: Injected AI service instance
+        memory: Injected conversation memory
+    
+    Returns:
+        Streaming text/event-stream response
+    
+    Raises:
+        HTTPException: 400 for an invalid conversation_id
+    """
+    conversation_id = _resolve_conversation_id(request)
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            loop = asyncio.get_running_loop()
+            history = await loop.run_in_executor(None, memory.build_context, request.conversation_id)
+            parts = []
+            async for delta in ai_service.stream_response(request.message, history):
+                parts.append(delta)
+                yield _sse_event("delta", {"content": delta})
+            await loop.run_in_executor(
+                None, memory.append_exchange, conversation_id, request.message, "".join(parts).strip()
+            )
+            
+            yield _sse_event("done", {
+                "conversation_id": conversation_id,
+                "disclaimer": get_chat_disclaimer(),
+            })
+            logger.info(f"Chat response streamed for conversation: {conversation_id}")
+        
+        except AdmissionRejected as e:
+            yield _sse_event("error", {"detail": _BUSY_DETAIL, "retry_after": e.retry_after})
+        
+        except StreamInterrupted as e:
+            # The partial answer is not stored, so the next turn does not build on it
+            logger.warning(f"Chat stream interrupted for conversation {conversation_id}: {e}")
+            yield _sse_event("error", {
+                "detail": "The response was interrupted. Please try again."
+            })
+        
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {e}")
+            yield _sse_event("error", {
+                "detail": "An error occurred while processing your request. Please try again."
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,9 +2,11 @@
 Health Check Router
 Provides system health and readiness endpoints
 """
-from fastapi import APIRouter
-from typing import Dict
+from fastapi import APIRouter, Depends
+from typing import Any, Dict
 from app.core.config import settings
+from app.core.dependencies import get_ai_service
+from app.services.ai_service import AIService
 
 router = APIRouter(prefix="/health", tags=["Health"])
 
@@ -55,3 +57,18 @@ async def version() -> Dict[str, str]:
         "status": "running"
     }
 
+
+@router.get("/llm", response_model=Dict[str, Any])
+async def llm_admission(ai_service: AIService = Depends(get_ai_service)) -> Dict[str, Any]:
+    """
+    Upstream LLM metrics
+    Reports per-provider health and latency, hedging/failover counters and
+    admission state (in-flight calls, queue depth, shed counts, wait times)
+    
+    Args:
+        ai_service: Injected AI service instance
+    
+    Returns:
+        Dictionary with routing and admission statistics
+    """
+    return {**ai_service.router.stats(), "admission": ai_service.admission.stats()}
@@ -2,10 +2,18 @@
 Medicine Router
 Handles medicine information search
 """
-from fastapi import APIRouter, HTTPException, Query
-from app.schemas.medicine import MedicineSearchResponse
+from fastapi import APIRouter, HTTPException, Query, Response
+from app.core.tracing import traced
+from app.schemas.medicine import (
+    MedicineBatchSearchRequest,
+    MedicineBatchSearchResponse,
+    MedicineSearchResponse,
+    MedicineSuggestResponse,
+)
 from app.services.medicine_service import medicine_service
-from app.utils.disclaimers import get_medicine_disclaimer
+from app.utils.disclaimers import get_medicine_disclaimer_json
+from app.utils.serialization import RawJSONResponse, dumps
+from typing import List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,16 +21,34 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/medicine", tags=["Medicine"])
 
 
+def _json_array(items: List[bytes]) -> bytes:
+    """
+    Join pre-serialized JSON values into a JSON array
+    
+    Args:
+        items: JSON bytes of each element
+    
+    Returns:
+        JSON array bytes
+    """
+    return b"[" + b",".join(items) + b"]"
+
+
 @router.get("/search", response_model=MedicineSearchResponse)
+@traced("search_medicine")
 async def search_medicine(
-    q: str = Query(..., min_length=1, max_length=100, description="Medicine name to search")
-) -> MedicineSearchResponse:
+    q: str = Query(..., min_length=1, max_length=100, description="Medicine name to search"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results")
+) -> Response:
     """
     Search for medicine information
     Returns non-prescriptive, educational information only
+    The body is assembled from pre-serialized catalog entries and disclaimer;
+    MedicineSearchResponse documents its shape
     
     Args:
         q: Search query (medicine name)
+        limit: Maximum number of results
     
     Returns:
         Medicine search results with disclaimer
@@ -32,17 +58,14 @@ async def search_medicine(
     """
     try:
         # Search for medicines
-        results = medicine_service.search_medicines(q)
-        
-        # Get disclaimer
-        disclaimer = get_medicine_disclaimer()
+        results = medicine_service.search_medicines_json(q, limit)
         
         logger.info(f"Medicine search completed for query: {q}, found {len(results)} results")
         
-        return MedicineSearchResponse(
-            results=results,
-            disclaimer=disclaimer,
-            query=q
+        return RawJSONResponse(
+            b'{"results":' + _json_array(results)
+            + b',"disclaimer":' + get_medicine_disclaimer_json()
+            + b',"query":' + dumps(q) + b"}"
         )
     
     except Exception as e:
@@ -52,3 +75,57 @@ async def search_medicine(
             detail="An error occurred while searching for medicine information. Please try again."
         )
 
+
+@router.post("/search/batch", response_model=MedicineBatchSearchResponse)
+async def search_medicine_batch(request: MedicineBatchSearchRequest) -> Response:
+    """
+    Look up a whole medication list in one request
+    Returns non-prescriptive, educational information only
+    
+    Args:
+        request: Queries and per-query result limit
+    
+    Returns:
+        Per-query results with a single shared disclaimer
+    
+    Raises:
+        HTTPException: If search fails
+    """
+    try:
+        matches = medicine_service.search_medicines_batch_json(request.queries, request.limit)
+        
+        results = [
+            b'{"query":' + dumps(query) + b',"results":' + _json_array(entries) + b"}"
+            for query, entries in zip(request.queries, matches)
+        ]
+        return RawJSONResponse(
+            b'{"results":' + _json_array(results) + b',"disclaimer":' + get_medicine_disclaimer_json() + b"}"
+        )
+    
+    except Exception as e:
+        logger.error(f"Error in batch medicine search: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while searching for medicine information. Please try again."
+        )
+
+
+@router.get("/suggest", response_model=MedicineSuggestResponse)
+async def suggest_medicine(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Text typed so far"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions")
+) -> Response:
+    """
+    Autocomplete medicine names
+    Returns names only; ETag, Cache-Control and 304 answers are added by the
+    HTTP cache middleware, keyed on the catalog version
+    
+    Args:
+        prefix: Text typed so far
+        limit: Maximum number of suggestions
+    
+    Returns:
+        Suggestion list
+    """
+    suggestions = medicine_service.suggest_medicines(prefix, limit)
+    return RawJSONResponse(dumps({"prefix": prefix, "suggestions": suggestions}))
@@ -0,0 +1,38 @@
+"""
+Metrics Router
+Exposes application metrics in the Prometheus text format
+"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+from app.core.dependencies import get_ai_service, get_conversation_memory
+from app.core.metrics import CONTENT_TYPE, registry
+from app.services.ai_service import AIService
+from app.services.conversation_store import ConversationMemory
+import asyncio
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", response_class=Response)
+async def metrics(
+    ai_service: AIService = Depends(get_ai_service),
+    memory: ConversationMemory = Depends(get_conversation_memory)
+) -> Response:
+    """
+    Prometheus scrape endpoint
+    Reports HTTP, upstream LLM, conversation memory, medicine search and
+    appointment metrics
+    
+    Args:
+        ai_service: Injected AI service instance
+        memory: Injected conversation memory
+    
+    Returns:
+        Metrics in the Prometheus text exposition format
+    """
+    # Counting cached responses and stored conversations may read SQLite, so
+    # the collectors run off the loop
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, ai_service.collect_metrics)
+    await loop.run_in_executor(None, memory.collect_metrics)
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -4,7 +4,7 @@ Pydantic models for appointment endpoint
 """
 from pydantic import BaseModel, Field
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
 
 class AppointmentRequest(BaseModel):
@@ -19,6 +19,8 @@ class AppointmentRequest(BaseModel):
     )
     email: str = Field(
         ...,
+        max_length=254,
+        pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$",
         description="Patient's email address"
     )
     phone: str = Field(
@@ -67,6 +69,10 @@ class AppointmentResponse(BaseModel):
         ...,
         description="Confirmation message for the appointment request"
     )
+    reference: Optional[str] = Field(
+        None,
+        description="Reference for following up on the request"
+    )
     note: str = Field(
         ...,
         description="Important note about the appointment request"
@@ -80,8 +86,45 @@ class AppointmentResponse(BaseModel):
         json_schema_extra = {
             "example": {
                 "message": "Your appointment request has been recorded.",
+                "reference": "3f9c2a7d1b04",
                 "note": "This does not confirm a booking. Our team will contact you shortly.",
                 "disclaimer": "This appointment request does not confirm a booking..."
             }
         }
 
+
+class DayAvailability(BaseModel):
+    """
+    Free appointment times on one day
+    """
+    day: date = Field(..., description="Day")
+    times: List[str] = Field(
+        ...,
+        description="Free start times (HH:MM) with at least one doctor available"
+    )
+
+
+class AvailabilityResponse(BaseModel):
+    """
+    Response schema for appointment availability
+    """
+    category: str = Field(..., description="Doctor category")
+    from_date: date = Field(..., description="First day in the range")
+    to_date: date = Field(..., description="Last day in the range")
+    days: List[DayAvailability] = Field(
+        ...,
+        description="Free times per day, in date order"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "category": "Cardiologist",
+                "from_date": "2026-01-12",
+                "to_date": "2026-01-13",
+                "days": [
+                    {"day": "2026-01-12", "times": ["09:00", "09:30", "10:30"]},
+                    {"day": "2026-01-13", "times": ["09:00", "12:00", "12:30"]}
+                ]
+            }
+        }
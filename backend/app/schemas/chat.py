@@ -19,14 +19,15 @@ class ChatRequest(BaseModel):
     )
     conversation_id: Optional[str] = Field(
         None,
-        description="Optional conversation ID for maintaining context"
+        max_length=100,
+        description="Optional conversation ID returned by an earlier response (server-issued)"
     )
     
     class Config:
         json_schema_extra = {
             "example": {
                 "message": "I have frequent headaches",
-                "conversation_id": "123e4567-e89b-12d3-a456-426614174000"
+                "conversation_id": "3f2b8a1c-5d4e-4f6a-9b7c-8d9e0f1a2b3c.6c1e0b9a4d2f7e3c8b5a1d0e9f4c7b2a"
             }
         }
 
@@ -52,7 +53,7 @@ class ChatResponse(BaseModel):
         json_schema_extra = {
             "example": {
                 "response": "I can share general information about headaches...",
-                "conversation_id": "123e4567-e89b-12d3-a456-426614174000",
+                "conversation_id": "3f2b8a1c-5d4e-4f6a-9b7c-8d9e0f1a2b3c.6c1e0b9a4d2f7e3c8b5a1d0e9f4c7b2a",
                 "disclaimer": "This information is provided for educational purposes only..."
             }
         }
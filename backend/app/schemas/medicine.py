@@ -3,7 +3,10 @@ Medicine Request/Response Schemas
 Pydantic models for medicine search endpoint
 """
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Annotated, List
+
+# Largest medication list accepted by the batch search endpoint
+MAX_BATCH_QUERIES = 500
 
 
 class MedicineInfo(BaseModel):
@@ -63,3 +66,64 @@ class MedicineSearchResponse(BaseModel):
             }
         }
 
+
+class MedicineSuggestResponse(BaseModel):
+    """
+    Response schema for medicine name autocomplete
+    """
+    prefix: str = Field(..., description="Original prefix")
+    suggestions: List[str] = Field(
+        ...,
+        description="Medicine names starting with the prefix, best first"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "prefix": "par",
+                "suggestions": ["Paracetamol"]
+            }
+        }
+
+
+class MedicineBatchSearchRequest(BaseModel):
+    """
+    Request schema for batch medicine search
+    """
+    queries: List[Annotated[str, Field(min_length=1, max_length=100)]] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_QUERIES,
+        description="Medicine names to look up (duplicates are resolved once)"
+    )
+    limit: int = Field(5, ge=1, le=50, description="Maximum number of results per query")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "queries": ["paracetamol", "ibuprofen 400mg", "losec"],
+                "limit": 3
+            }
+        }
+
+
+class MedicineBatchResult(BaseModel):
+    """
+    Results for one query of a batch search
+    """
+    query: str = Field(..., description="Original search query")
+    results: List[MedicineInfo] = Field(..., description="Matching medicine information")
+
+
+class MedicineBatchSearchResponse(BaseModel):
+    """
+    Response schema for batch medicine search
+    """
+    results: List[MedicineBatchResult] = Field(
+        ...,
+        description="Per-query results in request order"
+    )
+    disclaimer: str = Field(
+        ...,
+        description="Medical disclaimer for medicine information"
+    )
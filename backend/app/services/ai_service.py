@@ -1,17 +1,55 @@
 """
 AI Service
 Handles AI-powered medical assistant responses
-Supports OpenAI integration with safe fallback
+Supports OpenAI-compatible upstreams (routed across providers) with safe fallback
 """
+import asyncio
 import os
+import json
 import httpx
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional
+import time
 from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.core.metrics import (
+    chat_responses_total,
+    llm_circuit_open,
+    llm_in_flight,
+    llm_queue_depth,
+    llm_request_duration_seconds,
+    llm_requests_total,
+    llm_tokens_total,
+)
+from app.core.tracing import SPAN_KIND_CLIENT, Span, current_span, trace_headers, tracer
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitOpenError
+from app.services.llm_admission import AdmissionRejected, create_llm_admission
+from app.services.llm_providers import LLMProvider, create_provider_router
+from app.services.response_cache import create_response_cache
+from app.services.symptom_router import symptom_router
 from app.utils.disclaimers import get_chat_disclaimer
 import logging
 
 logger = logging.getLogger(__name__)
 
+# llm_circuit_open gauge value per breaker state
+_CIRCUIT_GAUGE = {CLOSED: 0.0, HALF_OPEN: 0.5, OPEN: 1.0}
+
+
+class StreamInterrupted(Exception):
+    """
+    Upstream stream failed after part of the response was already yielded
+    """
+
+    def __init__(self, provider: str, cause: Exception):
+        """
+        Args:
+            provider: Provider that was streaming
+            cause: Error that ended the stream
+        """
+        super().__init__(f"Stream from {provider} interrupted: {cause}")
+        self.provider = provider
+        self.cause = cause
+
 
 class AIService:
     """
@@ -19,11 +57,16 @@ class AIService:
     """
     
     def __init__(self):
-        self.api_key = settings.OPENAI_API_KEY
-        self.model = settings.OPENAI_MODEL
         self.temperature = settings.OPENAI_TEMPERATURE
         self.max_tokens = settings.OPENAI_MAX_TOKENS
-        self.use_openai = bool(self.api_key)
+        # Concurrency/rate limits and coalescing for upstream calls
+        self.admission = create_llm_admission()
+        # Upstream providers, ranked by observed latency and error rate
+        self.router = create_provider_router(self.admission)
+        self.use_openai = bool(self.router.providers)
+        self.model = self.router.providers[0].model if self.use_openai else settings.OPENAI_MODEL
+        # Only upstream answers are cached; the fallback is already free to compute
+        self.response_cache = create_response_cache() if self.use_openai else None
     
     def _get_system_prompt(self) -> str:
         """
@@ -55,107 +98,342 @@ Always maintain a neutral, supportive tone. Never create urgency or alarm."""
         Returns:
             Safe, conservative medical response
         """
-        message_lower = user_message.lower()
+        chat_responses_total.labels("fallback").inc()
+        return symptom_router.route(user_message)
+    
+    def _build_payload(
+        self,
+        user_message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        stream: bool = False
+    ) -> dict:
+        """
+        Build chat completion request payload
         
-        # Common health topics with safe responses
-        if any(word in message_lower for word in ['headache', 'head', 'pain']):
-            return (
-                "I understand you're experiencing headaches. Headaches can have various causes "
-                "including stress, dehydration, tension, or underlying health conditions. "
-                "It's important to stay hydrated, get adequate rest, and manage stress. "
-                "If headaches are frequent, severe, or persistent, I strongly recommend "
-                "consulting with a healthcare professional for proper evaluation."
-            )
+        Args:
+            user_message: User's message
+            history: Prior conversation messages (oldest first)
+            stream: Whether to request incremental (streamed) deltas
         
-        elif any(word in message_lower for word in ['fever', 'temperature', 'hot']):
-            return (
-                "Fever is your body's natural response to infection or illness. "
-                "For mild fevers, rest and hydration are important. Monitor your temperature "
-                "and symptoms. If the fever is high (above 101.3°F or 38.5°C), persistent, "
-                "or accompanied by severe symptoms, please consult with a healthcare professional "
-                "promptly for appropriate care."
-            )
+        Returns:
+            JSON-serializable request body
+        """
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self._get_system_prompt()},
+                *(history or []),
+                {"role": "user", "content": user_message}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+    
+    def _chunk_text(self, text: str, words_per_chunk: int = 4) -> List[str]:
+        """
+        Split a complete response into small chunks for streamed delivery
         
-        elif any(word in message_lower for word in ['cough', 'cold', 'flu']):
-            return (
-                "Respiratory symptoms like coughs and colds are common. Rest, hydration, and "
-                "proper nutrition can support your recovery. If symptoms are severe, persistent, "
-                "or you have difficulty breathing, please seek medical attention. "
-                "A healthcare professional can provide appropriate guidance for your specific situation."
-            )
+        Args:
+            text: Full response text
+            words_per_chunk: Number of words per chunk
         
-        elif any(word in message_lower for word in ['stomach', 'nausea', 'digest', 'stomachache']):
-            return (
-                "Digestive discomfort can result from various factors including diet, stress, "
-                "or underlying conditions. Staying hydrated and eating light, easily digestible foods "
-                "may help. If symptoms are severe, persistent, or accompanied by other concerning "
-                "symptoms, please consult with a healthcare professional."
-            )
+        Returns:
+            List of text chunks that concatenate back to the original text
+        """
+        words = text.split(" ")
+        return [
+            " ".join(words[i:i + words_per_chunk]) + (" " if i + words_per_chunk < len(words) else "")
+            for i in range(0, len(words), words_per_chunk)
+        ]
+    
+    def _cache_key(
+        self,
+        user_message: str,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> Optional[str]:
+        """
+        Get response cache key for a message
+        Follow-up turns are not cached since the answer depends on history
         
-        elif any(word in message_lower for word in ['sleep', 'insomnia', 'tired', 'fatigue']):
-            return (
-                "Sleep issues can significantly impact your health and well-being. "
-                "Maintaining a regular sleep schedule, creating a comfortable sleep environment, "
-                "and managing stress can help. If sleep problems persist or significantly affect "
-                "your daily life, I recommend discussing this with a healthcare professional "
-                "who can provide personalized guidance."
-            )
+        Args:
+            user_message: User's message
+            history: Prior conversation messages
         
-        else:
-            return (
-                "Thank you for your question. I'm here to provide general health information. "
-                "For specific medical concerns, symptoms, or health questions, I strongly recommend "
-                "consulting with a qualified healthcare professional who can provide personalized "
-                "advice based on your medical history and current condition. "
-                "Is there any general health information I can help you with today?"
-            )
+        Returns:
+            Cache key, or None if caching is disabled or not applicable
+        """
+        if self.response_cache is None or history:
+            return None
+        return self.response_cache.make_key(
+            user_message, self.model, self.temperature, self.max_tokens
+        )
     
-    async def generate_response(self, user_message: str) -> str:
+    def _record_usage(self, provider: LLMProvider, usage: Optional[dict], span: Optional[Span] = None) -> None:
+        """
+        Count the tokens an upstream response reports
+        
+        Args:
+            provider: Provider that answered
+            usage: The response's "usage" object, if any
+            span: Span to annotate (defaults to the current span)
+        """
+        if not usage:
+            return
+        span = span or current_span()
+        for kind in ("prompt", "completion"):
+            tokens = usage.get(f"{kind}_tokens")
+            if tokens:
+                llm_tokens_total.labels(provider.name, kind).inc(tokens)
+                if span is not None:
+                    span.set_attribute(f"llm.usage.{kind}_tokens", tokens)
+    
+    def _record_call(self, provider: LLMProvider, outcome: str, started: float) -> None:
+        """
+        Record the outcome and latency of one upstream call
+        
+        Args:
+            provider: Provider that was called
+            outcome: "success" or "error"
+            started: perf_counter() value when the call was sent
+        """
+        llm_requests_total.labels(provider.name, outcome).inc()
+        llm_request_duration_seconds.labels(provider.name).observe(time.perf_counter() - started)
+    
+    def collect_metrics(self) -> None:
+        """
+        Refresh gauges that mirror admission, circuit and response cache state
+        before a scrape
+        """
+        if self.response_cache is not None:
+            self.response_cache.collect_metrics()
+        admission = self.admission.stats()["models"]
+        for provider in self.router.providers:
+            limiter = admission.get(provider.name, {})
+            llm_in_flight.labels(provider.name).set(limiter.get("in_flight", 0))
+            llm_queue_depth.labels(provider.name).set(limiter.get("queue_depth", 0))
+            state = provider.breaker.state if provider.breaker is not None else CLOSED
+            llm_circuit_open.labels(provider.name).set(_CIRCUIT_GAUGE[state])
+    
+    async def _complete(self, provider: LLMProvider, payload: dict) -> str:
+        """
+        Send one (non-streamed) chat completion request upstream
+        
+        Args:
+            provider: Provider to call
+            payload: Request body from _build_payload() with the provider's model
+        
+        Returns:
+            Response text
+        """
+        client = get_http_client()
+        with tracer.span("llm.complete", kind=SPAN_KIND_CLIENT, **{"llm.provider": provider.name, "llm.model": provider.model}):
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    provider.completions_url,
+                    headers={**provider.headers(), **trace_headers()},
+                    json=payload,
+                    timeout=provider.request_timeout(),
+                )
+                response.raise_for_status()
+                data = response.json()
+                content = data["choices"][0]["message"]["content"].strip()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._record_call(provider, "error", started)
+                raise
+            self._record_call(provider, "success", started)
+            self._record_usage(provider, data.get("usage"))
+            return content
+    
+    async def generate_response(
+        self,
+        user_message: str,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> str:
         """
         Generate AI response to user message
-        Uses OpenAI if available, otherwise uses safe fallback
+        Uses the configured LLM providers if available, otherwise uses safe fallback
         
         Args:
             user_message: User's message
+            history: Prior conversation messages (oldest first)
         
         Returns:
             AI-generated or fallback response
+        
+        Raises:
+            AdmissionRejected: If the upstream is saturated and the request was shed
         """
         if not self.use_openai:
-            logger.info("OpenAI API key not found, using safe fallback response")
+            logger.info("No LLM provider configured, using safe fallback response")
             return self._get_safe_fallback_response(user_message)
         
+        cache_key = self._cache_key(user_message, history)
+        if cache_key is not None:
+            cached = await self.response_cache.lookup(cache_key)
+            if cached is not None:
+                logger.info("Serving AI response from cache")
+                chat_responses_total.labels("cache").inc()
+                return cached
+        
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": [
-                            {"role": "system", "content": self._get_system_prompt()},
-                            {"role": "user", "content": user_message}
-                        ],
-                        "temperature": self.temperature,
-                        "max_tokens": self.max_tokens,
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
-                ai_response = data["choices"][0]["message"]["content"].strip()
-                logger.info("Successfully generated AI response")
-                return ai_response
+            payload = self._build_payload(user_message, history)
+            ai_response = await self.admission.share(
+                self.admission.request_key(payload),
+                lambda: self.router.complete(payload, self._complete),
+            )
+            logger.info("Successfully generated AI response")
+            chat_responses_total.labels("upstream").inc()
+            if cache_key is not None:
+                await self.response_cache.store(cache_key, ai_response)
+            return ai_response
+        
+        except AdmissionRejected:
+            chat_responses_total.labels("shed").inc()
+            raise
+        
+        except CircuitOpenError as e:
+            logger.warning(f"{e}, using fallback response")
+            return self._get_safe_fallback_response(user_message)
         
         except httpx.HTTPError as e:
-            logger.warning(f"OpenAI API error: {e}, using fallback response")
+            logger.warning(f"LLM upstream error: {e}, using fallback response")
             return self._get_safe_fallback_response(user_message)
         
         except Exception as e:
             logger.error(f"Unexpected error in AI service: {e}, using fallback response")
             return self._get_safe_fallback_response(user_message)
+    
+    async def stream_response(
+        self,
+        user_message: str,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream AI response to user message as incremental text deltas
+        Streams from the best available provider, otherwise chunks the safe fallback
+        
+        Args:
+            user_message: User's message
+            history: Prior conversation messages (oldest first)
+        
+        Yields:
+            Response text fragments in order
+        
+        Raises:
+            AdmissionRejected: If every provider is saturated (before anything is yielded)
+            StreamInterrupted: If the upstream fails after part of the response was yielded
+        """
+        if not self.use_openai:
+            logger.info("No LLM provider configured, streaming safe fallback response")
+            for chunk in self._chunk_text(self._get_safe_fallback_response(user_message)):
+                yield chunk
+            return
+        
+        cache_key = self._cache_key(user_message, history)
+        if cache_key is not None:
+            cached = await self.response_cache.lookup(cache_key)
+            if cached is not None:
+                logger.info("Streaming AI response from cache")
+                chat_responses_total.labels("cache").inc()
+                for chunk in self._chunk_text(cached):
+                    yield chunk
+                return
+        
+        streamed_any = False
+        parts: List[str] = []
+        payload = self._build_payload(user_message, history, stream=True)
+        rejected: Optional[AdmissionRejected] = None
+        failed = False
+        error: Optional[Exception] = None
+        client = get_http_client()
+        # Try providers in ranked order until one starts streaming; streams hold
+        # their admission slot until the last token and are neither coalesced nor hedged
+        for provider in self.router.ranked():
+            try:
+                provider.allow()
+            except CircuitOpenError:
+                continue
+            started = time.perf_counter()
+            span = tracer.start_span(
+                "llm.stream", kind=SPAN_KIND_CLIENT, **{"llm.provider": provider.name, "llm.model": provider.model}
+            )
+            try:
+                async with self.admission.slot(provider.name), client.stream(
+                    "POST",
+                    provider.completions_url,
+                    headers={**provider.headers(), **({"traceparent": span.traceparent()} if span else {})},
+                    json={**payload, "model": provider.model},
+                    timeout=provider.request_timeout(),
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        event = json.loads(data)
+                        # Only sent when the upstream is asked to include usage
+                        self._record_usage(provider, event.get("usage"), span)
+                        if not event.get("choices"):
+                            continue
+                        delta = event["choices"][0].get("delta", {}).get("content")
+                        if delta:
+                            streamed_any = True
+                            parts.append(delta)
+                            yield delta
+                provider.record_success()
+                self._record_call(provider, "success", started)
+                chat_responses_total.labels("upstream").inc()
+                logger.info(f"Successfully streamed AI response from {provider.name}")
+                if cache_key is not None and parts:
+                    await self.response_cache.store(cache_key, "".join(parts).strip())
+                return
+            
+            except AdmissionRejected as e:
+                provider.release()
+                rejected = e
+                continue
+            
+            except (asyncio.CancelledError, GeneratorExit):
+                # Client went away; the call says nothing about the provider
+                provider.release()
+                raise
+            
+            except httpx.HTTPError as e:
+                logger.warning(f"Streaming error from {provider.name}: {e}")
+                error = e
+                if span is not None:
+                    span.record_error(e)
+            
+            except Exception as e:
+                logger.error(f"Unexpected error streaming from {provider.name}: {e}")
+                error = e
+                if span is not None:
+                    span.record_error(e)
+            
+            finally:
+                tracer.end_span(span)
+            
+            provider.record_failure()
+            self._record_call(provider, "error", started)
+            failed = True
+            # A partial answer cannot be retracted or continued elsewhere
+            if streamed_any:
+                raise StreamInterrupted(provider.name, error)
+        
+        if rejected is not None and not failed:
+            chat_responses_total.labels("shed").inc()
+            raise rejected
+        logger.warning("No LLM provider could stream a response, using fallback response")
+        for chunk in self._chunk_text(self._get_safe_fallback_response(user_message)):
+            yield chunk
 
 
 # Global AI service instance
@@ -0,0 +1,248 @@
+"""
+Appointment Bulk Import/Export
+Streaming CSV/JSONL pipelines over the appointment store
+Rows flow through generators and are committed in fixed-size chunks, so
+memory use stays constant regardless of file size
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+from pydantic import ValidationError
+from app.schemas.appointment import AppointmentRequest
+from app.services.appointment_store import AppointmentRecord, RECORD_FIELDS
+import csv
+import io
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Fields read from import rows (other columns are ignored)
+IMPORT_FIELDS = ("name", "email", "phone", "category", "preferred_date", "preferred_time", "reason")
+
+# Optional fields where an empty CSV cell means "not given"
+_OPTIONAL_FIELDS = ("preferred_time", "reason")
+
+# Rows serialized per chunk of export output
+EXPORT_CHUNK_ROWS = 500
+
+FORMATS = ("csv", "jsonl")
+
+
+def detect_format(filename: str) -> str:
+    """
+    Infer the bulk file format from a file name
+
+    Args:
+        filename: File name or path
+
+    Returns:
+        "csv" or "jsonl"
+
+    Raises:
+        ValueError: If the extension is not supported
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported appointment file type: {filename}")
+
+
+def iter_appointment_rows(handle: TextIO, fmt: str) -> Iterator[Tuple[int, Union[dict, str]]]:
+    """
+    Stream raw rows from a CSV (with header) or JSONL text stream
+
+    Args:
+        handle: Text stream
+        fmt: "csv" or "jsonl"
+
+    Yields:
+        (row number, row dictionary) or (row number, parse error message)
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(handle), start=1):
+            yield number, row
+    elif fmt == "jsonl":
+        number = 0
+        for line in handle:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, f"Invalid JSON: {e}"
+                continue
+            yield number, row if isinstance(row, dict) else "Row must be a JSON object"
+    else:
+        raise ValueError(f"Unsupported appointment format: {fmt}")
+
+
+def _clean(row: dict) -> Dict[str, object]:
+    """
+    Keep the import fields and treat empty optional cells as missing
+    """
+    cleaned = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+            if not value and field in _OPTIONAL_FIELDS:
+                value = None
+        if value is not None:
+            cleaned[field] = value
+    return cleaned
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+
+def _store_rematched(service, request: AppointmentRequest) -> Optional[str]:
+    """
+    Store a row whose reserved slot was taken by another process, matching
+    it again until it is stored or rejected
+
+    Args:
+        service: AppointmentService
+        request: Validated row
+
+    Returns:
+        Error message, or None if the row was stored
+    """
+    while True:
+        record, error = service.prepare_record(request)
+        if record is None:
+            return error
+        rejected = service.store.write_many([record])
+        if rejected is None:
+            service.release_record(record)
+            return "Could not be stored; please retry"
+        if not rejected:
+            return None
+
+
+class ImportSummary:
+    """
+    Counters for one import run
+    """
+    __slots__ = ("rows", "imported", "failed")
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"rows": self.rows, "imported": self.imported, "failed": self.failed}
+
+
+def import_appointments(
+    service,
+    rows: Iterable[Tuple[int, Union[dict, str]]],
+    chunk_size: int = 1000,
+) -> Iterator[dict]:
+    """
+    Validate rows and store them in batched transactions
+    Each row goes through AppointmentRequest validation and the same checks
+    (past dates, slot reservation) as POST /appointment/request
+
+    Args:
+        service: AppointmentService providing prepare_record/release_record and the store
+        rows: Output of iter_appointment_rows()
+        chunk_size: Records committed per transaction
+
+    Yields:
+        {"row": n, "error": message} for every rejected row, then a final
+        {"summary": {...}} entry
+    """
+    summary = ImportSummary()
+    chunk: List[Tuple[int, AppointmentRequest, AppointmentRecord]] = []
+
+    def flush() -> Iterator[dict]:
+        rejected = service.store.write_many([record for _, _, record in chunk])
+        if rejected is None:
+            for number, _, record in chunk:
+                service.release_record(record)
+                summary.failed += 1
+                yield {"row": number, "error": "Could not be stored; please retry"}
+            return
+        summary.imported += len(chunk) - len(rejected)
+        if rejected:
+            # Slots booked meanwhile by another process: match those rows again
+            taken = {record.reference for record in rejected}
+            for number, request, record in chunk:
+                if record.reference in taken:
+                    error = _store_rematched(service, request)
+                    if error is None:
+                        summary.imported += 1
+                    else:
+                        summary.failed += 1
+                        yield {"row": number, "error": error}
+
+    for number, row in rows:
+        summary.rows += 1
+        if isinstance(row, str):
+            summary.failed += 1
+            yield {"row": number, "error": row}
+            continue
+        try:
+            request = AppointmentRequest.model_validate(_clean(row))
+        except ValidationError as e:
+            summary.failed += 1
+            yield {"row": number, "error": _validation_message(e)}
+            continue
+        record, error = service.prepare_record(request)
+        if record is None:
+            summary.failed += 1
+            yield {"row": number, "error": error}
+            continue
+        chunk.append((number, request, record))
+        if len(chunk) >= chunk_size:
+            yield from flush()
+            chunk = []
+    if chunk:
+        yield from flush()
+
+    logger.info(
+        f"Appointment import finished: {summary.imported} imported, "
+        f"{summary.failed} failed of {summary.rows} rows"
+    )
+    yield {"summary": summary.to_dict()}
+
+
+def export_appointments(records: Iterable[AppointmentRecord], fmt: str) -> Iterator[str]:
+    """
+    Serialize records as CSV (with header) or JSONL text chunks
+
+    Args:
+        records: Records to export, e.g. AppointmentStore.iter_records()
+        fmt: "csv" or "jsonl"
+
+    Yields:
+        Text chunks of up to EXPORT_CHUNK_ROWS rows
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported appointment format: {fmt}")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(RECORD_FIELDS)
+    pending = 0
+    for record in records:
+        if writer is not None:
+            writer.writerow(record.to_row())
+        else:
+            buffer.write(json.dumps(record.to_dict()))
+            buffer.write("\n")
+        pending += 1
+        if pending >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
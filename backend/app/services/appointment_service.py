@@ -1,11 +1,15 @@
 """
 Appointment Service
 Handles appointment request processing
-UI-only support - no actual scheduling logic
+Requests are persisted and, when they name a bookable time, hold a slot
 """
+from typing import List, Optional, Tuple
+from app.core.config import settings
 from app.schemas.appointment import AppointmentRequest
+from app.services.appointment_store import AppointmentRecord, AppointmentStore, SlotTaken, create_appointment_store
+from app.services.availability import DEFAULT_DOCTORS, AvailabilityEngine, Slot, parse_time
 import logging
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -15,41 +19,217 @@ class AppointmentService:
     Service for handling appointment requests
     """
     
-    def process_appointment_request(self, request: AppointmentRequest) -> dict:
+    def __init__(self, store: Optional[AppointmentStore] = None, availability: Optional[AvailabilityEngine] = None):
+        """
+        Args:
+            store: Appointment persistence; created from settings when omitted
+            availability: Slot engine; built from the default roster and the
+                stored reservations when omitted
+        """
+        self._store = store
+        self._availability = availability
+        if store is not None:
+            store.on_dropped = self._release_dropped
+    
+    @property
+    def store(self) -> AppointmentStore:
+        """
+        Appointment store, opened on first use
+        """
+        if self._store is None:
+            self._store = create_appointment_store()
+            self._store.on_dropped = self._release_dropped
+        return self._store
+    
+    @property
+    def availability(self) -> AvailabilityEngine:
+        """
+        Slot availability, rebuilt from stored reservations on first use
+        Bookings made later by other processes are not seen here; the store's
+        unique slot index rejects them at commit (see SlotTaken)
+        """
+        if self._availability is None:
+            engine = AvailabilityEngine(
+                DEFAULT_DOCTORS,
+                horizon_days=settings.AVAILABILITY_HORIZON_DAYS,
+                cache_max_days=settings.AVAILABILITY_CACHE_MAX_DAYS,
+            )
+            reserved = self.store.reserved_slots(date.today().isoformat())
+            for category, day, time, doctor_id in reserved:
+                engine.reserve(category, date.fromisoformat(day), time, doctor_id)
+            logger.info(f"Availability loaded with {len(reserved)} reserved slots")
+            self._availability = engine
+        return self._availability
+    
+    def canonical_category(self, category: str) -> str:
+        """
+        Get the form a category is stored and filtered under
+        Roster categories use their canonical name regardless of case and
+        surrounding whitespace; other categories are only trimmed
+        
+        Args:
+            category: Category as supplied by a client, import file or CLI
+        
+        Returns:
+            Canonical category name
+        """
+        return self.availability.resolve_category(category) or category.strip()
+    
+    def prepare_record(self, request: AppointmentRequest) -> Tuple[Optional[AppointmentRecord], Optional[str]]:
+        """
+        Validate a request and build its record, reserving a slot if possible
+        If the preferred time falls within a doctor's hours for the category,
+        that slot is reserved atomically and the record's time becomes the
+        slot's start time; callers must release_record() if the record is then
+        not stored, except on SlotTaken
+        
+        Args:
+            request: Appointment request data
+        
+        Returns:
+            Tuple of (record, None) on success or (None, error message)
+        """
+        # Validate date is not in the past
+        if request.preferred_date < datetime.now().date():
+            return None, "Preferred date cannot be in the past."
+        
+        record = AppointmentRecord.from_request(request)
+        # Stored canonical so category filters (export) match however it was typed
+        record.category = self.canonical_category(request.category)
+        category = self.availability.resolve_category(request.category)
+        if category and request.preferred_time and parse_time(request.preferred_time) is not None:
+            slot = self.availability.reserve(category, request.preferred_date, request.preferred_time)
+            if slot is not None:
+                record.status = "reserved"
+                record.doctor_id = slot.doctor_id
+                # The slot start identifies the booking in the unique slot index
+                record.preferred_time = slot.time
+            elif self._within_hours(category, request.preferred_date, request.preferred_time):
+                alternatives = self.availability.next_free_slots(
+                    category, request.preferred_date, limit=3, after_time=request.preferred_time
+                )
+                suggestion = ", ".join(f"{alt.day.isoformat()} {alt.time}" for alt in alternatives)
+                return None, (
+                    f"The selected time is not available for {category}."
+                    + (f" Next available: {suggestion}." if suggestion else "")
+                )
+        return record, None
+    
+    def release_record(self, record: AppointmentRecord) -> None:
+        """
+        Release the slot held by a record that was not stored
+        
+        Args:
+            record: Record returned by prepare_record()
+        """
+        if record.status == "reserved" and record.doctor_id:
+            self.availability.release(
+                Slot(date.fromisoformat(record.preferred_date), record.preferred_time, record.doctor_id)
+            )
+    
+    def _release_dropped(self, records: List[AppointmentRecord]) -> None:
+        """
+        Release the slots of queued records the store could not commit
+        Called from the store's writer thread
+        
+        Args:
+            records: Records that were accepted but not stored
+        """
+        for record in records:
+            self.release_record(record)
+        logger.error(
+            f"Released slots of {len(records)} appointment requests that could not be stored: "
+            f"{[record.reference for record in records]}"
+        )
+    
+    async def process_appointment_request(self, request: AppointmentRequest) -> dict:
         """
         Process an appointment request
-        In production, this would save to a database
+        The request is queued for persistence; the call does not wait for
+        the database commit unless it reserves a slot. If another process
+        booked that slot first, the request is matched again (another doctor,
+        or rejected with the next free times)
         
         Args:
             request: Appointment request data
         
         Returns:
-            Dictionary with processing result
+            Dictionary with processing result and appointment reference
         """
-        # Log the appointment request (in production, save to database)
         logger.info(
             f"Appointment request received: {request.name}, "
             f"Category: {request.category}, Date: {request.preferred_date}"
         )
         
-        # Validate date is not in the past
-        if request.preferred_date < datetime.now().date():
+        record, error = self.prepare_record(request)
+        while record is not None:
+            try:
+                await self.store.add(record)
+                break
+            except SlotTaken:
+                # The slot stays marked taken here, so matching again moves on
+                logger.info(f"Slot {record.preferred_date} {record.preferred_time} {record.doctor_id} was booked elsewhere")
+                record, error = self.prepare_record(request)
+            except Exception:
+                self.release_record(record)
+                raise
+        if record is None:
             return {
                 "valid": False,
-                "message": "Preferred date cannot be in the past."
+                "message": error
             }
         
-        # In a real application, you would:
-        # 1. Save to database
-        # 2. Send confirmation email
-        # 3. Notify healthcare staff
-        # 4. Check availability
-        
-        # For now, just return success
         return {
             "valid": True,
-            "message": "Appointment request has been recorded successfully."
+            "message": "Appointment request has been recorded successfully.",
+            "reference": record.reference
         }
+    
+    def get_availability(self, category: str, start: date, end: date) -> List[Tuple[date, Tuple[str, ...]]]:
+        """
+        Get free appointment times per day over a date range
+        Each day comes from the per-(category, day) cache; days in the past
+        and times already passed today are left out
+        
+        Args:
+            category: Canonical doctor category
+            start: First day (inclusive)
+            end: Last day (inclusive)
+        
+        Returns:
+            (day, free "HH:MM" times) pairs in date order
+        """
+        now = datetime.now()
+        today = now.date()
+        current_time = now.strftime("%H:%M")
+        days = []
+        day = max(start, today)
+        while day <= end:
+            times = self.availability.free_times(category, day)
+            if day == today:
+                times = tuple(time for time in times if time > current_time)
+            days.append((day, times))
+            day += timedelta(days=1)
+        return days
+    
+    def _within_hours(self, category: str, day: date, time: str) -> bool:
+        """
+        Check whether any doctor of a category works at a given time
+        (requests outside working hours are recorded without a reservation)
+        """
+        minutes = parse_time(time)
+        weekday = day.weekday()
+        return any(
+            doctor.category == category and weekday in doctor.working_days and doctor.slot_at(minutes) >= 0
+            for doctor in self.availability.doctors
+        )
+    
+    def close(self) -> None:
+        """
+        Flush pending appointment writes and stop the background writer
+        """
+        if self._store is not None:
+            self._store.close()
 
 
 # Global appointment service instance
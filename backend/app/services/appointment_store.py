@@ -0,0 +1,576 @@
+"""
+Appointment Store
+SQLite persistence for appointment requests with write-behind batching
+Requests are queued in memory and a background writer commits them in one
+transaction every few milliseconds, so callers never wait on a per-request
+fsync; close() drains the queue so accepted requests survive shutdown.
+Notification outbox rows are committed in the same transaction.
+Records holding a slot are committed before add() returns instead: a unique
+index on reserved (doctor, day, time) rows makes the database the arbiter
+between workers and importers sharing the file
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+from app.schemas.appointment import AppointmentRequest
+from app.services.notifications import (
+    OUTBOX_SCHEMA,
+    OutboxMessage,
+    build_appointment_messages,
+    insert_outbox,
+    notifications_enabled,
+)
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Stored appointment fields, in table column order
+RECORD_FIELDS = (
+    "reference", "name", "email", "phone", "category",
+    "preferred_date", "preferred_time", "reason", "status", "created_at", "doctor_id",
+)
+
+# Upsert on the reference only, so a taken slot raises instead of replacing
+# the record that holds it
+_INSERT_SQL = (
+    f"INSERT INTO appointments ({', '.join(RECORD_FIELDS)}) "
+    f"VALUES ({', '.join('?' for _ in RECORD_FIELDS)}) "
+    f"ON CONFLICT (reference) DO UPDATE SET "
+    f"{', '.join(f'{column} = excluded.{column}' for column in RECORD_FIELDS[1:])}"
+)
+
+_RESERVED_SLOT_INDEX_SQL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_reserved_slot "
+    "ON appointments (doctor_id, preferred_date, preferred_time) WHERE status = 'reserved'"
+)
+
+# Attempts to commit a batch before its records are reported as lost
+WRITE_ATTEMPTS = 3
+
+
+class AppointmentStoreError(Exception):
+    """
+    Records could not be committed
+    """
+
+
+class SlotTaken(AppointmentStoreError):
+    """
+    Another stored record (e.g. from another worker) already holds the slot
+    """
+
+
+def _is_slot_conflict(error: sqlite3.IntegrityError) -> bool:
+    """
+    Check whether an insert failed on the reserved slot index
+    """
+    return "appointments.doctor_id" in str(error)
+
+
+class AppointmentRecord:
+    """
+    Stored appointment request
+    """
+    __slots__ = RECORD_FIELDS
+
+    def __init__(
+        self,
+        reference: str,
+        name: str,
+        email: str,
+        phone: str,
+        category: str,
+        preferred_date: str,
+        preferred_time: Optional[str] = None,
+        reason: Optional[str] = None,
+        status: str = "requested",
+        created_at: Optional[float] = None,
+        doctor_id: Optional[str] = None,
+    ):
+        self.reference = reference
+        self.name = name
+        self.email = email
+        self.phone = phone
+        self.category = category
+        self.preferred_date = preferred_date
+        self.preferred_time = preferred_time
+        self.reason = reason
+        self.status = status
+        self.created_at = created_at if created_at is not None else time.time()
+        self.doctor_id = doctor_id
+
+    @classmethod
+    def from_request(cls, request: AppointmentRequest) -> "AppointmentRecord":
+        """
+        Create a new record with a fresh reference from an API request
+
+        Args:
+            request: Appointment request data
+
+        Returns:
+            AppointmentRecord instance
+        """
+        return cls(
+            reference=uuid.uuid4().hex[:12],
+            name=request.name,
+            email=request.email,
+            phone=request.phone,
+            category=request.category,
+            preferred_date=request.preferred_date.isoformat(),
+            preferred_time=request.preferred_time,
+            reason=request.reason,
+        )
+
+    def to_row(self) -> Tuple:
+        return tuple(getattr(self, column) for column in RECORD_FIELDS)
+
+    def to_dict(self) -> Dict[str, object]:
+        return dict(zip(RECORD_FIELDS, self.to_row()))
+
+
+class AppointmentStore:
+    """
+    SQLite appointment table fed by a background write-behind queue
+    """
+
+    def __init__(
+        self,
+        path: str,
+        write_behind: bool = True,
+        flush_interval_ms: float = 5.0,
+        max_batch_size: int = 500,
+        max_queue_size: int = 10000,
+        synchronous: str = "FULL",
+        outbox_builder: Optional[Callable[["AppointmentRecord"], List[OutboxMessage]]] = None,
+        on_dropped: Optional[Callable[[List["AppointmentRecord"]], None]] = None,
+    ):
+        """
+        Args:
+            path: SQLite database file
+            write_behind: Queue writes for the background writer; when False
+                every add() commits its own transaction
+            flush_interval_ms: How long the writer waits to fill a batch
+            max_batch_size: Maximum records committed per transaction
+            max_queue_size: Queued records before add() applies backpressure
+            synchronous: SQLite synchronous pragma (FULL fsyncs every commit)
+            outbox_builder: Notifications to enqueue for each stored record;
+                they are written in the same transaction as the record
+            on_dropped: Called from the writer thread with queued records that
+                could not be committed (e.g. to release their slots), since
+                their callers were already told they were accepted
+        """
+        self.path = path
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.synchronous = synchronous
+        self.outbox_builder = outbox_builder
+        self.on_dropped = on_dropped
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        # Accepted but not yet committed records, for read-your-writes
+        self._pending: Dict[str, AppointmentRecord] = {}
+        self._pending_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches_committed = 0
+        self.records_committed = 0
+        self.records_lost = 0
+
+        self._read_lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS appointments ("
+            "reference TEXT PRIMARY KEY, name TEXT NOT NULL, email TEXT NOT NULL, "
+            "phone TEXT NOT NULL, category TEXT NOT NULL, preferred_date TEXT NOT NULL, "
+            "preferred_time TEXT, reason TEXT, status TEXT NOT NULL, created_at REAL NOT NULL, "
+            "doctor_id TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_appointments_category_date "
+            "ON appointments (category, preferred_date)"
+        )
+        try:
+            self._conn.execute(_RESERVED_SLOT_INDEX_SQL)
+        except sqlite3.IntegrityError:
+            logger.error(
+                f"{path} already has double-booked slots; reserved slots are not "
+                f"enforced across processes until they are resolved"
+            )
+        if outbox_builder is not None:
+            for statement in OUTBOX_SCHEMA:
+                self._conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        return conn
+
+    def start(self) -> None:
+        """
+        Start the background writer (idempotent)
+        """
+        if not self.write_behind:
+            return
+        with self._start_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run_writer, name="appointment-writer", daemon=True)
+                self._writer.start()
+
+    async def add(self, record: AppointmentRecord) -> None:
+        """
+        Persist an appointment record
+        With write-behind this only queues the record; if the queue is full
+        the caller waits (off the event loop) for the writer to catch up.
+        Records holding a slot are always committed before returning, so a
+        slot taken by another process is reported to the caller
+
+        Args:
+            record: Record to store
+
+        Raises:
+            SlotTaken: If another stored record holds the record's slot
+            AppointmentStoreError: If the commit failed (write-behind off or reserved record)
+        """
+        if not self.write_behind or record.status == "reserved":
+            rejected = await asyncio.get_running_loop().run_in_executor(None, self.write_many, [record])
+            if rejected is None:
+                raise AppointmentStoreError(f"Appointment {record.reference} could not be stored")
+            if rejected:
+                raise SlotTaken(f"Slot of appointment {record.reference} is already booked")
+            return
+
+        self.start()
+        with self._pending_lock:
+            self._pending[record.reference] = record
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, record)
+
+    def get(self, reference: str) -> Optional[AppointmentRecord]:
+        """
+        Get a record by reference, including ones not yet committed
+
+        Args:
+            reference: Appointment reference
+
+        Returns:
+            AppointmentRecord or None
+        """
+        with self._pending_lock:
+            record = self._pending.get(reference)
+        if record is not None:
+            return record
+        with self._read_lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(RECORD_FIELDS)} FROM appointments WHERE reference = ?", (reference,)
+            ).fetchone()
+        return AppointmentRecord(*row) if row else None
+
+    def reserved_slots(self, from_date: str) -> List[Tuple[str, str, str, str]]:
+        """
+        Get booked slots on or after a day, including ones not yet committed
+
+        Args:
+            from_date: First day (ISO format)
+
+        Returns:
+            (category, preferred_date, preferred_time, doctor_id) tuples
+        """
+        with self._read_lock:
+            rows = self._conn.execute(
+                "SELECT category, preferred_date, preferred_time, doctor_id FROM appointments "
+                "WHERE status = 'reserved' AND preferred_date >= ?",
+                (from_date,),
+            ).fetchall()
+        with self._pending_lock:
+            pending = list(self._pending.values())
+        rows.extend(
+            (record.category, record.preferred_date, record.preferred_time, record.doctor_id)
+            for record in pending
+            if record.status == "reserved" and record.preferred_date >= from_date
+        )
+        return rows
+
+    def __len__(self) -> int:
+        with self._read_lock:
+            committed = self._conn.execute("SELECT COUNT(*) FROM appointments").fetchone()[0]
+        with self._pending_lock:
+            return committed + len(self._pending)
+
+    def _run_writer(self) -> None:
+        """
+        Writer loop: collect records for up to flush_interval, commit them
+        in one transaction, then acknowledge any flush requests in the batch
+        """
+        conn = self._connect()
+        running = True
+        while running:
+            item = self._queue.get()
+            batch: List[AppointmentRecord] = []
+            waiters: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if not running or len(batch) >= self.max_batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or waiters:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+            if batch:
+                rejected = self._write_batch(conn, batch)
+                if rejected is None:
+                    self._drop(batch)
+                elif rejected:
+                    # add() commits reserved records itself, so this only
+                    # happens if one was queued directly
+                    self.records_lost += len(rejected)
+                    logger.error(
+                        f"Dropped {len(rejected)} queued appointment records whose slot was taken: "
+                        f"{[record.reference for record in rejected]}"
+                    )
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    def _drop(self, batch: List[AppointmentRecord]) -> None:
+        """
+        Hand queued records that were not committed to on_dropped
+        Errors are logged so they never stop the writer thread
+        """
+        if self.on_dropped is None:
+            return
+        try:
+            self.on_dropped(batch)
+        except Exception as e:
+            logger.error(f"Handling {len(batch)} dropped appointment records failed: {e}", exc_info=True)
+
+    def _build_outbox(self, batch: List[AppointmentRecord]) -> List[OutboxMessage]:
+        """
+        Build the notifications of a batch
+        A record whose messages cannot be built is still stored, without them
+
+        Args:
+            batch: Records being committed
+
+        Returns:
+            Outbox messages of every record
+        """
+        messages: List[OutboxMessage] = []
+        for record in batch:
+            try:
+                messages.extend(self.outbox_builder(record))
+            except Exception as e:
+                logger.error(f"Building notifications for appointment {record.reference} failed: {e}", exc_info=True)
+        return messages
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[AppointmentRecord]) -> Optional[List[AppointmentRecord]]:
+        """
+        Commit a batch of records in a single transaction
+        Reserved records whose slot is already held by a stored record are
+        left out (a failed statement does not abort the transaction); the
+        rest are committed. Database errors are retried up to WRITE_ATTEMPTS
+        times; any other error fails the batch at once. Never raises
+
+        Args:
+            conn: Connection to write with
+            batch: Records to commit
+
+        Returns:
+            Records left out because their slot was taken, or None if the
+            batch was not committed
+        """
+        rows = [record.to_row() for record in batch]
+        committed = False
+        rejected: List[AppointmentRecord] = []
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            rejected = []
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                if any(record.status == "reserved" for record in batch):
+                    for record, row in zip(batch, rows):
+                        try:
+                            conn.execute(_INSERT_SQL, row)
+                        except sqlite3.IntegrityError as e:
+                            if not _is_slot_conflict(e):
+                                raise
+                            rejected.append(record)
+                    taken = {record.reference for record in rejected}
+                    stored = [record for record in batch if record.reference not in taken]
+                else:
+                    conn.executemany(_INSERT_SQL, rows)
+                    stored = batch
+                if self.outbox_builder is not None:
+                    messages = self._build_outbox(stored)
+                    if messages:
+                        insert_outbox(conn, messages)
+                conn.execute("COMMIT")
+                self.batches_committed += 1
+                self.records_committed += len(stored)
+                committed = True
+                break
+            except Exception as e:
+                try:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                logger.warning(f"Appointment batch write failed (attempt {attempt}): {e}")
+                if not isinstance(e, sqlite3.Error):
+                    break
+                time.sleep(0.05 * attempt)
+        if not committed:
+            self.records_lost += len(batch)
+            logger.error(
+                f"Dropped {len(batch)} appointment records that could not be committed: "
+                f"{[record.reference for record in batch]}"
+            )
+        with self._pending_lock:
+            for record in batch:
+                self._pending.pop(record.reference, None)
+        return rejected if committed else None
+
+    def write_many(self, records: List[AppointmentRecord]) -> Optional[List[AppointmentRecord]]:
+        """
+        Commit records synchronously in one transaction, bypassing the queue
+        Used when write-behind is disabled, for reserved records and for bulk imports
+
+        Args:
+            records: Records to store
+
+        Returns:
+            Reserved records not stored because their slot is already taken
+            (empty if all were stored), or None if nothing was committed
+        """
+        with self._read_lock:
+            return self._write_batch(self._conn, records)
+
+    def iter_records(
+        self,
+        category: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[AppointmentRecord]:
+        """
+        Stream committed records in insertion order
+        Pages through the table by rowid, so memory use does not depend on
+        the table size and the read lock is only held per page
+
+        Args:
+            category: Only this category
+            from_date: Only appointments on or after this day (ISO format)
+            to_date: Only appointments on or before this day (ISO format)
+            batch_size: Rows fetched per page
+
+        Yields:
+            AppointmentRecord instances
+        """
+        filters = ["rowid > ?"]
+        params: List[object] = []
+        if category:
+            filters.append("category = ?")
+            params.append(category)
+        if from_date:
+            filters.append("preferred_date >= ?")
+            params.append(from_date)
+        if to_date:
+            filters.append("preferred_date <= ?")
+            params.append(to_date)
+        sql = (
+            f"SELECT rowid, {', '.join(RECORD_FIELDS)} FROM appointments "
+            f"WHERE {' AND '.join(filters)} ORDER BY rowid LIMIT ?"
+        )
+        last_rowid = 0
+        while True:
+            with self._read_lock:
+                rows = self._conn.execute(sql, (last_rowid, *params, batch_size)).fetchall()
+            for row in rows:
+                yield AppointmentRecord(*row[1:])
+            if len(rows) < batch_size:
+                return
+            last_rowid = rows[-1][0]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every record queued before this call is committed
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if the queue was flushed in time
+        """
+        if self._writer is None or not self._writer.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """
+        Drain queued records, stop the writer and close the database connection
+        """
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+            logger.info(
+                f"Appointment store closed ({self.records_committed} records in "
+                f"{self.batches_committed} batches)"
+            )
+        self._writer = None
+        with self._read_lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get writer statistics
+
+        Returns:
+            Dictionary with queue depth and commit counters
+        """
+        return {
+            "queued": self._queue.qsize(),
+            "batches_committed": self.batches_committed,
+            "records_committed": self.records_committed,
+            "records_lost": self.records_lost,
+            "avg_batch_size": (
+                round(self.records_committed / self.batches_committed, 1) if self.batches_committed else 0.0
+            ),
+        }
+
+
+def create_appointment_store() -> AppointmentStore:
+    """
+    Create the appointment store configured in settings
+
+    Returns:
+        AppointmentStore instance
+    """
+    return AppointmentStore(
+        settings.APPOINTMENT_SQLITE_PATH,
+        write_behind=settings.APPOINTMENT_WRITE_BEHIND,
+        flush_interval_ms=settings.APPOINTMENT_FLUSH_INTERVAL_MS,
+        max_batch_size=settings.APPOINTMENT_MAX_BATCH_SIZE,
+        max_queue_size=settings.APPOINTMENT_QUEUE_MAX_SIZE,
+        synchronous=settings.APPOINTMENT_SQLITE_SYNCHRONOUS,
+        outbox_builder=build_appointment_messages if notifications_enabled() else None,
+    )
@@ -0,0 +1,387 @@
+"""
+Availability Engine
+Tracks bookable appointment slots per doctor category
+Each doctor's occupied slots for a day are a single integer bitmap, so
+finding free slots is a few bit operations per doctor and day, and
+reserve/release flip one bit under a per-category lock
+"""
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def parse_time(value: str) -> Optional[int]:
+    """
+    Parse an "HH:MM" time into minutes after midnight
+
+    Args:
+        value: Time string
+
+    Returns:
+        Minutes after midnight, or None if the value is not a valid time
+    """
+    try:
+        hours, minutes = value.strip().split(":")[:2]
+        total = int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        return None
+    return total if 0 <= int(hours) < 24 and 0 <= int(minutes) < 60 else None
+
+
+def format_time(minutes: int) -> str:
+    """
+    Format minutes after midnight as "HH:MM"
+    """
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class DoctorSchedule:
+    """
+    Weekly working hours of one doctor, divided into fixed-length slots
+    """
+    __slots__ = ("doctor_id", "category", "start", "slot_minutes", "slot_count", "working_days", "full_mask")
+
+    def __init__(
+        self,
+        doctor_id: str,
+        category: str,
+        start: str = "09:00",
+        end: str = "17:00",
+        slot_minutes: int = 30,
+        working_days: Iterable[int] = (0, 1, 2, 3, 4),
+    ):
+        """
+        Args:
+            doctor_id: Unique doctor identifier
+            category: Doctor category (e.g., Cardiologist)
+            start: First slot start time ("HH:MM")
+            end: End of the working day ("HH:MM")
+            slot_minutes: Length of one appointment slot
+            working_days: Weekdays worked (0 = Monday)
+        """
+        self.doctor_id = doctor_id
+        self.category = category
+        self.start = parse_time(start)
+        self.slot_minutes = slot_minutes
+        self.slot_count = (parse_time(end) - self.start) // slot_minutes
+        self.working_days = frozenset(working_days)
+        self.full_mask = (1 << self.slot_count) - 1
+
+    def slot_at(self, minutes: int) -> int:
+        """
+        Get the index of the slot containing a time of day
+
+        Args:
+            minutes: Minutes after midnight
+
+        Returns:
+            Slot index, or -1 outside working hours
+        """
+        if minutes < self.start:
+            return -1
+        index = (minutes - self.start) // self.slot_minutes
+        return index if index < self.slot_count else -1
+
+    def slot_time(self, index: int) -> int:
+        """
+        Get the start of a slot in minutes after midnight
+        """
+        return self.start + index * self.slot_minutes
+
+
+# Doctors per category (in production, this would come from a staff roster)
+DEFAULT_DOCTORS: List[DoctorSchedule] = [
+    DoctorSchedule("gp-1", "General Physician", "08:00", "16:00", 15),
+    DoctorSchedule("gp-2", "General Physician", "10:00", "18:00", 15),
+    DoctorSchedule("gp-3", "General Physician", "09:00", "13:00", 15, working_days=(5,)),
+    DoctorSchedule("cardio-1", "Cardiologist", "09:00", "17:00", 30),
+    DoctorSchedule("cardio-2", "Cardiologist", "12:00", "18:00", 30, working_days=(1, 3)),
+    DoctorSchedule("derm-1", "Dermatologist", "09:00", "17:00", 20),
+    DoctorSchedule("peds-1", "Pediatrician", "08:00", "14:00", 20),
+    DoctorSchedule("peds-2", "Pediatrician", "13:00", "19:00", 20),
+    DoctorSchedule("ortho-1", "Orthopedist", "09:00", "17:00", 30, working_days=(0, 2, 4)),
+    DoctorSchedule("neuro-1", "Neurologist", "10:00", "16:00", 45, working_days=(0, 1, 3)),
+]
+
+
+class Slot:
+    """
+    A bookable slot with one doctor
+    """
+    __slots__ = ("day", "time", "doctor_id")
+
+    def __init__(self, day: date, time: str, doctor_id: str):
+        self.day = day
+        self.time = time
+        self.doctor_id = doctor_id
+
+    def __repr__(self) -> str:
+        return f"Slot({self.day.isoformat()} {self.time} {self.doctor_id})"
+
+
+class AvailabilityEngine:
+    """
+    In-memory slot occupancy for all doctors
+    Days are date ordinals; bitmaps only exist for days with bookings.
+    Writes are serialized per category; reads take no lock.
+    Per-day free times for a category are cached and invalidated one
+    (category, day) at a time when a booking on that day changes
+    """
+
+    def __init__(self, doctors: Sequence[DoctorSchedule], horizon_days: int = 90, cache_max_days: int = 4096):
+        """
+        Args:
+            doctors: Doctor schedules
+            horizon_days: How many days ahead searches look for free slots
+            cache_max_days: (category, day) entries kept in the free-times cache
+        """
+        self.doctors = list(doctors)
+        self.horizon_days = horizon_days
+        self._doctor_index = {doctor.doctor_id: index for index, doctor in enumerate(self.doctors)}
+        # Lowercase category -> (canonical name, doctor indexes)
+        self._categories: Dict[str, Tuple[str, List[int]]] = {}
+        for index, doctor in enumerate(self.doctors):
+            self._categories.setdefault(doctor.category.lower(), (doctor.category, []))[1].append(index)
+        self._locks = {key: threading.Lock() for key in self._categories}
+        # (doctor index, day ordinal) -> occupied slot bitmap
+        self._occupied: Dict[Tuple[int, int], int] = {}
+        # (category key, day ordinal) -> change counter, bumped on every booking change
+        self._versions: Dict[Tuple[str, int], int] = {}
+        # (category key, day ordinal) -> (version, free times), LRU ordered
+        self._day_cache: "OrderedDict[Tuple[str, int], Tuple[int, Tuple[str, ...]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_max_days = cache_max_days
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def categories(self) -> List[str]:
+        """
+        Get the canonical names of all categories
+        """
+        return [name for name, _ in self._categories.values()]
+
+    def resolve_category(self, category: str) -> Optional[str]:
+        """
+        Get the canonical category name (case-insensitive)
+
+        Args:
+            category: Category as supplied by the client
+
+        Returns:
+            Canonical name, or None if no doctor has this category
+        """
+        entry = self._categories.get(category.strip().lower())
+        return entry[0] if entry else None
+
+    def _free_on(self, members: List[int], ordinal: int, min_minutes: int, limit: int) -> List[Tuple[int, str]]:
+        """
+        Collect up to limit free (minutes, doctor id) pairs on one day, ordered
+        by time then doctor
+        """
+        weekday = (ordinal - 1) % 7
+        found: List[Tuple[int, str]] = []
+        for index in members:
+            doctor = self.doctors[index]
+            if weekday not in doctor.working_days:
+                continue
+            free = doctor.full_mask & ~self._occupied.get((index, ordinal), 0)
+            if min_minutes > doctor.start:
+                # Drop slots that start before min_minutes
+                first = -(-(min_minutes - doctor.start) // doctor.slot_minutes)
+                free &= ~((1 << first) - 1)
+            taken = 0
+            while free and taken < limit:
+                lowest = free & -free
+                found.append((doctor.slot_time(lowest.bit_length() - 1), doctor.doctor_id))
+                free ^= lowest
+                taken += 1
+        found.sort()
+        return found[:limit]
+
+    def next_free_slots(
+        self,
+        category: str,
+        after: date,
+        limit: int = 5,
+        after_time: Optional[str] = None,
+    ) -> List[Slot]:
+        """
+        Find the earliest free slots for a category
+
+        Args:
+            category: Doctor category
+            after: First day to consider
+            limit: Maximum number of slots
+            after_time: Earliest start time on the first day ("HH:MM")
+
+        Returns:
+            Free slots in chronological order (empty for unknown categories)
+        """
+        entry = self._categories.get(category.strip().lower())
+        if entry is None or limit <= 0:
+            return []
+        members = entry[1]
+        start = after.toordinal()
+        min_minutes = (parse_time(after_time) or 0) if after_time else 0
+        slots: List[Slot] = []
+        for ordinal in range(start, start + self.horizon_days):
+            free = self._free_on(members, ordinal, min_minutes if ordinal == start else 0, limit - len(slots))
+            if free:
+                day = date.fromordinal(ordinal)
+                slots.extend(Slot(day, format_time(minutes), doctor_id) for minutes, doctor_id in free)
+                if len(slots) >= limit:
+                    break
+        return slots
+
+    def free_slots(self, category: str, day: date) -> List[Slot]:
+        """
+        Get every free slot for a category on one day
+
+        Args:
+            category: Doctor category
+            day: Day to inspect
+
+        Returns:
+            Free slots in chronological order
+        """
+        entry = self._categories.get(category.strip().lower())
+        if entry is None:
+            return []
+        free = self._free_on(entry[1], day.toordinal(), 0, len(self.doctors) * 24 * 60)
+        return [Slot(day, format_time(minutes), doctor_id) for minutes, doctor_id in free]
+
+    def free_times(self, category: str, day: date) -> Tuple[str, ...]:
+        """
+        Get the distinct free start times for a category on one day (cached)
+
+        Args:
+            category: Doctor category
+            day: Day to inspect
+
+        Returns:
+            Sorted "HH:MM" times with at least one free doctor
+        """
+        key = category.strip().lower()
+        entry = self._categories.get(key)
+        if entry is None:
+            return ()
+        cache_key = (key, day.toordinal())
+        version = self._versions.get(cache_key, 0)
+        with self._cache_lock:
+            cached = self._day_cache.get(cache_key)
+            if cached is not None and cached[0] == version:
+                self._day_cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return cached[1]
+            self.cache_misses += 1
+
+        free = self._free_on(entry[1], cache_key[1], 0, len(self.doctors) * 24 * 60)
+        times = tuple(dict.fromkeys(format_time(minutes) for minutes, _ in free))
+        # Stored with the version read before computing, so a booking that
+        # lands meanwhile leaves this entry stale instead of wrong
+        with self._cache_lock:
+            self._day_cache[cache_key] = (version, times)
+            self._day_cache.move_to_end(cache_key)
+            while len(self._day_cache) > self.cache_max_days:
+                self._day_cache.popitem(last=False)
+        return times
+
+    def _changed(self, key: str, ordinal: int) -> None:
+        """
+        Invalidate the cached free times of one (category, day)
+        Must be called while holding the category lock
+        """
+        cache_key = (key, ordinal)
+        self._versions[cache_key] = self._versions.get(cache_key, 0) + 1
+
+    def reserve(self, category: str, day: date, time: str, doctor_id: Optional[str] = None) -> Optional[Slot]:
+        """
+        Atomically book the slot containing a time with any free doctor of a
+        category (or a specific doctor)
+
+        Args:
+            category: Doctor category
+            day: Appointment day
+            time: Requested time ("HH:MM"); the slot containing it is booked
+            doctor_id: Book only this doctor
+
+        Returns:
+            The booked slot, or None if no matching slot is free
+        """
+        key = category.strip().lower()
+        entry = self._categories.get(key)
+        minutes = parse_time(time)
+        if entry is None or minutes is None:
+            return None
+        ordinal = day.toordinal()
+        weekday = day.weekday()
+        with self._locks[key]:
+            for index in entry[1]:
+                doctor = self.doctors[index]
+                if (doctor_id and doctor.doctor_id != doctor_id) or weekday not in doctor.working_days:
+                    continue
+                slot_index = doctor.slot_at(minutes)
+                if slot_index < 0:
+                    continue
+                bit = 1 << slot_index
+                occupied = self._occupied.get((index, ordinal), 0)
+                if occupied & bit:
+                    continue
+                self._occupied[(index, ordinal)] = occupied | bit
+                self._changed(key, ordinal)
+                return Slot(day, format_time(doctor.slot_time(slot_index)), doctor.doctor_id)
+        return None
+
+    def release(self, slot: Slot) -> bool:
+        """
+        Free a previously reserved slot
+
+        Args:
+            slot: Slot returned by reserve()
+
+        Returns:
+            True if the slot was booked and is now free
+        """
+        index = self._doctor_index.get(slot.doctor_id)
+        minutes = parse_time(slot.time)
+        if index is None or minutes is None:
+            return False
+        doctor = self.doctors[index]
+        slot_index = doctor.slot_at(minutes)
+        if slot_index < 0:
+            return False
+        bit = 1 << slot_index
+        key = (index, slot.day.toordinal())
+        category_key = doctor.category.lower()
+        with self._locks[category_key]:
+            occupied = self._occupied.get(key, 0)
+            if not occupied & bit:
+                return False
+            occupied &= ~bit
+            if occupied:
+                self._occupied[key] = occupied
+            else:
+                del self._occupied[key]
+            self._changed(category_key, key[1])
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get occupancy statistics
+
+        Returns:
+            Dictionary with doctor, day-bitmap, booked slot and cache counts
+        """
+        return {
+            "doctors": len(self.doctors),
+            "categories": len(self._categories),
+            "day_bitmaps": len(self._occupied),
+            "booked_slots": sum(bin(bitmap).count("1") for bitmap in list(self._occupied.values())),
+            "cached_days": len(self._day_cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
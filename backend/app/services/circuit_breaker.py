@@ -0,0 +1,154 @@
+"""
+Circuit Breaker
+Stops calling an upstream that keeps failing so callers fail fast
+Opens after consecutive failures (errors, timeouts or calls slower than the
+latency SLO), rejects calls while open, then lets a limited number of probe
+calls through (half-open) to decide whether to close again
+"""
+from typing import Any, Dict, Optional
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Call rejected because the circuit is open
+    """
+
+    def __init__(self, name: str):
+        super().__init__(f"Circuit for {name} is open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probing
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        half_open_calls: int = 1,
+        slow_call_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            name: Name of the protected upstream (for logs and metrics)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before probing
+            half_open_calls: Probe calls allowed at once while half-open
+            slow_call_seconds: Successful calls slower than this count as failures
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def available(self) -> bool:
+        """
+        Check whether a call would currently be allowed (without reserving it)
+
+        Returns:
+            True if closed, or if a probe could be sent
+        """
+        if self.state == CLOSED:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return True
+        return self.state == HALF_OPEN and self._probes < self.half_open_calls
+
+    def allow(self) -> None:
+        """
+        Reserve permission for one call
+        Must be followed by record_success, record_failure or release
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open with all probes in flight)
+        """
+        now = time.monotonic()
+        if self.state != CLOSED and now - self.opened_at >= self.reset_timeout:
+            if self.state == OPEN:
+                logger.info(f"Circuit for {self.name} half-open, probing")
+            # Also frees probe permissions whose outcome was never recorded
+            self.state = HALF_OPEN
+            self.opened_at = now
+            self._probes = 0
+        if self.state == CLOSED:
+            return
+        if self.state == HALF_OPEN and self._probes < self.half_open_calls:
+            self._probes += 1
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.name)
+
+    def release(self) -> None:
+        """
+        Give back a permission whose call was abandoned (e.g. cancelled)
+        """
+        if self.state == HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    def record_success(self, seconds: Optional[float] = None) -> None:
+        """
+        Record a successful call
+
+        Args:
+            seconds: Call duration, checked against the latency SLO if given
+        """
+        if self.slow_call_seconds and seconds is not None and seconds > self.slow_call_seconds:
+            self.record_failure()
+            return
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self.state = CLOSED
+            self._probes = 0
+            logger.info(f"Circuit for {self.name} closed")
+
+    def record_failure(self) -> None:
+        """
+        Record a failed (or too slow) call
+        """
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._probes = 0
+        self.times_opened += 1
+        logger.warning(
+            f"Circuit for {self.name} opened after {self.consecutive_failures} consecutive failures, "
+            f"retrying in {self.reset_timeout:g}s"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get breaker state and counters
+
+        Returns:
+            Dictionary with state, consecutive failures, open count and rejections
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
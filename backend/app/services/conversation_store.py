@@ -0,0 +1,507 @@
+"""
+Conversation Store
+Keeps prior chat turns per conversation_id with bounded context windows
+Old turns are compacted into a short summary so prompts never grow unbounded
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import conversation_memory_bytes, conversation_prompt_tokens, conversation_store_conversations
+import hashlib
+import hmac
+import json
+import logging
+import re
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+# Characters kept from each compacted user message in the summary
+_SUMMARY_SNIPPET_CHARS = 120
+
+# Key for signing conversation ids; without a configured secret ids are only
+# valid in the process that issued them
+_ID_SECRET = (settings.CONVERSATION_ID_SECRET or secrets.token_hex(32)).encode("utf-8")
+if not settings.CONVERSATION_ID_SECRET:
+    logger.warning("CONVERSATION_ID_SECRET is not set; conversation ids will not survive restarts or span workers")
+
+# Hex characters of the HMAC kept in each id
+_ID_SIGNATURE_CHARS = 32
+
+
+def _sign_conversation_id(raw_id: str) -> str:
+    """
+    Compute the signature for a conversation id
+
+    Args:
+        raw_id: UUID4 string
+
+    Returns:
+        Hex signature
+    """
+    return hmac.new(_ID_SECRET, raw_id.encode("utf-8"), hashlib.sha256).hexdigest()[:_ID_SIGNATURE_CHARS]
+
+
+def issue_conversation_id() -> str:
+    """
+    Create a new server-issued conversation id
+
+    Returns:
+        Random UUID4 followed by its signature ("<uuid>.<signature>")
+    """
+    raw_id = str(uuid.uuid4())
+    return f"{raw_id}.{_sign_conversation_id(raw_id)}"
+
+
+def verify_conversation_id(conversation_id: str) -> bool:
+    """
+    Check that a client-supplied conversation id was issued by this server
+    Guessed or forged ids are rejected, so clients cannot read or write
+    other users' conversations
+
+    Args:
+        conversation_id: Id sent by the client
+
+    Returns:
+        True if the id is a signed UUID4
+    """
+    raw_id, _, signature = conversation_id.partition(".")
+    try:
+        parsed = uuid.UUID(raw_id)
+    except ValueError:
+        return False
+    if parsed.version != 4 or str(parsed) != raw_id:
+        return False
+    return hmac.compare_digest(signature, _sign_conversation_id(raw_id))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the number of model tokens in a text
+    Uses the common ~4 characters per token heuristic (no tokenizer dependency)
+
+    Args:
+        text: Input text
+
+    Returns:
+        Estimated token count
+    """
+    return len(text) // 4 + 1
+
+
+class Conversation:
+    """
+    Stored state of one conversation
+    Turns are (role, content) tuples to keep per-conversation memory small
+    """
+    __slots__ = ("summary", "turns", "updated_at")
+
+    def __init__(
+        self,
+        summary: str = "",
+        turns: Optional[List[Tuple[str, str]]] = None,
+        updated_at: float = 0.0,
+    ):
+        self.summary = summary
+        self.turns = turns if turns is not None else []
+        self.updated_at = updated_at
+
+    def size_bytes(self) -> int:
+        """
+        Approximate in-process memory held by this conversation
+
+        Returns:
+            Size in bytes of the object, its turn list and strings
+        """
+        size = sys.getsizeof(self) + sys.getsizeof(self.summary) + sys.getsizeof(self.turns)
+        for turn in self.turns:
+            size += sys.getsizeof(turn) + sys.getsizeof(turn[0]) + sys.getsizeof(turn[1])
+        return size
+
+
+class ConversationStore(ABC):
+    """
+    Storage backend for conversations
+    """
+
+    @abstractmethod
+    def load(self, conversation_id: str) -> Optional[Conversation]:
+        """
+        Load a conversation, or None if unknown or expired
+        """
+
+    @abstractmethod
+    def save(self, conversation_id: str, conversation: Conversation) -> None:
+        """
+        Store a conversation, evicting old conversations if full
+        """
+
+    @abstractmethod
+    def update(self, conversation_id: str, apply: Callable[[Conversation], None]) -> None:
+        """
+        Atomically load, modify and save a conversation
+        Concurrent updates of the same conversation are applied one after the
+        other, so neither is lost
+
+        Args:
+            conversation_id: Conversation ID
+            apply: Modifies the conversation in place (an empty one if unknown or expired)
+        """
+
+    @abstractmethod
+    def delete(self, conversation_id: str) -> None:
+        """
+        Forget a conversation
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """
+        Number of stored conversations
+        """
+
+    def total_size_bytes(self) -> int:
+        """
+        Approximate memory held by stored conversations (0 if not in-process)
+        """
+        return 0
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    Per-process conversation store with LRU eviction and idle expiry
+    """
+
+    def __init__(self, max_conversations: int, ttl_seconds: float):
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, conversation_id: str) -> Optional[Conversation]:
+        with self._lock:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                return None
+            if conversation.updated_at + self.ttl_seconds < time.time():
+                del self._conversations[conversation_id]
+                return None
+            self._conversations.move_to_end(conversation_id)
+            return conversation
+
+    def save(self, conversation_id: str, conversation: Conversation) -> None:
+        with self._lock:
+            self._conversations[conversation_id] = conversation
+            self._conversations.move_to_end(conversation_id)
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+
+    def update(self, conversation_id: str, apply: Callable[[Conversation], None]) -> None:
+        with self._lock:
+            current = self._conversations.get(conversation_id)
+            if current is None or current.updated_at + self.ttl_seconds < time.time():
+                conversation = Conversation()
+            else:
+                # Modify a copy so readers holding the current one never see a partial update
+                conversation = Conversation(current.summary, list(current.turns), current.updated_at)
+            apply(conversation)
+            self._conversations[conversation_id] = conversation
+            self._conversations.move_to_end(conversation_id)
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._conversations.pop(conversation_id, None)
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def total_size_bytes(self) -> int:
+        with self._lock:
+            return sum(conversation.size_bytes() for conversation in self._conversations.values())
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    On-disk conversation store shared across uvicorn workers
+    Expired conversations are swept periodically on write
+    """
+
+    # Sweep expired rows at most every N writes
+    SWEEP_EVERY = 500
+
+    def __init__(self, path: str, max_conversations: int, ttl_seconds: float):
+        self.path = path
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "id TEXT PRIMARY KEY, summary TEXT NOT NULL, "
+            "turns TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_conversations_updated_at ON conversations (updated_at)"
+        )
+
+    def load(self, conversation_id: str) -> Optional[Conversation]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, turns, updated_at FROM conversations WHERE id = ?",
+                (conversation_id,),
+            ).fetchone()
+        return self._from_row(row)
+
+    def _from_row(self, row: Optional[tuple]) -> Optional[Conversation]:
+        """
+        Decode a (summary, turns, updated_at) row, or None if missing or expired
+        """
+        if row is None or row[2] + self.ttl_seconds < time.time():
+            return None
+        turns = [(role, content) for role, content in json.loads(row[1])]
+        return Conversation(summary=row[0], turns=turns, updated_at=row[2])
+
+    def save(self, conversation_id: str, conversation: Conversation) -> None:
+        with self._lock:
+            self._write(conversation_id, conversation)
+
+    def update(self, conversation_id: str, apply: Callable[[Conversation], None]) -> None:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so other workers
+            # updating the same file wait instead of overwriting this update
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT summary, turns, updated_at FROM conversations WHERE id = ?",
+                    (conversation_id,),
+                ).fetchone()
+                conversation = self._from_row(row) or Conversation()
+                apply(conversation)
+                self._write(conversation_id, conversation)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _write(self, conversation_id: str, conversation: Conversation) -> None:
+        """
+        Store a conversation row (caller holds the lock)
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO conversations (id, summary, turns, updated_at) "
+            "VALUES (?, ?, ?, ?)",
+            (conversation_id, conversation.summary, json.dumps(conversation.turns), conversation.updated_at),
+        )
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            self._sweep()
+
+    def _sweep(self) -> None:
+        """
+        Drop expired conversations, then the oldest ones above max_conversations
+        """
+        self._conn.execute(
+            "DELETE FROM conversations WHERE updated_at < ?", (time.time() - self.ttl_seconds,)
+        )
+        self._conn.execute(
+            "DELETE FROM conversations WHERE id IN ("
+            "SELECT id FROM conversations ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_conversations,),
+        )
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+
+class ConversationMemory:
+    """
+    Builds bounded prompt context from stored conversation history
+    """
+
+    def __init__(
+        self,
+        store: ConversationStore,
+        context_tokens: int,
+        compact_after_turns: int,
+        summary_tokens: int,
+    ):
+        self.store = store
+        self.context_tokens = context_tokens
+        self.compact_after_turns = compact_after_turns
+        self.summary_tokens = summary_tokens
+        # Prompt size metrics (history tokens sent per request); the routes
+        # call in from executor threads, so updates take a lock
+        self._stats_lock = threading.Lock()
+        self.prompts_built = 0
+        self.prompt_tokens_total = 0
+        self.prompt_tokens_max = 0
+
+    def build_context(self, conversation_id: Optional[str]) -> List[Dict[str, str]]:
+        """
+        Get prior conversation messages trimmed to the context token budget
+        Newest turns are kept first; the summary of compacted turns leads
+
+        Args:
+            conversation_id: Conversation ID (None for a new conversation)
+
+        Returns:
+            List of chat messages ({"role", "content"}) oldest first
+        """
+        conversation = self.store.load(conversation_id) if conversation_id else None
+        if conversation is None:
+            return []
+
+        budget = self.context_tokens
+        messages: List[Dict[str, str]] = []
+        summary_message = None
+        if conversation.summary:
+            summary_message = {
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {conversation.summary}",
+            }
+            budget -= estimate_tokens(summary_message["content"])
+
+        used = 0
+        for role, content in reversed(conversation.turns):
+            cost = estimate_tokens(content)
+            if used + cost > budget:
+                break
+            messages.append({"role": role, "content": content})
+            used += cost
+        messages.reverse()
+        if summary_message is not None:
+            messages.insert(0, summary_message)
+            used += estimate_tokens(summary_message["content"])
+
+        with self._stats_lock:
+            self.prompts_built += 1
+            self.prompt_tokens_total += used
+            self.prompt_tokens_max = max(self.prompt_tokens_max, used)
+        return messages
+
+    def append_exchange(self, conversation_id: str, user_message: str, assistant_message: str) -> None:
+        """
+        Record a user/assistant exchange, compacting old turns if needed
+        The update is atomic, so concurrent turns of one conversation are all kept
+
+        Args:
+            conversation_id: Conversation ID
+            user_message: User's message
+            assistant_message: Assistant's response
+        """
+        def apply(conversation: Conversation) -> None:
+            conversation.turns.append(("user", user_message))
+            conversation.turns.append(("assistant", assistant_message))
+            if len(conversation.turns) > self.compact_after_turns:
+                self._compact(conversation)
+            conversation.updated_at = time.time()
+
+        self.store.update(conversation_id, apply)
+
+    def _compact(self, conversation: Conversation) -> None:
+        """
+        Fold the older half of the turns into the conversation summary
+        Uses an extractive summary (first sentence of each user message) so
+        compaction never needs an extra model call
+
+        Args:
+            conversation: Conversation to compact in place
+        """
+        keep = max(2, self.compact_after_turns // 2)
+        old_turns = conversation.turns[:-keep]
+        conversation.turns = conversation.turns[-keep:]
+
+        topics = []
+        for role, content in old_turns:
+            if role != "user":
+                continue
+            snippet = _SENTENCE_END_RE.split(content.strip(), maxsplit=1)[0]
+            topics.append(snippet[:_SUMMARY_SNIPPET_CHARS])
+        if not topics:
+            return
+
+        addition = "The user asked: " + "; ".join(topics)
+        summary = f"{conversation.summary} {addition}".strip()
+        # Keep the most recent part of the summary within its token budget
+        max_chars = self.summary_tokens * 4
+        if len(summary) > max_chars:
+            summary = summary[-max_chars:]
+        conversation.summary = summary
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get memory and prompt-size metrics
+
+        Returns:
+            Dictionary with conversation count, memory per conversation and prompt sizes
+        """
+        conversations = len(self.store)
+        total_bytes = self.store.total_size_bytes()
+        return {
+            "conversations": conversations,
+            "memory_bytes": total_bytes,
+            "memory_bytes_per_conversation": round(total_bytes / conversations, 1) if conversations else 0.0,
+            "prompts_built": self.prompts_built,
+            "prompt_tokens_avg": (
+                round(self.prompt_tokens_total / self.prompts_built, 1) if self.prompts_built else 0.0
+            ),
+            "prompt_tokens_max": self.prompt_tokens_max,
+        }
+
+    def collect_metrics(self) -> None:
+        """
+        Refresh the conversation memory gauges before a scrape
+        """
+        stats = self.stats()
+        conversation_store_conversations.set(stats["conversations"])
+        conversation_memory_bytes.set(stats["memory_bytes"])
+        conversation_prompt_tokens.labels("avg").set(stats["prompt_tokens_avg"])
+        conversation_prompt_tokens.labels("max").set(stats["prompt_tokens_max"])
+
+
+def create_conversation_memory() -> ConversationMemory:
+    """
+    Create the conversation memory configured in settings
+
+    Returns:
+        ConversationMemory instance
+    """
+    if settings.CONVERSATION_STORE_BACKEND == "sqlite":
+        store: ConversationStore = SQLiteConversationStore(
+            settings.CONVERSATION_SQLITE_PATH,
+            max_conversations=settings.CONVERSATION_MAX_CONVERSATIONS,
+            ttl_seconds=settings.CONVERSATION_TTL_SECONDS,
+        )
+    elif settings.CONVERSATION_STORE_BACKEND == "memory":
+        store = InMemoryConversationStore(
+            max_conversations=settings.CONVERSATION_MAX_CONVERSATIONS,
+            ttl_seconds=settings.CONVERSATION_TTL_SECONDS,
+        )
+    else:
+        raise ValueError(f"Unknown CONVERSATION_STORE_BACKEND: {settings.CONVERSATION_STORE_BACKEND}")
+
+    logger.info(f"Conversation store enabled ({settings.CONVERSATION_STORE_BACKEND} backend)")
+    return ConversationMemory(
+        store,
+        context_tokens=settings.CONVERSATION_CONTEXT_TOKENS,
+        compact_after_turns=settings.CONVERSATION_COMPACT_AFTER_TURNS,
+        summary_tokens=settings.CONVERSATION_SUMMARY_TOKENS,
+    )
@@ -0,0 +1,240 @@
+"""
+Medicine Formulary
+Compact in-memory medicine catalog loaded from bulk data files
+Entries are stored as __slots__ records with interned strings and only
+materialized into MedicineInfo models for returned search results
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from app.schemas.medicine import MedicineInfo
+import csv
+import json
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Separator for multi-valued columns in CSV files
+CSV_LIST_SEPARATOR = "|"
+
+
+class MedicineRecord:
+    """
+    Compact medicine entry
+    """
+    __slots__ = ("name", "usage", "precautions", "aliases")
+
+    def __init__(self, name: str, usage: str, precautions: Tuple[str, ...], aliases: Tuple[str, ...] = ()):
+        self.name = name
+        self.usage = usage
+        self.precautions = precautions
+        self.aliases = aliases
+
+    def to_dict(self) -> dict:
+        """
+        Get the record's public fields as plain data (the MedicineInfo shape)
+
+        Returns:
+            Dictionary with name, usage and precautions
+        """
+        return {"name": self.name, "usage": self.usage, "precautions": list(self.precautions)}
+
+    def to_info(self) -> MedicineInfo:
+        """
+        Materialize the record as a MedicineInfo response model
+
+        Returns:
+            MedicineInfo instance
+        """
+        return MedicineInfo(name=self.name, usage=self.usage, precautions=list(self.precautions))
+
+
+class _Interner:
+    """
+    Deduplicates repeated strings and precaution lists across records
+    Formularies repeat the same precautions for thousands of entries
+    """
+
+    def __init__(self):
+        self._strings: Dict[str, str] = {}
+        self._tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def string(self, value: str) -> str:
+        value = value.strip()
+        return self._strings.setdefault(value, value)
+
+    def strings(self, values: Iterable[str]) -> Tuple[str, ...]:
+        items = tuple(self.string(value) for value in values if value and value.strip())
+        return self._tuples.setdefault(items, items)
+
+
+def _split(value) -> List[str]:
+    """
+    Normalize a list-valued field (JSON list or CSV separated string)
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return value.split(CSV_LIST_SEPARATOR)
+    return list(value)
+
+
+def iter_formulary_rows(path: str) -> Iterator[dict]:
+    """
+    Stream raw rows from a CSV or JSONL formulary file
+    Rows need name and usage; precautions and aliases are optional lists
+    (CSV columns use "|" as the list separator)
+
+    Args:
+        path: Path to a .csv or .jsonl file
+
+    Yields:
+        Row dictionaries
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as handle:
+        if extension == ".csv":
+            yield from csv.DictReader(handle)
+        elif extension in (".jsonl", ".ndjson"):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported formulary file type: {path}")
+
+
+class Formulary:
+    """
+    Collection of medicine records addressed by integer entry id
+    """
+
+    def __init__(self, records: Optional[List[MedicineRecord]] = None, source: str = "builtin"):
+        self.records: List[MedicineRecord] = records if records is not None else []
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def names(self) -> Iterator[Tuple[str, int]]:
+        """
+        Iterate (name or alias, entry id) pairs for indexing
+
+        Yields:
+            Name/alias and the entry id it refers to
+        """
+        for entry_id, record in enumerate(self.records):
+            yield record.name, entry_id
+            for alias in record.aliases:
+                yield alias, entry_id
+
+    def get_name(self, entry_id: int) -> str:
+        """
+        Get the display name of one entry without materializing it
+
+        Args:
+            entry_id: Entry id
+
+        Returns:
+            Medicine name
+        """
+        return self.records[entry_id].name
+
+    def get_info(self, entry_id: int) -> MedicineInfo:
+        """
+        Materialize one entry as a MedicineInfo model
+
+        Args:
+            entry_id: Entry id
+
+        Returns:
+            MedicineInfo instance
+        """
+        return self.records[entry_id].to_info()
+
+    def get_dict(self, entry_id: int) -> dict:
+        """
+        Get one entry as plain data without building a model
+
+        Args:
+            entry_id: Entry id
+
+        Returns:
+            Dictionary with name, usage and precautions
+        """
+        return self.records[entry_id].to_dict()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict], source: str = "rows") -> "Formulary":
+        """
+        Build a formulary from row dictionaries, skipping invalid rows
+
+        Args:
+            rows: Rows with name, usage, precautions and aliases
+            source: Description of where the rows came from
+
+        Returns:
+            Formulary instance
+        """
+        interner = _Interner()
+        records = []
+        skipped = 0
+        for row in rows:
+            name = (row.get("name") or "").strip()
+            usage = (row.get("usage") or "").strip()
+            if not name or not usage:
+                skipped += 1
+                continue
+            records.append(MedicineRecord(
+                name=sys.intern(name),
+                usage=interner.string(usage),
+                precautions=interner.strings(_split(row.get("precautions"))),
+                aliases=interner.strings(_split(row.get("aliases"))),
+            ))
+        if skipped:
+            logger.warning(f"Skipped {skipped} formulary rows without name or usage")
+        return cls(records, source=source)
+
+    @classmethod
+    def from_file(cls, path: str) -> "Formulary":
+        """
+        Stream a CSV/JSONL formulary file into a compact formulary
+
+        Args:
+            path: Path to the data file
+
+        Returns:
+            Formulary instance
+        """
+        formulary = cls.from_rows(iter_formulary_rows(path), source=path)
+        logger.info(f"Loaded {len(formulary)} medicines from {path}")
+        return formulary
+
+    @classmethod
+    def from_infos(
+        cls,
+        infos: Sequence[MedicineInfo],
+        aliases: Optional[Dict[str, str]] = None,
+    ) -> "Formulary":
+        """
+        Build a formulary from MedicineInfo models (e.g. the built-in sample data)
+
+        Args:
+            infos: Medicine models
+            aliases: Alias -> lowercase medicine name
+
+        Returns:
+            Formulary instance
+        """
+        alias_map: Dict[str, List[str]] = {}
+        for alias, name in (aliases or {}).items():
+            alias_map.setdefault(name.lower(), []).append(alias)
+        rows = (
+            {
+                "name": info.name,
+                "usage": info.usage,
+                "precautions": info.precautions,
+                "aliases": alias_map.get(info.name.lower(), []),
+            }
+            for info in infos
+        )
+        return cls.from_rows(rows, source="builtin")
@@ -0,0 +1,303 @@
+"""
+Formulary Snapshot
+Prebuilt binary file holding the medicine catalog and its search index
+The file is memory-mapped read-only, so opening it is constant-time and all
+worker processes share the same pages through the OS page cache
+"""
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from app.schemas.medicine import MedicineInfo
+from app.services.formulary import Formulary
+from app.services.medicine_index import MedicineIndex
+import logging
+import mmap
+import os
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MEDSNAP1"
+VERSION = 1
+
+# Section order in the header; each section is (offset, length) in bytes
+SECTIONS = (
+    "string_offsets",   # Q[n + 1]  byte offsets into string_blob
+    "string_blob",      # UTF-8 string data
+    "records",          # I[4 * entries]  name id, usage id, precautions start, precautions count
+    "precautions",      # I[]  string ids referenced by records
+    "key_strings",      # I[keys]  string id of each sorted index key
+    "key_entries",      # I[keys]  entry id of each index key
+    "grams",            # 3-byte ASCII trigrams, sorted
+    "gram_offsets",     # I[grams + 1]  offsets into postings
+    "postings",         # I[]  key positions per trigram
+)
+
+_HEADER = struct.Struct("<8sII")
+_SECTION = struct.Struct("<QQ")
+_ALIGNMENT = 8
+
+
+class _StringTable:
+    """
+    Read-only view of the snapshot string table
+    """
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, string_id: int) -> str:
+        return str(self._blob[self._offsets[string_id]:self._offsets[string_id + 1]], "utf-8")
+
+
+class _KeyView:
+    """
+    Sorted index keys resolved through the string table (bisect-compatible)
+    """
+
+    def __init__(self, strings: _StringTable, key_strings: memoryview):
+        self._strings = strings
+        self._key_strings = key_strings
+
+    def __len__(self) -> int:
+        return len(self._key_strings)
+
+    def __getitem__(self, position: int) -> str:
+        return self._strings[self._key_strings[position]]
+
+
+class _GramView:
+    """
+    Sorted fixed-width trigram table (bisect-compatible)
+    """
+
+    def __init__(self, grams: memoryview):
+        self._grams = grams
+
+    def __len__(self) -> int:
+        return len(self._grams) // 3
+
+    def __getitem__(self, index: int) -> bytes:
+        return bytes(self._grams[index * 3:index * 3 + 3])
+
+
+class _PostingsView:
+    """
+    Trigram -> postings lookup over the snapshot (MedicineIndex postings mapping)
+    """
+
+    def __init__(self, grams: memoryview, gram_offsets: memoryview, postings: memoryview):
+        self._grams = _GramView(grams)
+        self._gram_offsets = gram_offsets
+        self._postings = postings
+
+    def get(self, gram: str, default=None):
+        key = gram.encode("ascii", "replace")
+        index = bisect_left(self._grams, key)
+        if index == len(self._grams) or self._grams[index] != key:
+            return default
+        return self._postings[self._gram_offsets[index]:self._gram_offsets[index + 1]]
+
+
+class SnapshotFormulary:
+    """
+    Formulary backed by a memory-mapped snapshot
+    Provides the same read interface MedicineService uses on Formulary
+    """
+
+    def __init__(self, strings: _StringTable, records: memoryview, precautions: memoryview, source: str):
+        self._strings = strings
+        self._records = records
+        self._precautions = precautions
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self._records) // 4
+
+    def get_name(self, entry_id: int) -> str:
+        """
+        Get the display name of one entry without materializing it
+
+        Args:
+            entry_id: Entry id
+
+        Returns:
+            Medicine name
+        """
+        return self._strings[self._records[entry_id * 4]]
+
+    def get_info(self, entry_id: int) -> MedicineInfo:
+        """
+        Materialize one entry as a MedicineInfo model
+
+        Args:
+            entry_id: Entry id
+
+        Returns:
+            MedicineInfo instance
+        """
+        return MedicineInfo(**self.get_dict(entry_id))
+
+    def get_dict(self, entry_id: int) -> dict:
+        """
+        Get one entry as plain data without building a model
+
+        Args:
+            entry_id: Entry id
+
+        Returns:
+            Dictionary with name, usage and precautions
+        """
+        base = entry_id * 4
+        name_id, usage_id, start, count = self._records[base:base + 4]
+        strings = self._strings
+        return {
+            "name": strings[name_id],
+            "usage": strings[usage_id],
+            "precautions": [strings[string_id] for string_id in self._precautions[start:start + count]],
+        }
+
+
+def _pad(handle) -> None:
+    """
+    Pad the file to the section alignment
+    """
+    remainder = handle.tell() % _ALIGNMENT
+    if remainder:
+        handle.write(b"\0" * (_ALIGNMENT - remainder))
+
+
+def write_snapshot(formulary: Formulary, index: MedicineIndex, path: str) -> None:
+    """
+    Compile a formulary and its search index into a snapshot file
+    The file is written next to the target and renamed into place atomically
+
+    Args:
+        formulary: Loaded formulary
+        index: Index built from formulary.names()
+        path: Output file path
+    """
+    string_ids: Dict[str, int] = {}
+    strings: List[bytes] = []
+
+    def intern(value: str) -> int:
+        string_id = string_ids.get(value)
+        if string_id is None:
+            string_id = string_ids[value] = len(strings)
+            strings.append(value.encode("utf-8"))
+        return string_id
+
+    records = array("I")
+    precautions = array("I")
+    for record in formulary.records:
+        records.extend((intern(record.name), intern(record.usage), len(precautions), len(record.precautions)))
+        precautions.extend(intern(precaution) for precaution in record.precautions)
+
+    key_strings = array("I", (intern(key) for key in index.keys))
+    key_entries = array("I", index.key_entries)
+
+    grams = sorted(index.postings)
+    gram_offsets = array("I", [0])
+    postings = array("I")
+    for gram in grams:
+        postings.extend(index.postings[gram])
+        gram_offsets.append(len(postings))
+
+    string_offsets = array("Q", [0])
+    for encoded in strings:
+        string_offsets.append(string_offsets[-1] + len(encoded))
+
+    payloads = {
+        "string_offsets": string_offsets.tobytes(),
+        "string_blob": b"".join(strings),
+        "records": records.tobytes(),
+        "precautions": precautions.tobytes(),
+        "key_strings": key_strings.tobytes(),
+        "key_entries": key_entries.tobytes(),
+        "grams": "".join(grams).encode("ascii"),
+        "gram_offsets": gram_offsets.tobytes(),
+        "postings": postings.tobytes(),
+    }
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(_HEADER.pack(MAGIC, VERSION, len(SECTIONS)))
+        handle.write(b"\0" * (_SECTION.size * len(SECTIONS)))
+        table = []
+        for name in SECTIONS:
+            _pad(handle)
+            table.append((handle.tell(), len(payloads[name])))
+            handle.write(payloads[name])
+        handle.seek(_HEADER.size)
+        for offset, length in table:
+            handle.write(_SECTION.pack(offset, length))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+    logger.info(f"Wrote formulary snapshot with {len(formulary)} medicines to {path}")
+
+
+def open_snapshot(path: str) -> Tuple[SnapshotFormulary, MedicineIndex]:
+    """
+    Memory-map a snapshot file
+    Only the header is parsed; all data stays in the shared page cache
+
+    Args:
+        path: Snapshot file path
+
+    Returns:
+        Tuple of (formulary, search index) backed by the mapping
+
+    Raises:
+        ValueError: If the file is not a compatible snapshot
+    """
+    if sys.byteorder != "little":
+        raise ValueError("Formulary snapshots require a little-endian platform")
+
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    magic, version, section_count = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION or section_count != len(SECTIONS):
+        raise ValueError(f"{path} is not a version {VERSION} formulary snapshot")
+
+    sections = {}
+    for position, name in enumerate(SECTIONS):
+        offset, length = _SECTION.unpack_from(view, _HEADER.size + position * _SECTION.size)
+        sections[name] = view[offset:offset + length]
+
+    def u32(name: str) -> memoryview:
+        return sections[name].cast("I")
+
+    strings = _StringTable(sections["string_offsets"].cast("Q"), sections["string_blob"])
+    formulary = SnapshotFormulary(strings, u32("records"), u32("precautions"), source=path)
+    index = MedicineIndex(
+        keys=_KeyView(strings, u32("key_strings")),
+        key_entries=u32("key_entries"),
+        postings=_PostingsView(sections["grams"], u32("gram_offsets"), u32("postings")),
+    )
+    logger.info(f"Mapped formulary snapshot with {len(formulary)} medicines from {path}")
+    return formulary, index
+
+
+def build_snapshot(output_path: str, input_path: Optional[str] = None) -> None:
+    """
+    Build a snapshot from a formulary file (or the built-in sample data)
+
+    Args:
+        output_path: Snapshot file to write
+        input_path: CSV/JSONL formulary; built-in data when None
+    """
+    from app.services.medicine_service import MEDICINE_ALIASES, MEDICINE_DATABASE
+
+    if input_path:
+        formulary = Formulary.from_file(input_path)
+    else:
+        formulary = Formulary.from_infos(list(MEDICINE_DATABASE.values()), MEDICINE_ALIASES)
+    index = MedicineIndex.build(formulary.names())
+    write_snapshot(formulary, index, output_path)
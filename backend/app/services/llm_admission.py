@@ -0,0 +1,380 @@
+"""
+LLM Admission Control
+Bounds how much load is sent to the upstream model provider
+Each model gets a concurrency limit, a token-bucket rate limit and a bounded
+wait queue that sheds requests which could not be admitted before their
+deadline; identical in-flight prompts share a single upstream call
+"""
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+from app.core.config import settings
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the admission wait-time histogram buckets
+WAIT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Weight of the newest sample in the upstream call duration average
+_DURATION_EWMA_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """
+    Request was shed instead of being sent upstream
+    """
+
+    def __init__(self, model: str, reason: str, retry_after: float):
+        """
+        Args:
+            model: Model the request was for
+            reason: "queue_full", "rate_limited" or "deadline"
+            retry_after: Suggested client back-off in seconds
+        """
+        super().__init__(f"Upstream request for {model} shed ({reason})")
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class WaitHistogram:
+    """
+    Cumulative histogram of admission wait times (Prometheus-style buckets)
+    """
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * len(WAIT_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for index, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.total, 6),
+            "max_seconds": round(self.max, 6),
+            "buckets": {str(bound): count for bound, count in zip(WAIT_BUCKETS, self.counts)},
+        }
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter with reservations
+    A reservation may drive the balance negative; the caller then waits until
+    the bucket has refilled to its token, which keeps admissions in FIFO order
+    """
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """
+        Take one token
+
+        Args:
+            now: Current monotonic time
+
+        Returns:
+            Seconds to wait before the token may be used
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def refund(self) -> None:
+        """
+        Give back a reserved token that will not be used
+        """
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class ModelLimiter:
+    """
+    Admission limits for one upstream model
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_concurrency: int,
+        requests_per_second: float,
+        burst: float,
+        max_queue: int,
+    ):
+        """
+        Args:
+            model: Model name (for logs and metrics)
+            max_concurrency: Upstream calls allowed in flight at once
+            requests_per_second: Sustained request rate (0 disables rate limiting)
+            burst: Requests allowed at once above the sustained rate
+            max_queue: Requests allowed to wait for admission; more are shed
+        """
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.bucket = TokenBucket(requests_per_second, max(1.0, burst)) if requests_per_second > 0 else None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "rate_limited": 0, "deadline": 0}
+        self.wait_times = WaitHistogram()
+        # Average time a slot is held, used to predict queue wait
+        self.avg_duration = 0.0
+
+    def estimated_wait(self) -> float:
+        """
+        Predict how long a new arrival would wait for a concurrency slot
+
+        Returns:
+            Estimated seconds (0 while a slot is free or nothing has been measured yet)
+        """
+        if self.in_flight < self.max_concurrency:
+            return 0.0
+        return math.ceil((self.waiting + 1) / self.max_concurrency) * self.avg_duration
+
+    def _reject(self, reason: str, retry_after: float) -> AdmissionRejected:
+        self.shed[reason] += 1
+        logger.warning(
+            f"Shedding upstream request for {self.model} ({reason}): "
+            f"{self.in_flight} in flight, {self.waiting} waiting"
+        )
+        return AdmissionRejected(self.model, reason, max(1.0, math.ceil(retry_after)))
+
+    @asynccontextmanager
+    async def slot(self, deadline: float) -> AsyncIterator[None]:
+        """
+        Hold an upstream slot for the duration of the block
+
+        Args:
+            deadline: Monotonic time by which the request must be admitted
+
+        Raises:
+            AdmissionRejected: If the queue is full or admission would miss the deadline
+        """
+        if self.waiting >= self.max_queue:
+            raise self._reject("queue_full", self.estimated_wait())
+        arrived = time.monotonic()
+        estimate = self.estimated_wait()
+        if estimate > deadline - arrived:
+            raise self._reject("deadline", estimate)
+
+        self.waiting += 1
+        try:
+            if self.bucket is not None:
+                delay = self.bucket.reserve(arrived)
+                if delay > deadline - arrived:
+                    self.bucket.refund()
+                    raise self._reject("rate_limited", delay)
+                if delay:
+                    await asyncio.sleep(delay)
+            if not self._semaphore.locked():
+                await self._semaphore.acquire()
+            else:
+                try:
+                    await asyncio.wait_for(self._semaphore.acquire(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    raise self._reject("deadline", self.estimated_wait())
+        finally:
+            self.waiting -= 1
+
+        admitted_at = time.monotonic()
+        self.wait_times.observe(admitted_at - arrived)
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            duration = time.monotonic() - admitted_at
+            self.avg_duration += _DURATION_EWMA_ALPHA * (duration - self.avg_duration)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get admission statistics
+
+        Returns:
+            Dictionary with queue depth, in-flight calls, counters and wait times
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "avg_upstream_seconds": round(self.avg_duration, 4),
+            "wait_seconds": self.wait_times.to_dict(),
+        }
+
+
+class LLMAdmission:
+    """
+    Per-model admission limits plus single-flight coalescing of identical calls
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_second: float,
+        burst: float,
+        max_queue: int,
+        max_wait: float,
+        coalesce: bool = True,
+        model_limits: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        """
+        Args:
+            max_concurrency: Default upstream calls in flight per model
+            requests_per_second: Default sustained rate per model (0 = unlimited)
+            burst: Default burst size per model
+            max_queue: Default number of waiting requests per model
+            max_wait: Seconds a request may wait for admission before it is shed
+            coalesce: Share one upstream call between identical in-flight prompts
+            model_limits: Per-model overrides of the defaults above, keyed by model name
+        """
+        self.defaults = {
+            "max_concurrency": max_concurrency,
+            "requests_per_second": requests_per_second,
+            "burst": burst,
+            "max_queue": max_queue,
+        }
+        self.max_wait = max_wait
+        self.coalesce = coalesce
+        self.model_limits = model_limits or {}
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def limiter(self, model: str) -> ModelLimiter:
+        """
+        Get (or create) the limiter for a model
+
+        Args:
+            model: Model name
+
+        Returns:
+            ModelLimiter instance
+        """
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            limits = {**self.defaults, **self.model_limits.get(model, {})}
+            limiter = ModelLimiter(
+                model,
+                max_concurrency=int(limits["max_concurrency"]),
+                requests_per_second=float(limits["requests_per_second"]),
+                burst=float(limits["burst"]),
+                max_queue=int(limits["max_queue"]),
+            )
+            self._limiters[model] = limiter
+        return limiter
+
+    def slot(self, model: str):
+        """
+        Admit one upstream call for a model (e.g. a streamed completion)
+
+        Args:
+            model: Model name
+
+        Returns:
+            Async context manager holding the slot
+
+        Raises:
+            AdmissionRejected: If the request is shed
+        """
+        return self.limiter(model).slot(time.monotonic() + self.max_wait)
+
+    @staticmethod
+    def request_key(payload: dict) -> str:
+        """
+        Get the single-flight key of an upstream request body
+
+        Args:
+            payload: JSON request body (model, messages, sampling parameters)
+
+        Returns:
+            Hex digest identifying identical requests
+        """
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    async def share(self, key: Optional[str], call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Single-flight: callers with the same key while a call is in flight wait
+        for its result instead of issuing their own
+
+        Args:
+            key: Single-flight key (see request_key), or None to never coalesce
+            call: Coroutine function performing the work
+
+        Returns:
+            Result of the (possibly shared) call
+        """
+        if not self.coalesce or key is None:
+            return await call()
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so one caller disconnecting does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get admission statistics for every model seen so far
+
+        Returns:
+            Dictionary with per-model limiter stats and coalescing counters
+        """
+        return {
+            "models": {model: limiter.stats() for model, limiter in self._limiters.items()},
+            "coalesced": self.coalesced,
+            "coalescing_in_flight": len(self._in_flight),
+        }
+
+
+def create_llm_admission() -> LLMAdmission:
+    """
+    Create the admission controller configured in settings
+
+    Returns:
+        LLMAdmission instance
+    """
+    return LLMAdmission(
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        requests_per_second=settings.LLM_REQUESTS_PER_SECOND,
+        burst=settings.LLM_BURST,
+        max_queue=settings.LLM_QUEUE_MAX_SIZE,
+        max_wait=settings.LLM_QUEUE_MAX_WAIT,
+        coalesce=settings.LLM_COALESCE_REQUESTS,
+        model_limits=settings.LLM_MODEL_LIMITS,
+    )
@@ -0,0 +1,486 @@
+"""
+LLM Providers
+Routes chat completions across several OpenAI-compatible upstreams
+Each provider's latency and error rate are tracked as moving averages; calls go
+to the fastest provider whose circuit is closed, fail over to the next one, and
+may be hedged with a second request when the first is slower than the
+provider's usual tail. Request timeouts adapt to each provider's observed latency
+"""
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from app.core.config import settings
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.llm_admission import AdmissionRejected, LLMAdmission
+import asyncio
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per provider for hedging and timeout quantiles
+LATENCY_WINDOW = 256
+
+# Samples needed before a provider's latency quantiles are trusted
+MIN_QUANTILE_SAMPLES = 20
+
+# Settings keys in a provider entry that configure its admission limits
+_LIMIT_KEYS = ("max_concurrency", "requests_per_second", "burst", "max_queue")
+
+
+class LLMProvider:
+    """
+    One OpenAI-compatible upstream and its observed performance
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        model: str,
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+        ewma_alpha: float = 0.2,
+        breaker: Optional[CircuitBreaker] = None,
+        min_timeout: Optional[float] = None,
+        timeout_quantile: float = 0.99,
+        timeout_multiplier: float = 3.0,
+    ):
+        """
+        Args:
+            name: Provider name (logs, metrics and admission limits)
+            base_url: API base URL, e.g. https://api.openai.com/v1
+            model: Model requested from this provider
+            api_key: Bearer token (local model servers usually need none)
+            timeout: Request timeout in seconds (upper bound when adaptive)
+            ewma_alpha: Weight of the newest sample in the moving averages
+            breaker: Circuit breaker guarding this provider
+            min_timeout: Enables adaptive timeouts, never shorter than this
+            timeout_quantile: Latency quantile the adaptive timeout is based on
+            timeout_multiplier: Adaptive timeout as a multiple of that quantile
+        """
+        self.name = name
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self.breaker = breaker
+        self.min_timeout = min_timeout
+        self.timeout_quantile = timeout_quantile
+        self.timeout_multiplier = timeout_multiplier
+        self.completions_url = f"{base_url.rstrip('/')}/chat/completions"
+        self.ewma_alpha = ewma_alpha
+        self.latency_ewma: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.last_failure = 0.0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def headers(self) -> Dict[str, str]:
+        """
+        Get HTTP headers for requests to this provider
+
+        Returns:
+            Header dictionary (with authorization when an API key is set)
+        """
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def available(self) -> bool:
+        """
+        Check whether the provider's circuit would let a call through
+
+        Returns:
+            True unless the circuit is open
+        """
+        return self.breaker is None or self.breaker.available()
+
+    def allow(self) -> None:
+        """
+        Reserve a call with the circuit breaker
+        Must be followed by record_success, record_failure or release
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if self.breaker is not None:
+            self.breaker.allow()
+
+    def release(self) -> None:
+        """
+        Abandon a reserved call without an outcome (cancelled or shed)
+        """
+        if self.breaker is not None:
+            self.breaker.release()
+
+    def request_timeout(self) -> float:
+        """
+        Get the timeout for the next request
+        With adaptive timeouts this is a multiple of the recent latency
+        quantile, clamped between min_timeout and timeout, so a hung upstream
+        is detected in seconds rather than after the full timeout
+
+        Returns:
+            Timeout in seconds
+        """
+        if self.min_timeout is None:
+            return self.timeout
+        quantile = self.latency_quantile(self.timeout_quantile)
+        if quantile is None:
+            return self.timeout
+        return min(self.timeout, max(self.min_timeout, quantile * self.timeout_multiplier))
+
+    def record_success(self, seconds: Optional[float] = None) -> None:
+        """
+        Record a successful call
+
+        Args:
+            seconds: Call duration, or None if it is not comparable (streams)
+        """
+        if self.breaker is not None:
+            self.breaker.record_success(seconds)
+        self.requests += 1
+        self.error_rate -= self.ewma_alpha * self.error_rate
+        if seconds is not None:
+            self._latencies.append(seconds)
+            if self.latency_ewma is None:
+                self.latency_ewma = seconds
+            else:
+                self.latency_ewma += self.ewma_alpha * (seconds - self.latency_ewma)
+
+    def record_failure(self) -> None:
+        """
+        Record a failed call
+        """
+        if self.breaker is not None:
+            self.breaker.record_failure()
+        self.requests += 1
+        self.failures += 1
+        self.error_rate += self.ewma_alpha * (1.0 - self.error_rate)
+        self.last_failure = time.monotonic()
+
+    def score(self) -> float:
+        """
+        Expected seconds per successful call (latency inflated by the error rate)
+        Unmeasured providers score 0 so they are tried and measured
+
+        Returns:
+            Lower is better
+        """
+        return (self.latency_ewma or 0.0) / max(0.05, 1.0 - self.error_rate)
+
+    def latency_quantile(self, quantile: float) -> Optional[float]:
+        """
+        Get a latency quantile over the recent window
+
+        Args:
+            quantile: Quantile between 0 and 1
+
+        Returns:
+            Latency in seconds, or None until MIN_QUANTILE_SAMPLES calls were measured
+        """
+        if len(self._latencies) < MIN_QUANTILE_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get provider health statistics
+
+        Returns:
+            Dictionary with call counts, error rate, latency, timeout and circuit state
+        """
+        return {
+            "model": self.model,
+            "requests": self.requests,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate, 4),
+            "latency_ewma_seconds": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+            "timeout_seconds": round(self.request_timeout(), 3),
+            "circuit": self.breaker.stats() if self.breaker is not None else None,
+        }
+
+
+class ProviderRouter:
+    """
+    Latency-aware routing, failover and hedging across providers
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        admission: LLMAdmission,
+        explore_ratio: float = 0.05,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 0.05,
+        hedge_max_ratio: float = 0.1,
+    ):
+        """
+        Args:
+            providers: Configured providers (first is the preferred default)
+            admission: Admission controller; each provider is limited under its name
+            explore_ratio: Fraction of calls sent to another available provider first, so
+                estimates of providers that are not currently preferred stay fresh
+            hedge: Send a second request to the next provider when the first is slow
+            hedge_quantile: Latency quantile of the primary provider after which to hedge
+            hedge_min_delay: Lower bound of the hedging delay in seconds
+            hedge_max_ratio: Largest fraction of calls that may be hedged
+        """
+        self.providers = providers
+        self.admission = admission
+        self.explore_ratio = explore_ratio
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_ratio = hedge_max_ratio
+        # Hedges are paid for from a budget that grows by hedge_max_ratio per call
+        self._hedge_budget = 1.0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def ranked(self) -> List[LLMProvider]:
+        """
+        Order providers for the next call
+        Providers with an open circuit are left out; the rest are ordered by
+        score, except that occasionally another one is moved to the front to
+        refresh its latency estimate
+
+        Returns:
+            Providers in the order they should be tried (empty if every circuit is open)
+        """
+        available = [provider for provider in self.providers if provider.available()]
+        available.sort(key=LLMProvider.score)
+        if len(available) > 1 and random.random() < self.explore_ratio:
+            available.insert(0, available.pop(random.randrange(1, len(available))))
+        return available
+
+    def _hedge_delay(self, provider: LLMProvider) -> Optional[float]:
+        """
+        Get how long to wait for a provider before hedging to the next one
+
+        Args:
+            provider: Provider of the first attempt
+
+        Returns:
+            Delay in seconds (its tail latency, at least hedge_min_delay), or None
+            if hedging is off or the provider has too few latency samples
+        """
+        if not self.hedge or len(self.providers) < 2:
+            return None
+        quantile = provider.latency_quantile(self.hedge_quantile)
+        if quantile is None:
+            return None
+        return max(self.hedge_min_delay, quantile)
+
+    async def _attempt(
+        self,
+        provider: LLMProvider,
+        payload: dict,
+        call: Callable[[LLMProvider, dict], Awaitable[Any]],
+    ) -> Any:
+        """
+        Make one call on a provider within its admission slot, recording the
+        outcome in its health statistics and circuit breaker
+
+        Args:
+            provider: Provider to call
+            payload: Request body (the provider's model is set here)
+            call: Coroutine function (provider, payload) performing the request
+
+        Returns:
+            Result of the call
+
+        Raises:
+            CircuitOpenError: If the provider's circuit is open
+            AdmissionRejected: If the provider's queue is full
+        """
+        provider.allow()
+        try:
+            async with self.admission.slot(provider.name):
+                started = time.monotonic()
+                try:
+                    result = await call(provider, {**payload, "model": provider.model})
+                except Exception:
+                    provider.record_failure()
+                    raise
+                provider.record_success(time.monotonic() - started)
+                return result
+        except (asyncio.CancelledError, AdmissionRejected):
+            # Lost a hedge race or was shed; says nothing about the provider
+            provider.release()
+            raise
+
+    async def complete(self, payload: dict, call: Callable[[LLMProvider, dict], Awaitable[Any]]) -> Any:
+        """
+        Run a completion on the best provider
+        Fails over to the next provider on errors; with hedging enabled, also
+        starts the next provider if the first has not answered within its
+        usual tail latency, and returns whichever answers first
+
+        Args:
+            payload: Request body (the model is set per provider)
+            call: Coroutine function (provider, payload) performing the request
+
+        Returns:
+            Result of the first successful call
+
+        Raises:
+            CircuitOpenError: If every provider's circuit is open
+            AdmissionRejected: If every provider shed the request
+            Exception: The first upstream error if every provider failed
+        """
+        candidates = self.ranked()
+        if not candidates:
+            raise CircuitOpenError(", ".join(provider.name for provider in self.providers))
+        self._hedge_budget = min(10.0, self._hedge_budget + self.hedge_max_ratio)
+
+        pending: Dict[asyncio.Task, LLMProvider] = {}
+        errors: List[BaseException] = []
+        next_index = 0
+
+        def launch() -> None:
+            nonlocal next_index
+            provider = candidates[next_index]
+            next_index += 1
+            pending[asyncio.ensure_future(self._attempt(provider, payload, call))] = provider
+
+        launch()
+        hedge_delay = self._hedge_delay(candidates[0])
+        hedge_at = time.monotonic() + hedge_delay if hedge_delay is not None else None
+        try:
+            while pending:
+                timeout = None
+                if hedge_at is not None and next_index < len(candidates):
+                    timeout = max(0.0, hedge_at - time.monotonic())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_at = None
+                    if self._hedge_budget >= 1.0:
+                        self._hedge_budget -= 1.0
+                        self.hedges += 1
+                        launch()
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if provider is not candidates[0] and pending:
+                            self.hedge_wins += 1
+                        return task.result()
+                    errors.append(error)
+                    if not isinstance(error, AdmissionRejected):
+                        logger.warning(f"LLM provider {provider.name} failed: {error!r}")
+                if not pending and next_index < len(candidates):
+                    self.failovers += 1
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        # Prefer reporting an upstream error (caller falls back) over a shed request (503)
+        for error in errors:
+            if not isinstance(error, AdmissionRejected):
+                raise error
+        raise errors[-1]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get routing statistics
+
+        Returns:
+            Dictionary with per-provider health and hedging/failover counters
+        """
+        return {
+            "providers": {provider.name: provider.stats() for provider in self.providers},
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+        }
+
+
+def load_providers() -> List[LLMProvider]:
+    """
+    Build providers from settings
+    The OPENAI_* upstream (when OPENAI_API_KEY is set) is provider "openai";
+    LLM_PROVIDERS entries are added after it
+
+    Returns:
+        Configured providers (empty if no upstream is configured)
+    """
+    def create(name: str, base_url: str, model: str, api_key: Optional[str], timeout: float) -> LLMProvider:
+        breaker = CircuitBreaker(
+            name,
+            failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_CIRCUIT_RESET_TIMEOUT,
+            half_open_calls=settings.LLM_CIRCUIT_HALF_OPEN_CALLS,
+            slow_call_seconds=settings.LLM_SLOW_CALL_SECONDS or None,
+        )
+        return LLMProvider(
+            name,
+            base_url,
+            model,
+            api_key,
+            timeout=timeout,
+            ewma_alpha=settings.LLM_PROVIDER_EWMA_ALPHA,
+            breaker=breaker,
+            min_timeout=settings.LLM_TIMEOUT_MIN if settings.LLM_ADAPTIVE_TIMEOUT else None,
+            timeout_quantile=settings.LLM_TIMEOUT_QUANTILE,
+            timeout_multiplier=settings.LLM_TIMEOUT_MULTIPLIER,
+        )
+
+    providers = []
+    if settings.OPENAI_API_KEY:
+        providers.append(create(
+            "openai", settings.OPENAI_BASE_URL, settings.OPENAI_MODEL, settings.OPENAI_API_KEY, settings.OPENAI_TIMEOUT,
+        ))
+    for entry in settings.LLM_PROVIDERS:
+        api_key = entry.get("api_key")
+        if not api_key and entry.get("api_key_env"):
+            api_key = os.getenv(entry["api_key_env"])
+        providers.append(create(
+            entry["name"],
+            entry["base_url"],
+            entry.get("model", settings.OPENAI_MODEL),
+            api_key,
+            float(entry.get("timeout", settings.OPENAI_TIMEOUT)),
+        ))
+    return providers
+
+
+def create_provider_router(admission: LLMAdmission) -> ProviderRouter:
+    """
+    Create the provider router configured in settings
+    Registers each provider's admission limits (LLM_MODEL_LIMITS for its
+    model, overridden by limits given in its LLM_PROVIDERS entry)
+
+    Args:
+        admission: Admission controller shared by all providers
+
+    Returns:
+        ProviderRouter instance
+    """
+    providers = load_providers()
+    entries = {entry["name"]: entry for entry in settings.LLM_PROVIDERS}
+    for provider in providers:
+        entry = entries.get(provider.name, {})
+        admission.model_limits[provider.name] = {
+            **admission.model_limits.get(provider.model, {}),
+            **{key: entry[key] for key in _LIMIT_KEYS if key in entry},
+        }
+    if len(providers) > 1:
+        logger.info(f"LLM providers: {', '.join(f'{p.name} ({p.model})' for p in providers)}")
+    return ProviderRouter(
+        providers,
+        admission,
+        explore_ratio=settings.LLM_PROVIDER_EXPLORE_RATIO,
+        hedge=settings.LLM_HEDGE_ENABLED,
+        hedge_quantile=settings.LLM_HEDGE_QUANTILE,
+        hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY,
+        hedge_max_ratio=settings.LLM_HEDGE_MAX_RATIO,
+    )
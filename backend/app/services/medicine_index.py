@@ -0,0 +1,216 @@
+"""
+Medicine Search Index
+Prefix, alias and typo-tolerant (trigram) lookup over the medicine catalog
+Returns relevance-ranked entry ids; callers map ids back to medicine records
+"""
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Sequence, Set, Tuple
+import math
+import re
+
+_NON_NAME_RE = re.compile(r"[^a-z0-9]+")
+
+# Relevance scores per match type (higher is better)
+SCORE_EXACT = 1.0
+SCORE_WORD = 0.9
+SCORE_PREFIX = 0.8
+SCORE_FUZZY = 0.7
+
+# Minimum trigram similarity for a typo-tolerant match
+FUZZY_MIN_SIMILARITY = 0.3
+
+# Fraction of the query's trigrams a fuzzy candidate must share
+FUZZY_MIN_OVERLAP = 0.4
+
+# Fuzzy candidates scored per requested result
+FUZZY_CANDIDATE_FACTOR = 4
+
+# Trigrams found in more than this fraction of keys (and at least
+# FUZZY_STOP_GRAM_MIN keys) are ignored when gathering fuzzy candidates
+FUZZY_STOP_GRAM_FRACTION = 0.01
+FUZZY_STOP_GRAM_MIN = 256
+
+# Maximum catalog keys inspected for a single prefix
+PREFIX_SCAN_LIMIT = 200
+
+
+def normalize_name(text: str) -> str:
+    """
+    Normalize a medicine name or query for indexing
+    Lowercases and collapses punctuation/whitespace to single spaces
+
+    Args:
+        text: Raw name or query
+
+    Returns:
+        Normalized text
+    """
+    return _NON_NAME_RE.sub(" ", text.lower()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Get the set of character trigrams of normalized text
+    Words are padded so short names and word starts still produce trigrams
+
+    Args:
+        text: Normalized text
+
+    Returns:
+        Set of 3-character strings
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MedicineIndex:
+    """
+    Search index over medicine names and aliases
+
+    The index is built from plain sequences (sorted keys, key -> entry id,
+    trigram -> key postings) so alternative storage such as a memory-mapped
+    snapshot can provide the same structures.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[str],
+        key_entries: Sequence[int],
+        postings: Mapping[str, Sequence[int]],
+    ):
+        """
+        Args:
+            keys: Normalized names and aliases, sorted ascending
+            key_entries: Entry id for each key (same order as keys)
+            postings: Trigram -> ascending key positions containing it
+        """
+        self.keys = keys
+        self.key_entries = key_entries
+        self.postings = postings
+
+    @classmethod
+    def build(cls, names: Iterable[Tuple[str, int]]) -> "MedicineIndex":
+        """
+        Build an index from (name or alias, entry id) pairs
+
+        Args:
+            names: Names and aliases with the entry id they refer to
+
+        Returns:
+            MedicineIndex instance
+        """
+        pairs = sorted({(normalize_name(name), entry_id) for name, entry_id in names if name.strip()})
+        keys = [key for key, _ in pairs]
+        key_entries = array("I", (entry_id for _, entry_id in pairs))
+        postings: Dict[str, array] = {}
+        for position, key in enumerate(keys):
+            for gram in trigrams(key):
+                postings.setdefault(gram, array("I")).append(position)
+        return cls(keys, key_entries, postings)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _exact(self, key: str) -> Iterable[int]:
+        """
+        Get key positions equal to key
+        """
+        position = bisect_left(self.keys, key)
+        while position < len(self.keys) and self.keys[position] == key:
+            yield position
+            position += 1
+
+    def _prefix(self, prefix: str, limit: int) -> Iterable[int]:
+        """
+        Get up to limit key positions starting with prefix (sorted order)
+        """
+        position = bisect_left(self.keys, prefix)
+        end = min(len(self.keys), position + limit)
+        while position < end and self.keys[position].startswith(prefix):
+            yield position
+            position += 1
+
+    def _fuzzy(self, query: str, limit: int) -> List[Tuple[float, int]]:
+        """
+        Find keys similar to query by trigram overlap
+
+        Candidates are ranked by how many selective trigrams they share with
+        the query (a C-level Counter update over postings lists); only the top
+        candidates are then scored exactly against all of their trigrams.
+
+        Returns:
+            (similarity, key position) pairs above FUZZY_MIN_SIMILARITY
+        """
+        query_grams = trigrams(query)
+        lists = sorted(
+            (postings for postings in map(self.postings.get, query_grams) if postings),
+            key=len,
+        )
+        # Very common trigrams (e.g. shared suffixes) barely discriminate; skip them
+        max_postings = max(FUZZY_STOP_GRAM_MIN, int(len(self.keys) * FUZZY_STOP_GRAM_FRACTION))
+        selective = [postings for postings in lists if len(postings) <= max_postings] or lists[:1]
+
+        counts: Counter = Counter()
+        for postings in selective:
+            counts.update(postings)
+
+        min_shared = max(1, math.ceil(len(query_grams) * FUZZY_MIN_OVERLAP))
+        matches = []
+        for position, _ in counts.most_common(limit * FUZZY_CANDIDATE_FACTOR):
+            key_grams = trigrams(self.keys[position])
+            shared = len(query_grams & key_grams)
+            if shared < min_shared:
+                continue
+            similarity = shared / (len(query_grams) + len(key_grams) - shared)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                matches.append((similarity, position))
+        return matches
+
+    def search(self, query: str, limit: int = 10) -> List[int]:
+        """
+        Search for entries matching a query, best matches first
+
+        Ranking: exact name/alias > whole word of the query is a name
+        ("paracetamol 500mg") > name prefix > trigram similarity (typos).
+        Typo matching only runs when there is no exact match and earlier tiers
+        return fewer than limit results.
+
+        Args:
+            query: Raw search query
+            limit: Maximum number of entry ids to return
+
+        Returns:
+            Entry ids ordered by relevance
+        """
+        normalized = normalize_name(query)
+        if not normalized or limit <= 0:
+            return []
+
+        scores: Dict[int, float] = {}
+
+        def add(position: int, score: float) -> None:
+            entry_id = self.key_entries[position]
+            if score > scores.get(entry_id, 0.0):
+                scores[entry_id] = score
+
+        for position in self._exact(normalized):
+            add(position, SCORE_EXACT)
+
+        words = normalized.split(" ")
+        if len(words) > 1:
+            for word in words:
+                for position in self._exact(word):
+                    add(position, SCORE_WORD)
+
+        for position in self._prefix(normalized, PREFIX_SCAN_LIMIT):
+            # Shorter completions rank higher among prefix matches
+            add(position, SCORE_PREFIX + 0.1 * len(normalized) / len(self.keys[position]) - 0.1)
+
+        if not scores or (len(scores) < limit and SCORE_EXACT not in scores.values()):
+            for similarity, position in self._fuzzy(normalized, limit):
+                add(position, SCORE_FUZZY * similarity)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [entry_id for entry_id, _ in ranked[:limit]]
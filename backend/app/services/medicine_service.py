@@ -3,12 +3,25 @@ Medicine Service
 Provides medicine information search functionality
 Non-prescriptive, educational information only
 """
-from typing import List
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+from app.core.config import settings
+from app.core.metrics import observe_medicine_search
+from app.core.tracing import tracer
 from app.schemas.medicine import MedicineInfo
+from app.services.formulary import Formulary
+from app.services.formulary_snapshot import open_snapshot
+from app.services.medicine_index import MedicineIndex, normalize_name
+from app.services.medicine_suggest import MedicineSuggester
+from app.utils.serialization import dumps
+import hashlib
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 # Sample medicine database (in production, this would be a real database)
 MEDICINE_DATABASE = {
@@ -88,42 +101,222 @@ MEDICINE_DATABASE = {
 }
 
 
+# Brand names and synonyms mapped to MEDICINE_DATABASE keys (built-in data only;
+# formulary files carry their own aliases column)
+MEDICINE_ALIASES = {
+    "acetaminophen": "paracetamol",
+    "tylenol": "paracetamol",
+    "panadol": "paracetamol",
+    "advil": "ibuprofen",
+    "motrin": "ibuprofen",
+    "nurofen": "ibuprofen",
+    "amoxil": "amoxicillin",
+    "acetylsalicylic acid": "aspirin",
+    "prilosec": "omeprazole",
+    "losec": "omeprazole",
+}
+
+
 class MedicineService:
     """
     Service for searching medicine information
     """
     
-    def search_medicines(self, query: str) -> List[MedicineInfo]:
+    def __init__(self, formulary: Optional[Formulary] = None, index: Optional[MedicineIndex] = None):
+        """
+        Args:
+            formulary: Medicine catalog; defaults to the configured snapshot or
+                data file, otherwise the built-in sample database
+            index: Prebuilt search index for the formulary (built if omitted)
+        """
+        if formulary is None:
+            formulary, index = self._load_default_catalog()
+        self.formulary = formulary
+        self.index = index if index is not None else MedicineIndex.build(formulary.names())
+        self.catalog_version = self._compute_catalog_version()
+        self.suggester = MedicineSuggester(
+            self.index,
+            self.formulary,
+            precompute_depth=settings.MEDICINE_SUGGEST_PRECOMPUTE_DEPTH,
+            cache_size=settings.MEDICINE_SUGGEST_CACHE_SIZE,
+        )
+        # Serialized entries, reused across responses (the catalog is immutable)
+        self.entry_json = lru_cache(maxsize=settings.MEDICINE_JSON_CACHE_SIZE)(self._entry_json)
+    
+    @staticmethod
+    def _load_default_catalog() -> Tuple[Formulary, Optional[MedicineIndex]]:
+        """
+        Load the configured catalog
+        Prefers a memory-mapped snapshot (prebuilt index), then a data file,
+        then the built-in sample data
+        
+        Returns:
+            Tuple of (formulary, prebuilt index or None)
+        """
+        if settings.MEDICINE_SNAPSHOT_PATH:
+            return open_snapshot(settings.MEDICINE_SNAPSHOT_PATH)
+        if settings.MEDICINE_DATA_PATH:
+            return Formulary.from_file(settings.MEDICINE_DATA_PATH), None
+        return Formulary.from_infos(list(MEDICINE_DATABASE.values()), MEDICINE_ALIASES), None
+    
+    def _compute_catalog_version(self) -> str:
+        """
+        Compute an identifier that changes whenever the catalog changes
+        File-backed catalogs use file size and modification time; the
+        built-in data is hashed directly
+        
+        Returns:
+            Short hex version string
+        """
+        source = self.formulary.source
+        if os.path.isfile(source):
+            stat = os.stat(source)
+            raw = f"{source}:{stat.st_size}:{stat.st_mtime_ns}"
+        else:
+            raw = "|".join(
+                f"{info.name}:{info.usage}:{info.precautions}" for info in MEDICINE_DATABASE.values()
+            ) + repr(sorted(MEDICINE_ALIASES.items()))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    
+    def suggest_medicines(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Suggest medicine names for autocomplete
+        
+        Args:
+            prefix: Text typed so far
+            limit: Maximum number of names
+        
+        Returns:
+            Ranked medicine names (names only, no details)
+        """
+        return self.suggester.suggest(prefix, limit)
+    
+    def _entry_json(self, entry_id: int) -> bytes:
+        """
+        Serialize one catalog entry (uncached; see entry_json)
+        
+        Args:
+            entry_id: Entry id
+        
+        Returns:
+            JSON bytes in the MedicineInfo shape
+        """
+        return dumps(self.formulary.get_dict(entry_id))
+    
+    def _search_ids(self, query: str, limit: int) -> List[int]:
+        """
+        Find matching entry ids, recording search metrics
+        
+        Args:
+            query: Search query (medicine name)
+            limit: Maximum number of results
+        
+        Returns:
+            Entry ids, most relevant first
+        """
+        with tracer.span("medicine.search", **{"medicine.limit": limit}) as span:
+            entry_ids = self.index.search(query, limit)
+            if span is not None:
+                span.set_attribute("medicine.results", len(entry_ids))
+        
+        observe_medicine_search(len(entry_ids))
+        if not entry_ids:
+            logger.info(f"No matches found for: {query}")
+        
+        return entry_ids
+    
+    def search_medicines(self, query: str, limit: int = 10) -> List[MedicineInfo]:
         """
         Search for medicine information by name
+        Supports brand names/synonyms, prefixes and minor typos
         
         Args:
             query: Search query (medicine name)
+            limit: Maximum number of results
         
         Returns:
-            List of matching medicine information
+            List of matching medicine information, most relevant first
         """
-        query_lower = query.lower().strip()
-        results = []
+        # Only returned entries are materialized as pydantic models
+        return [self.formulary.get_info(entry_id) for entry_id in self._search_ids(query, limit)]
+    
+    def search_medicines_json(self, query: str, limit: int = 10) -> List[bytes]:
+        """
+        Search for medicine information, returning pre-serialized entries
+        Catalog entries are immutable, so each entry's JSON is built once and
+        reused by later responses
         
-        # Exact match
-        if query_lower in MEDICINE_DATABASE:
-            results.append(MEDICINE_DATABASE[query_lower])
-            logger.info(f"Found exact match for: {query}")
-            return results
+        Args:
+            query: Search query (medicine name)
+            limit: Maximum number of results
         
-        # Partial match
-        for medicine_name, medicine_info in MEDICINE_DATABASE.items():
-            if query_lower in medicine_name or medicine_name in query_lower:
-                results.append(medicine_info)
+        Returns:
+            JSON bytes of each matching entry, most relevant first
+        """
+        return [self.entry_json(entry_id) for entry_id in self._search_ids(query, limit)]
+    
+    def search_medicines_batch(self, queries: List[str], limit: int = 5) -> List[List[MedicineInfo]]:
+        """
+        Search for several medicines in one pass
+        Queries that normalize to the same text are searched once, and each
+        matched entry is materialized once even if several queries return it
         
-        # If no matches, return empty list
-        if not results:
-            logger.info(f"No matches found for: {query}")
+        Args:
+            queries: Search queries (e.g. a patient's medication list)
+            limit: Maximum number of results per query
+        
+        Returns:
+            Matching medicine information per query, in input order
+        """
+        with tracer.span("medicine.search_batch", **{"medicine.queries": len(queries)}):
+            return self._search_batch(queries, limit, self.formulary.get_info)
+    
+    def search_medicines_batch_json(self, queries: List[str], limit: int = 5) -> List[List[bytes]]:
+        """
+        Search for several medicines in one pass, returning pre-serialized entries
+        
+        Args:
+            queries: Search queries (e.g. a patient's medication list)
+            limit: Maximum number of results per query
+        
+        Returns:
+            JSON bytes of the matching entries per query, in input order
+        """
+        with tracer.span("medicine.search_batch", **{"medicine.queries": len(queries)}):
+            return self._search_batch(queries, limit, self.entry_json)
+    
+    def _search_batch(self, queries: List[str], limit: int, materialize: Callable[[int], T]) -> List[List[T]]:
+        """
+        Search several queries, sharing work between duplicate queries and entries
+
+        Args:
+            queries: Search queries
+            limit: Maximum number of results per query
+            materialize: Builds the returned item for an entry id (called once per entry)
+
+        Returns:
+            Materialized matches per query, in input order
+        """
+        materialized: Dict[int, T] = {}
+        by_query: Dict[str, List[T]] = {}
+        results = []
+        for query in queries:
+            normalized = normalize_name(query)
+            matches = by_query.get(normalized)
+            if matches is None:
+                matches = []
+                for entry_id in self.index.search(normalized, limit):
+                    item = materialized.get(entry_id)
+                    if item is None:
+                        item = materialized[entry_id] = materialize(entry_id)
+                    matches.append(item)
+                by_query[normalized] = matches
+            observe_medicine_search(len(matches))
+            results.append(matches)
         
+        logger.info(f"Batch medicine search resolved {len(queries)} queries ({len(by_query)} unique)")
         return results
 
 
 # Global medicine service instance
 medicine_service = MedicineService()
-
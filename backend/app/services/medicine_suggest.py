@@ -0,0 +1,132 @@
+"""
+Medicine Name Suggestions
+Keystroke autocomplete over medicine names and aliases
+Short prefixes are answered from a precomputed top-k table, longer ones by a
+bounded range scan of the sorted index keys; results are LRU-cached
+"""
+from bisect import bisect_left
+from functools import lru_cache
+from heapq import nsmallest
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.services.medicine_index import MedicineIndex, normalize_name
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Largest number of suggestions kept per prefix (upper bound for `limit`)
+MAX_SUGGESTIONS = 20
+
+# Maximum keys scanned for prefixes longer than the precomputed depth
+SUGGEST_SCAN_LIMIT = 5000
+
+
+def _rank(display: str) -> Tuple[int, str]:
+    """
+    Ranking key: shorter (more complete) names first, then alphabetical
+    """
+    return len(display), display.lower()
+
+
+def _top(displays: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Deduplicate names case-insensitively and keep the best MAX_SUGGESTIONS
+    """
+    unique: Dict[str, str] = {}
+    for display in displays:
+        unique.setdefault(display.lower(), display)
+    return tuple(nsmallest(MAX_SUGGESTIONS, unique.values(), key=_rank))
+
+
+class MedicineSuggester:
+    """
+    Prefix -> top-k medicine names
+    """
+
+    def __init__(self, index: MedicineIndex, formulary, precompute_depth: int, cache_size: int):
+        """
+        Args:
+            index: Medicine search index (sorted keys and key -> entry ids)
+            formulary: Catalog providing get_name(entry_id)
+            precompute_depth: Prefix lengths answered from the precomputed table
+            cache_size: Number of prefixes kept in the LRU cache
+        """
+        self.index = index
+        self.formulary = formulary
+        self.precompute_depth = precompute_depth
+        self._table: Optional[Dict[str, Tuple[str, ...]]] = None
+        self._lock = threading.Lock()
+        self._cached_suggest = lru_cache(maxsize=cache_size)(self._suggest)
+
+    def _display(self, position: int) -> str:
+        """
+        Get the name to show for an index key
+        Canonical names keep their catalog spelling; aliases are capitalized
+        """
+        key = self.index.keys[position]
+        name = self.formulary.get_name(self.index.key_entries[position])
+        if normalize_name(name) == key:
+            return name
+        return key[:1].upper() + key[1:]
+
+    def warm(self) -> None:
+        """
+        Build the precomputed prefix table if it is not built yet
+        The application calls this at startup (off the event loop); other
+        callers get the table built on their first short-prefix lookup
+        """
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = self._build_table()
+
+    def _build_table(self) -> Dict[str, Tuple[str, ...]]:
+        """
+        Precompute top suggestions for every prefix up to precompute_depth
+
+        Returns:
+            Prefix -> ranked suggestions
+        """
+        buckets: Dict[str, List[str]] = {}
+        keys = self.index.keys
+        for position in range(len(keys)):
+            key = keys[position]
+            display = self._display(position)
+            for depth in range(1, min(self.precompute_depth, len(key)) + 1):
+                buckets.setdefault(key[:depth], []).append(display)
+        table = {prefix: _top(displays) for prefix, displays in buckets.items()}
+        logger.info(f"Precomputed medicine suggestions for {len(table)} prefixes")
+        return table
+
+    def _suggest(self, prefix: str) -> Tuple[str, ...]:
+        """
+        Compute ranked suggestions for a normalized prefix (uncached)
+        """
+        if len(prefix) <= self.precompute_depth:
+            self.warm()
+            return self._table.get(prefix, ())
+
+        keys = self.index.keys
+        position = bisect_left(keys, prefix)
+        end = min(len(keys), position + SUGGEST_SCAN_LIMIT)
+        displays = []
+        while position < end and keys[position].startswith(prefix):
+            displays.append(self._display(position))
+            position += 1
+        return _top(displays)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Get medicine names starting with a prefix, best first
+
+        Args:
+            prefix: Raw user input
+            limit: Maximum number of names (at most MAX_SUGGESTIONS)
+
+        Returns:
+            Ranked medicine names
+        """
+        normalized = normalize_name(prefix)
+        if not normalized:
+            return []
+        return list(self._cached_suggest(normalized)[:limit])
@@ -0,0 +1,584 @@
+"""
+Notification Outbox
+Appointment confirmations and staff notifications delivered in the background
+Outbox rows are written in the same transaction as the appointment they
+belong to; a worker pool claims due rows in batches, delivers them through
+pluggable transports and retries failures with exponential backoff, so
+request latency never includes delivery time
+"""
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.http_client import get_http_client
+import asyncio
+import json
+import logging
+import random
+import smtplib
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS outbox ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, idempotency_key TEXT NOT NULL UNIQUE, "
+    "transport TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', "
+    "attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, last_error TEXT, "
+    "created_at REAL NOT NULL, sent_at REAL)",
+    "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)",
+)
+
+
+class OutboxMessage:
+    """
+    A notification waiting for delivery
+    """
+    __slots__ = ("idempotency_key", "transport", "payload", "id", "attempts")
+
+    def __init__(self, idempotency_key: str, transport: str, payload: Dict[str, object], id: int = 0, attempts: int = 0):
+        """
+        Args:
+            idempotency_key: Stable key; duplicates are never enqueued and
+                transports pass it on so receivers can drop redeliveries
+            transport: Transport name (e.g. "email", "webhook")
+            payload: Transport-specific message content
+            id: Outbox row id (set once stored)
+            attempts: Delivery attempts so far
+        """
+        self.idempotency_key = idempotency_key
+        self.transport = transport
+        self.payload = payload
+        self.id = id
+        self.attempts = attempts
+
+
+def insert_outbox(conn: sqlite3.Connection, messages: List[OutboxMessage]) -> None:
+    """
+    Add messages to the outbox on a connection inside the caller's transaction
+
+    Args:
+        conn: Connection with an open transaction
+        messages: Messages to enqueue (existing idempotency keys are skipped)
+    """
+    now = time.time()
+    conn.executemany(
+        "INSERT OR IGNORE INTO outbox (idempotency_key, transport, payload, next_attempt_at, created_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(message.idempotency_key, message.transport, json.dumps(message.payload), now, now) for message in messages],
+    )
+
+
+def build_appointment_messages(record) -> List[OutboxMessage]:
+    """
+    Build the notifications for a newly stored appointment request
+    Only transports that are configured produce messages
+
+    Args:
+        record: AppointmentRecord
+
+    Returns:
+        Messages to enqueue with the record
+    """
+    messages = []
+    when = f"{record.preferred_date} {record.preferred_time}" if record.preferred_time else record.preferred_date
+    if settings.NOTIFICATION_SMTP_HOST:
+        messages.append(OutboxMessage(
+            idempotency_key=f"{record.reference}:confirmation:email",
+            transport="email",
+            payload={
+                "to": record.email,
+                "subject": f"Appointment request received ({record.reference})",
+                "body": (
+                    f"Hello {record.name},\n\n"
+                    f"We have received your {record.category} appointment request for {when}. "
+                    f"Our team will contact you shortly to confirm your appointment.\n\n"
+                    f"Reference: {record.reference}\n"
+                ),
+            },
+        ))
+    if settings.NOTIFICATION_WEBHOOK_URL:
+        messages.append(OutboxMessage(
+            idempotency_key=f"{record.reference}:staff:webhook",
+            transport="webhook",
+            payload={
+                "event": "appointment.requested",
+                "appointment": {
+                    "reference": record.reference,
+                    "category": record.category,
+                    "preferred_date": record.preferred_date,
+                    "preferred_time": record.preferred_time,
+                    "status": record.status,
+                    "doctor_id": record.doctor_id,
+                },
+            },
+        ))
+    return messages
+
+
+def notifications_enabled() -> bool:
+    """
+    Check whether any notification transport is configured
+    """
+    return bool(settings.NOTIFICATION_SMTP_HOST or settings.NOTIFICATION_WEBHOOK_URL)
+
+
+class DeliveryError(Exception):
+    """
+    Delivery failed; permanent errors are not retried
+    """
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class NotificationTransport(ABC):
+    """
+    Delivery channel for outbox messages
+    """
+
+    @abstractmethod
+    async def send(self, message: OutboxMessage) -> None:
+        """
+        Deliver one message
+
+        Raises:
+            DeliveryError: If the message was not delivered
+        """
+
+
+class SMTPTransport(NotificationTransport):
+    """
+    Email delivery through an SMTP server (blocking smtplib in a thread)
+    """
+
+    def __init__(self, host: str, port: int, sender: str, username: Optional[str] = None,
+                 password: Optional[str] = None, starttls: bool = False, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def _send_blocking(self, message: OutboxMessage) -> None:
+        """
+        Send one email (runs in the default executor)
+
+        Args:
+            message: Email message; the payload holds to, subject and body
+
+        Raises:
+            DeliveryError: If the message is malformed or the server refused
+                it (permanent for malformed messages and refused recipients)
+        """
+        email = EmailMessage()
+        try:
+            email["From"] = self.sender
+            email["To"] = message.payload["to"]
+            email["Subject"] = message.payload["subject"]
+            # Stable Message-ID lets mail systems drop duplicate redeliveries
+            email["Message-ID"] = f"<{message.idempotency_key.replace(':', '.')}@{self.sender.split('@')[-1]}>"
+            email.set_content(message.payload["body"])
+        except (KeyError, ValueError) as e:
+            # e.g. a header containing a newline; retrying cannot fix it
+            raise DeliveryError(f"Malformed email: {e}", permanent=True)
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                if self.starttls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password or "")
+                smtp.send_message(email)
+        except smtplib.SMTPRecipientsRefused as e:
+            raise DeliveryError(f"Recipient refused: {e}", permanent=True)
+        except (smtplib.SMTPException, OSError) as e:
+            raise DeliveryError(f"SMTP error: {e}")
+
+    async def send(self, message: OutboxMessage) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._send_blocking, message)
+
+
+class WebhookTransport(NotificationTransport):
+    """
+    JSON POST to a staff notification endpoint over the shared HTTP pool
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def send(self, message: OutboxMessage) -> None:
+        try:
+            response = await get_http_client().post(
+                self.url,
+                json=message.payload,
+                headers={"Idempotency-Key": message.idempotency_key},
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            raise DeliveryError(f"Webhook request failed: {e}")
+        if response.status_code >= 400:
+            # Client errors will not succeed on retry (except timeouts and throttling)
+            permanent = response.status_code < 500 and response.status_code not in (408, 429)
+            raise DeliveryError(f"Webhook returned {response.status_code}", permanent=permanent)
+
+
+class NotificationOutbox:
+    """
+    Outbox table operations (claim, acknowledge, reschedule)
+    Claims lease rows by pushing next_attempt_at forward, so several
+    processes can drain the same database without double delivery
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 60.0):
+        """
+        Args:
+            path: SQLite database shared with the appointment store
+            lease_seconds: How long a claimed row is hidden from other workers
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in OUTBOX_SCHEMA:
+            self._conn.execute(statement)
+
+    def claim_due(self, limit: int) -> List[OutboxMessage]:
+        """
+        Claim up to limit messages that are due for delivery
+
+        Args:
+            limit: Maximum number of messages
+
+        Returns:
+            Claimed messages
+        """
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, idempotency_key, transport, payload, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                [(now + self.lease_seconds, row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [OutboxMessage(key, transport, json.loads(payload), id=row_id, attempts=attempts)
+                for row_id, key, transport, payload, attempts in rows]
+
+    def complete(self, outcomes: List[Tuple[int, str, int, Optional[float], Optional[str]]]) -> None:
+        """
+        Record delivery outcomes in one transaction
+
+        Args:
+            outcomes: (row id, status, attempts, next attempt time, error) tuples
+        """
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = COALESCE(?, next_attempt_at), "
+                "last_error = ?, sent_at = CASE WHEN ? = 'sent' THEN ? ELSE sent_at END WHERE id = ?",
+                [(status, attempts, next_at, error, status, now, row_id)
+                 for row_id, status, attempts, next_at, error in outcomes],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release(self, ids: List[int]) -> None:
+        """
+        Make claimed but undelivered messages due again immediately
+        """
+        self._conn.executemany(
+            "UPDATE outbox SET next_attempt_at = ? WHERE id = ? AND status = 'pending'",
+            [(time.time(), row_id) for row_id in ids],
+        )
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Get message counts per status
+        """
+        rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        """
+        Close the database connection
+        """
+        self._conn.close()
+
+
+class NotificationDispatcher:
+    """
+    Background worker pool that drains the outbox
+    One dispatcher task claims batches and acknowledges outcomes in batches;
+    worker tasks deliver messages concurrently
+    """
+
+    def __init__(
+        self,
+        outbox: NotificationOutbox,
+        transports: Dict[str, NotificationTransport],
+        workers: int = 4,
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+        max_attempts: int = 8,
+        backoff_base: float = 2.0,
+        backoff_max: float = 600.0,
+    ):
+        """
+        Args:
+            outbox: Outbox table
+            transports: Transport name -> transport
+            workers: Concurrent deliveries
+            batch_size: Maximum messages claimed per database round trip
+            poll_interval: Seconds between checks when the outbox is idle
+            max_attempts: Attempts before a message is marked failed
+            backoff_base: First retry delay in seconds (doubles per attempt)
+            backoff_max: Longest retry delay in seconds
+        """
+        self.outbox = outbox
+        self.transports = transports
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._queue: Optional[asyncio.Queue] = None
+        self._outcomes: List[Tuple[int, str, int, Optional[float], Optional[str]]] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def _backoff(self, attempts: int) -> float:
+        """
+        Retry delay after a number of failed attempts, with jitter
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _run_in_executor(self, func, *args):
+        """
+        Run a blocking outbox call in the default executor
+
+        Args:
+            func: Outbox method
+            *args: Its arguments
+
+        Returns:
+            Result of the call
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _deliver(self, message: OutboxMessage) -> None:
+        """
+        Attempt one delivery and queue its outcome for the next batch update
+        Failures (including unexpected errors) are retried with backoff until
+        max_attempts, except permanent ones (and messages without a
+        transport), which fail at once
+
+        Args:
+            message: Claimed outbox message
+        """
+        attempts = message.attempts + 1
+        transport = self.transports.get(message.transport)
+        try:
+            if transport is None:
+                raise DeliveryError(f"No transport configured for {message.transport}", permanent=True)
+            await transport.send(message)
+        except DeliveryError as e:
+            if e.permanent or attempts >= self.max_attempts:
+                self.failed += 1
+                logger.error(f"Notification {message.idempotency_key} failed after {attempts} attempts: {e}")
+                self._outcomes.append((message.id, "failed", attempts, None, str(e)))
+            else:
+                self.retried += 1
+                logger.warning(f"Notification {message.idempotency_key} attempt {attempts} failed: {e}")
+                self._outcomes.append((message.id, "pending", attempts, time.time() + self._backoff(attempts), str(e)))
+            return
+        except Exception as e:
+            if attempts >= self.max_attempts:
+                self.failed += 1
+                logger.error(f"Notification {message.idempotency_key} failed after {attempts} attempts: {e}")
+                self._outcomes.append((message.id, "failed", attempts, None, str(e)))
+            else:
+                self.retried += 1
+                logger.error(f"Unexpected error delivering {message.idempotency_key}: {e}")
+                self._outcomes.append((message.id, "pending", attempts, time.time() + self._backoff(attempts), str(e)))
+            return
+        self.sent += 1
+        self._outcomes.append((message.id, "sent", attempts, None, None))
+
+    async def _worker(self) -> None:
+        """
+        Deliver queued messages one at a time, waking the dispatcher after each
+        """
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._deliver(message)
+            finally:
+                self._queue.task_done()
+                self._wake.set()
+
+    async def _flush_outcomes(self) -> None:
+        """
+        Write the delivery outcomes collected so far in one outbox update
+        """
+        if self._outcomes:
+            outcomes, self._outcomes = self._outcomes, []
+            await self._run_in_executor(self.outbox.complete, outcomes)
+
+    async def _dispatch(self) -> None:
+        """
+        Main loop: record outcomes, then claim as many due messages as the
+        worker queue has room for; sleeps until a delivery finishes or the
+        poll interval passes when there is nothing to claim
+        """
+        while not self._stopping:
+            # Cleared before checking, so a delivery finishing meanwhile still wakes us
+            self._wake.clear()
+            room = 0
+            try:
+                await self._flush_outcomes()
+                room = self._queue.maxsize - self._queue.qsize()
+                claimed = await self._run_in_executor(self.outbox.claim_due, min(room, self.batch_size)) if room else []
+                for message in claimed:
+                    self._queue.put_nowait(message)
+            except Exception as e:
+                logger.error(f"Notification dispatcher error: {e}")
+                claimed = []
+            if not claimed or room <= len(claimed):
+                # Idle, or the pool is saturated: wait for a delivery to finish
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def start(self) -> None:
+        """
+        Start the dispatcher and worker tasks
+        """
+        if self._tasks:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.workers * 2)
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._dispatch()))
+        logger.info(f"Notification dispatcher started ({self.workers} workers, transports: {', '.join(self.transports)})")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the workers, giving in-flight deliveries time to finish
+        Queued messages that were not attempted become due again immediately
+
+        Args:
+            timeout: Seconds to wait for queued deliveries
+        """
+        if not self._tasks:
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Notification dispatcher stopped with deliveries still queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        unattempted = []
+        while not self._queue.empty():
+            unattempted.append(self._queue.get_nowait().id)
+        await self._flush_outcomes()
+        if unattempted:
+            await self._run_in_executor(self.outbox.release, unattempted)
+        logger.info(f"Notification dispatcher stopped ({self.sent} sent, {self.failed} failed)")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get delivery counters for this process
+        """
+        return {"sent": self.sent, "retried": self.retried, "failed": self.failed}
+
+
+def create_transports() -> Dict[str, NotificationTransport]:
+    """
+    Create the transports configured in settings
+
+    Returns:
+        Transport name -> transport
+    """
+    transports: Dict[str, NotificationTransport] = {}
+    if settings.NOTIFICATION_SMTP_HOST:
+        transports["email"] = SMTPTransport(
+            settings.NOTIFICATION_SMTP_HOST,
+            settings.NOTIFICATION_SMTP_PORT,
+            sender=settings.NOTIFICATION_EMAIL_FROM,
+            username=settings.NOTIFICATION_SMTP_USERNAME,
+            password=settings.NOTIFICATION_SMTP_PASSWORD,
+            starttls=settings.NOTIFICATION_SMTP_STARTTLS,
+        )
+    if settings.NOTIFICATION_WEBHOOK_URL:
+        transports["webhook"] = WebhookTransport(settings.NOTIFICATION_WEBHOOK_URL)
+    return transports
+
+
+# Global dispatcher instance (created at startup when a transport is configured)
+_dispatcher: Optional[NotificationDispatcher] = None
+
+
+async def start_notifications(path: str) -> Optional[NotificationDispatcher]:
+    """
+    Start draining the outbox if any transport is configured
+
+    Args:
+        path: SQLite database holding the outbox
+
+    Returns:
+        Running dispatcher, or None if notifications are disabled
+    """
+    global _dispatcher
+    if _dispatcher is None and notifications_enabled():
+        _dispatcher = NotificationDispatcher(
+            NotificationOutbox(path, lease_seconds=settings.NOTIFICATION_LEASE_SECONDS),
+            create_transports(),
+            workers=settings.NOTIFICATION_WORKERS,
+            batch_size=settings.NOTIFICATION_BATCH_SIZE,
+            poll_interval=settings.NOTIFICATION_POLL_INTERVAL,
+            max_attempts=settings.NOTIFICATION_MAX_ATTEMPTS,
+            backoff_base=settings.NOTIFICATION_BACKOFF_BASE,
+            backoff_max=settings.NOTIFICATION_BACKOFF_MAX,
+        )
+        await _dispatcher.start()
+    return _dispatcher
+
+
+async def stop_notifications() -> None:
+    """
+    Stop the dispatcher and close its database connection
+    """
+    global _dispatcher
+    if _dispatcher is not None:
+        await _dispatcher.stop()
+        _dispatcher.outbox.close()
+        _dispatcher = None
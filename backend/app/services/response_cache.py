@@ -0,0 +1,334 @@
+"""
+Response Cache
+Caches upstream AI responses for repeated (normalized) chat questions
+Supports an in-process LRU backend and a SQLite backend shared across workers
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.utils.text import stem
+from app.core.metrics import response_cache_entries, response_cache_lookups_total
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_message(message: str, stemming: bool = False) -> str:
+    """
+    Normalize a chat message for cache lookups
+    Folds case, punctuation and whitespace so trivially different messages match
+
+    Args:
+        message: Raw user message
+        stemming: Also reduce words to a simple stem ("headaches" -> "headach")
+
+    Returns:
+        Normalized message string
+    """
+    text = _NON_WORD_RE.sub(" ", message.lower())
+    words = _WHITESPACE_RE.split(text.strip())
+    if stemming:
+        words = [stem(word) for word in words]
+    return " ".join(word for word in words if word)
+
+
+class CacheBackend(ABC):
+    """
+    Storage backend for cached responses
+    """
+
+    # Whether get/set do disk I/O and should run off the event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached value, or None if missing or expired
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a value, evicting the least recently used entries if full
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Remove all cached values
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """
+        Number of stored entries
+        """
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Per-process LRU cache with TTL expiry
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    On-disk LRU cache with TTL expiry
+    Uses SQLite in WAL mode so several uvicorn workers can share one file
+    """
+
+    blocking = True
+
+    # Evict at most every N writes to keep set() cheap
+    EVICT_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_response_cache_last_access "
+            "ON response_cache (last_access)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now),
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """
+        Drop expired entries, then least recently used ones above max_entries
+        """
+        self._conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (now,))
+        self._conn.execute(
+            "DELETE FROM response_cache WHERE key IN ("
+            "SELECT key FROM response_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Close the underlying database connection
+        """
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """
+    Cache of AI responses keyed on normalized message and model settings
+    """
+
+    def __init__(self, backend: CacheBackend, stemming: bool = False):
+        self.backend = backend
+        self.stemming = stemming
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, message: str, model: str, temperature: float, max_tokens: int) -> str:
+        """
+        Build a cache key from the normalized message and generation settings
+
+        Args:
+            message: Raw user message
+            model: Model name
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            Hex digest cache key
+        """
+        normalized = normalize_message(message, stemming=self.stemming)
+        raw = f"{model}|{temperature}|{max_tokens}|{normalized}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response and update hit/miss counters
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Cached response or None
+        """
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            response_cache_lookups_total.labels("miss").inc()
+        else:
+            self.hits += 1
+            response_cache_lookups_total.labels("hit").inc()
+        return value
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Store a response
+
+        Args:
+            key: Key from make_key()
+            response: AI response text
+        """
+        self.backend.set(key, response)
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response from the event loop
+        Backends that do disk I/O are read in the default executor
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Cached response or None
+        """
+        if not self.backend.blocking:
+            return self.get(key)
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, key)
+
+    async def store(self, key: str, response: str) -> None:
+        """
+        Store a response from the event loop
+        Backends that do disk I/O are written in the default executor
+
+        Args:
+            key: Key from make_key()
+            response: AI response text
+        """
+        if not self.backend.blocking:
+            self.set(key, response)
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self.set, key, response)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hits, misses, hit ratio and entry count
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.backend),
+        }
+
+    def collect_metrics(self) -> None:
+        """
+        Refresh the entry count gauge before a scrape (hits and misses are
+        counted as they happen)
+        """
+        response_cache_entries.set(len(self.backend))
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """
+    Create the response cache configured in settings
+
+    Returns:
+        ResponseCache instance, or None if caching is disabled
+    """
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+
+    if settings.RESPONSE_CACHE_BACKEND == "sqlite":
+        backend: CacheBackend = SQLiteCacheBackend(
+            settings.RESPONSE_CACHE_SQLITE_PATH,
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+    elif settings.RESPONSE_CACHE_BACKEND == "memory":
+        backend = InMemoryCacheBackend(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+    else:
+        raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {settings.RESPONSE_CACHE_BACKEND}")
+
+    logger.info(f"Response cache enabled ({settings.RESPONSE_CACHE_BACKEND} backend)")
+    return ResponseCache(backend, stemming=settings.RESPONSE_CACHE_STEMMING)
@@ -0,0 +1,199 @@
+"""
+Symptom Router
+Routes user messages to safe fallback responses by health topic
+Keyword table is compiled once into word/phrase lookup maps, so routing is a
+single linear pass over the message regardless of how many topics exist.
+Keywords and message words are compared by stem, so inflections ("coughing",
+"headaches") match their keyword
+"""
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+from app.utils.text import stem
+import re
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Stems of message words; the vocabulary of chat messages is small
+_stem = lru_cache(maxsize=65536)(stem)
+
+
+class SymptomTopic:
+    """
+    A health topic with weighted trigger keywords and a safe response
+    """
+    __slots__ = ("name", "keywords", "priority", "response")
+
+    def __init__(self, name: str, keywords: Dict[str, int], priority: int, response: str):
+        """
+        Args:
+            name: Topic identifier
+            keywords: Trigger words or phrases mapped to their score weight
+            priority: Tie-breaker when topics score equally (higher wins)
+            response: Safe, conservative response text
+        """
+        self.name = name
+        self.keywords = keywords
+        self.priority = priority
+        self.response = response
+
+
+# Common health topics with safe responses (specific keywords weigh more than generic ones)
+FALLBACK_TOPICS: List[SymptomTopic] = [
+    SymptomTopic(
+        name="headache",
+        keywords={"headache": 3, "migraine": 3, "head": 1, "pain": 1, "painful": 1},
+        priority=50,
+        response=(
+            "I understand you're experiencing headaches. Headaches can have various causes "
+            "including stress, dehydration, tension, or underlying health conditions. "
+            "It's important to stay hydrated, get adequate rest, and manage stress. "
+            "If headaches are frequent, severe, or persistent, I strongly recommend "
+            "consulting with a healthcare professional for proper evaluation."
+        ),
+    ),
+    SymptomTopic(
+        name="fever",
+        keywords={"fever": 3, "feverish": 3, "temperature": 2, "hot": 1, "chills": 2},
+        priority=40,
+        response=(
+            "Fever is your body's natural response to infection or illness. "
+            "For mild fevers, rest and hydration are important. Monitor your temperature "
+            "and symptoms. If the fever is high (above 101.3°F or 38.5°C), persistent, "
+            "or accompanied by severe symptoms, please consult with a healthcare professional "
+            "promptly for appropriate care."
+        ),
+    ),
+    SymptomTopic(
+        name="respiratory",
+        keywords={"cough": 3, "cold": 2, "flu": 3, "sore throat": 3, "runny nose": 3},
+        priority=30,
+        response=(
+            "Respiratory symptoms like coughs and colds are common. Rest, hydration, and "
+            "proper nutrition can support your recovery. If symptoms are severe, persistent, "
+            "or you have difficulty breathing, please seek medical attention. "
+            "A healthcare professional can provide appropriate guidance for your specific situation."
+        ),
+    ),
+    SymptomTopic(
+        name="digestive",
+        keywords={
+            "stomach": 2, "stomachache": 3, "nausea": 3, "nauseous": 3, "nauseated": 3,
+            "vomit": 3, "digest": 2, "digestion": 2, "digestive": 2, "indigestion": 3,
+            "heartburn": 3,
+        },
+        priority=20,
+        response=(
+            "Digestive discomfort can result from various factors including diet, stress, "
+            "or underlying conditions. Staying hydrated and eating light, easily digestible foods "
+            "may help. If symptoms are severe, persistent, or accompanied by other concerning "
+            "symptoms, please consult with a healthcare professional."
+        ),
+    ),
+    SymptomTopic(
+        name="sleep",
+        keywords={
+            "sleep": 2, "sleeping": 2, "sleepy": 2, "sleepless": 3, "insomnia": 3,
+            "tired": 2, "fatigue": 2, "fatigued": 2, "exhausted": 2,
+        },
+        priority=10,
+        response=(
+            "Sleep issues can significantly impact your health and well-being. "
+            "Maintaining a regular sleep schedule, creating a comfortable sleep environment, "
+            "and managing stress can help. If sleep problems persist or significantly affect "
+            "your daily life, I recommend discussing this with a healthcare professional "
+            "who can provide personalized guidance."
+        ),
+    ),
+]
+
+DEFAULT_FALLBACK_RESPONSE = (
+    "Thank you for your question. I'm here to provide general health information. "
+    "For specific medical concerns, symptoms, or health questions, I strongly recommend "
+    "consulting with a qualified healthcare professional who can provide personalized "
+    "advice based on your medical history and current condition. "
+    "Is there any general health information I can help you with today?"
+)
+
+
+class SymptomRouter:
+    """
+    Compiled keyword matcher that picks the best fallback topic for a message
+    """
+
+    def __init__(self, topics: Sequence[SymptomTopic], default_response: str):
+        """
+        Compile the topic table into phrase lookup maps
+
+        Args:
+            topics: Topic table
+            default_response: Response when no topic matches
+        """
+        self.topics = list(topics)
+        self.default_response = default_response
+        # stem -> [(topic index, weight)]
+        self._word_hits: Dict[str, List[Tuple[int, int]]] = {}
+        # first stem -> [(" full phrase of stems ", topic index, weight)] for multi-word keywords
+        self._phrase_hits: Dict[str, List[Tuple[str, int, int]]] = {}
+        for index, topic in enumerate(self.topics):
+            # Keywords sharing a stem ("sleep", "sleeping") count once, at the higher weight
+            stem_weights: Dict[str, int] = {}
+            for keyword, weight in topic.keywords.items():
+                stems = [stem(word) for word in _WORD_RE.findall(keyword.lower())]
+                if len(stems) == 1:
+                    stem_weights[stems[0]] = max(weight, stem_weights.get(stems[0], 0))
+                elif stems:
+                    phrase = f" {' '.join(stems)} "
+                    self._phrase_hits.setdefault(stems[0], []).append((phrase, index, weight))
+            for word, weight in stem_weights.items():
+                self._word_hits.setdefault(word, []).append((index, weight))
+        self._vocabulary = frozenset(self._word_hits) | frozenset(self._phrase_hits)
+
+    def match(self, message: str) -> int:
+        """
+        Score all topics for a message in one pass over its words
+        Each distinct keyword counts once; phrases are only checked when
+        their first word occurs in the message
+
+        Args:
+            message: User's message
+
+        Returns:
+            Index of the best matching topic, or -1 if none matched
+        """
+        words = [_stem(word) for word in _WORD_RE.findall(message.lower())]
+        present = self._vocabulary.intersection(words)
+        if not present:
+            return -1
+
+        scores: Dict[int, int] = {}
+        padded = None
+        for word in present:
+            for index, weight in self._word_hits.get(word, ()):
+                scores[index] = scores.get(index, 0) + weight
+            phrases = self._phrase_hits.get(word)
+            if phrases:
+                if padded is None:
+                    padded = f" {' '.join(words)} "
+                for phrase, index, weight in phrases:
+                    if phrase in padded:
+                        scores[index] = scores.get(index, 0) + weight
+        if not scores:
+            return -1
+        return max(scores, key=lambda index: (scores[index], self.topics[index].priority))
+
+    def route(self, message: str) -> str:
+        """
+        Get the safe fallback response for a message
+
+        Args:
+            message: User's message
+
+        Returns:
+            Topic response, or the default response if nothing matched
+        """
+        index = self.match(message)
+        return self.topics[index].response if index >= 0 else self.default_response
+
+
+# Global symptom router instance
+symptom_router = SymptomRouter(FALLBACK_TOPICS, DEFAULT_FALLBACK_RESPONSE)
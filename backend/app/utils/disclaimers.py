@@ -2,6 +2,7 @@
 Medical Disclaimer Utilities
 Centralized medical disclaimers for all responses
 """
+from app.utils.serialization import dumps
 
 # Primary medical disclaimer
 MEDICAL_DISCLAIMER = (
@@ -32,6 +33,10 @@ APPOINTMENT_DISCLAIMER = (
 )
 
 
+# JSON-encoded once, for responses assembled from pre-serialized parts
+MEDICINE_DISCLAIMER_JSON = dumps(MEDICINE_DISCLAIMER)
+
+
 def get_chat_disclaimer() -> str:
     """
     Get disclaimer text for chat responses
@@ -52,6 +57,16 @@ def get_medicine_disclaimer() -> str:
     return MEDICINE_DISCLAIMER
 
 
+def get_medicine_disclaimer_json() -> bytes:
+    """
+    Get the medicine disclaimer as a JSON string literal
+    
+    Returns:
+        UTF-8 JSON bytes of the medicine disclaimer
+    """
+    return MEDICINE_DISCLAIMER_JSON
+
+
 def get_appointment_disclaimer() -> str:
     """
     Get disclaimer text for appointment requests
@@ -0,0 +1,63 @@
+"""
+Serialization Utilities
+Fast JSON encoding (orjson when installed) and response classes for bodies
+that are already serialized or come from trusted internal objects
+"""
+from typing import Any
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+ORJSON_AVAILABLE = orjson is not None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize JSON-compatible data to UTF-8 bytes
+
+    Args:
+        content: Dicts, lists, strings, numbers, booleans and None
+
+    Returns:
+        Compact JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson (falls back to the standard library)
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """
+    Response for a body that is already JSON bytes (no encoding or validation)
+    """
+    media_type = "application/json"
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> RawJSONResponse:
+    """
+    Serialize a response model built by the handler itself
+    Returning a Response skips FastAPI's response_model pass, which would
+    validate the already-valid model again and walk it with jsonable_encoder
+
+    Args:
+        model: Response model instance
+        status_code: HTTP status code
+
+    Returns:
+        Response with the model's JSON
+    """
+    return RawJSONResponse(model.model_dump_json().encode("utf-8"), status_code=status_code)
@@ -0,0 +1,28 @@
+"""
+Text Utilities
+Light English word normalization shared by message matching features
+"""
+
+# Suffixes removed by the light stemmer (longest first)
+_STEM_SUFFIXES = ("ing", "edly", "ed", "es", "ly", "s")
+
+
+def stem(word: str) -> str:
+    """
+    Strip a common English suffix from a word
+    Deliberately conservative - keeps stems of at least 3 characters
+
+    Args:
+        word: Lowercase word
+
+    Returns:
+        Stemmed word
+    """
+    for suffix in _STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    # Fold a trailing silent "e" so "ache" and "aches" share a stem
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
@@ -0,0 +1,4 @@
+"""
+Benchmarks
+Performance harnesses and local stand-in services for the API
+"""
@@ -0,0 +1,97 @@
+"""
+Appointment Bulk Import/Export Benchmark
+Imports and exports synthetic CSV files of growing size through the CLI and
+reports rows/sec and peak RSS (which should stay flat as files grow)
+
+Run from the backend directory:
+    python -m benchmarks.bench_appointment_bulk --rows 100000 1000000
+"""
+from app.services.availability import DEFAULT_DOCTORS
+from datetime import date, timedelta
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+CATEGORIES = sorted({doctor.category for doctor in DEFAULT_DOCTORS})
+
+# Runs an app.cli command and reports the child's own peak RSS on stderr
+_RUNNER = (
+    "import resource, runpy, sys; sys.argv = ['app.cli'] + sys.argv[1:]; "
+    "runpy.run_module('app.cli', run_name='__main__'); "
+    "print('MAXRSS', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)"
+)
+
+
+def write_csv(path: str, rows: int, rng: random.Random) -> None:
+    """
+    Write a spreadsheet-like file; ~1% of rows are invalid
+    """
+    start = date.today() + timedelta(days=1)
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["name", "email", "phone", "category", "preferred_date", "preferred_time", "reason"])
+        for index in range(rows):
+            day = start + timedelta(days=rng.randrange(365))
+            slot_time = f"{rng.randrange(8, 19):02d}:{rng.choice((0, 15, 30, 45)):02d}" if rng.random() < 0.3 else ""
+            writer.writerow([
+                f"Patient {index}" if rng.random() > 0.01 else "",
+                f"patient{index}@example.com",
+                "+1-555-000-0000",
+                rng.choice(CATEGORIES),
+                day.isoformat(),
+                slot_time,
+                "Imported from clinic spreadsheet",
+            ])
+
+
+def run_cli(args, env) -> dict:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", _RUNNER, *args],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    elapsed = time.perf_counter() - started
+    max_rss_kb = int(completed.stderr.rsplit("MAXRSS", 1)[1].split()[0])
+    return {"seconds": round(elapsed, 2), "max_rss_mb": round(max_rss_kb / 1024, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    args = parser.parse_args()
+
+    rng = random.Random(13)
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            source = os.path.join(directory, f"appointments-{rows}.csv")
+            write_csv(source, rows, rng)
+            env = dict(os.environ, APPOINTMENT_SQLITE_PATH=os.path.join(directory, f"bulk-{rows}.sqlite3"))
+            report = os.path.join(directory, f"report-{rows}.jsonl")
+
+            result = run_cli(["import-appointments", "--input", source, "--report", report], env)
+            with open(report, encoding="utf-8") as handle:
+                rejected = sum(1 for _ in handle)
+            result.update({
+                "operation": "import", "rows": rows, "rejected": rejected,
+                "rows_per_s": round(rows / result["seconds"]),
+                "file_mb": round(os.path.getsize(source) / 1e6, 1),
+            })
+            print(json.dumps(result))
+
+            output = os.path.join(directory, f"export-{rows}.csv")
+            result = run_cli(["export-appointments", "--output", output], env)
+            result.update({
+                "operation": "export", "rows": rows - rejected,
+                "rows_per_s": round((rows - rejected) / result["seconds"]),
+            })
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Appointment Store Benchmark
+Sustained appointment inserts/sec: write-behind batching vs per-request commits
+
+Run from the backend directory:
+    python -m benchmarks.bench_appointment_store --requests 5000 --concurrency 50
+"""
+from app.services.appointment_store import AppointmentRecord, AppointmentStore
+from benchmarks.common import summarize
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+
+
+def _record(index: int) -> AppointmentRecord:
+    return AppointmentRecord(
+        reference=uuid.uuid4().hex[:12],
+        name=f"Patient {index}",
+        email=f"patient{index}@example.com",
+        phone="+1-555-000-0000",
+        category="General Physician",
+        preferred_date="2027-01-12",
+        preferred_time="10:00",
+        reason="Routine checkup",
+    )
+
+
+async def run(store: AppointmentStore, requests: int, concurrency: int) -> dict:
+    """
+    Issue requests from `concurrency` workers and time each add() call
+    """
+    samples = []
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for index in counter:
+            start = time.perf_counter()
+            await store.add(_record(index))
+            samples.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    accepted = time.perf_counter() - started
+    # Durable throughput includes draining the queue to disk
+    await asyncio.get_running_loop().run_in_executor(None, store.flush)
+    durable = time.perf_counter() - started
+
+    result = summarize(samples)
+    result["accepted_per_s"] = round(requests / accepted)
+    result["durable_inserts_per_s"] = round(requests / durable)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--synchronous", default="FULL")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, write_behind in (("per_request_commit", False), ("write_behind", True)):
+            path = os.path.join(directory, f"{mode}.sqlite3")
+            store = AppointmentStore(path, write_behind=write_behind, synchronous=args.synchronous)
+            result = asyncio.run(run(store, args.requests, args.concurrency))
+            result.update({"mode": mode, "stored": len(store), "batches": store.stats()["batches_committed"]})
+            store.close()
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
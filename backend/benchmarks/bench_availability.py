@@ -0,0 +1,135 @@
+"""
+Availability Engine Benchmark
+Free-slot query latency, cached range scans and double-booking safety
+under contention
+
+Run from the backend directory:
+    python -m benchmarks.bench_availability --occupancy 0.7 --bookings 20000 --threads 32
+"""
+from app.services.availability import DEFAULT_DOCTORS, AvailabilityEngine
+from benchmarks.common import summarize
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import argparse
+import json
+import random
+import time
+
+CATEGORIES = sorted({doctor.category for doctor in DEFAULT_DOCTORS})
+
+
+def fill(engine: AvailabilityEngine, start: date, occupancy: float, rng: random.Random) -> None:
+    """
+    Book a random fraction of every slot over the search horizon
+    """
+    for offset in range(engine.horizon_days):
+        day = start + timedelta(days=offset)
+        for category in CATEGORIES:
+            for slot in engine.free_slots(category, day):
+                if rng.random() < occupancy:
+                    engine.reserve(category, day, slot.time, slot.doctor_id)
+
+
+def bench_queries(occupancy: float, queries: int, rng: random.Random) -> None:
+    engine = AvailabilityEngine(DEFAULT_DOCTORS)
+    start = date(2027, 1, 4)
+    fill(engine, start, occupancy, rng)
+    samples = []
+    for _ in range(queries):
+        category = rng.choice(CATEGORIES)
+        after = start + timedelta(days=rng.randrange(30))
+        began = time.perf_counter()
+        engine.next_free_slots(category, after, limit=5)
+        samples.append((time.perf_counter() - began) * 1_000_000)
+    result = summarize(samples)
+    # summarize() labels percentiles in ms; samples here are microseconds
+    result = {key.replace("_ms", "_us"): value for key, value in result.items()}
+    result.update({"query": "next_free_slots(limit=5)", "occupancy": occupancy, **engine.stats()})
+    print(json.dumps(result))
+
+
+def bench_ranges(occupancy: float, queries: int, range_days: int, rng: random.Random) -> None:
+    """
+    Month-long free_times() scans: cold, cached, and with a booking landing
+    between scans (only the booked day is recomputed)
+    """
+    engine = AvailabilityEngine(DEFAULT_DOCTORS)
+    start = date(2027, 1, 4)
+    fill(engine, start, occupancy, rng)
+    days = [start + timedelta(days=offset) for offset in range(range_days)]
+
+    def scan(category: str) -> float:
+        began = time.perf_counter()
+        for day in days:
+            engine.free_times(category, day)
+        return (time.perf_counter() - began) * 1_000_000
+
+    cold = [scan(category) for category in CATEGORIES]
+    warm = [scan(rng.choice(CATEGORIES)) for _ in range(queries)]
+    churn = []
+    for _ in range(queries):
+        category = rng.choice(CATEGORIES)
+        day = rng.choice(days)
+        free = engine.free_slots(category, day)
+        if free:
+            slot = free[0]
+            engine.release(engine.reserve(category, day, slot.time, slot.doctor_id))
+        churn.append(scan(category))
+
+    for label, samples in (("cold", cold), ("cached", warm), ("after_booking", churn)):
+        result = {key.replace("_ms", "_us"): value for key, value in summarize(samples).items()}
+        result.update({"range_scan": label, "range_days": range_days})
+        print(json.dumps(result))
+
+
+def bench_contention(bookings: int, threads: int, rng: random.Random) -> None:
+    """
+    Many threads race for a handful of hot slots; every slot must be booked
+    exactly once
+    """
+    engine = AvailabilityEngine(DEFAULT_DOCTORS)
+    days = [date(2027, 1, 4) + timedelta(days=offset) for offset in range(5)]
+    hot = [("Cardiologist", day, time) for day in days for time in ("12:00", "12:30", "13:00")]
+    attempts = [rng.choice(hot) for _ in range(bookings)]
+
+    def book(attempt):
+        return engine.reserve(*attempt)
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        slots = [slot for slot in pool.map(book, attempts, chunksize=64) if slot is not None]
+    elapsed = time.perf_counter() - began
+
+    capacity = sum(
+        1 for category, day, time_ in hot for doctor in DEFAULT_DOCTORS
+        if doctor.category == category and day.weekday() in doctor.working_days
+        and doctor.slot_at(int(time_[:2]) * 60 + int(time_[3:])) >= 0
+    )
+    unique = {(slot.day, slot.time, slot.doctor_id) for slot in slots}
+    print(json.dumps({
+        "bookings_attempted": bookings,
+        "threads": threads,
+        "bookings_per_s": round(bookings / elapsed),
+        "reserved": len(slots),
+        "capacity": capacity,
+        "double_booked": len(slots) - len(unique),
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--occupancy", type=float, default=0.7)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--range-days", type=int, default=31)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    bench_queries(args.occupancy, args.queries, rng)
+    bench_ranges(args.occupancy, args.queries // 10, args.range_days, rng)
+    bench_contention(args.bookings, args.threads, rng)
+
+
+if __name__ == "__main__":
+    main()
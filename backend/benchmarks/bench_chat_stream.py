@@ -0,0 +1,61 @@
+"""
+Chat Streaming Benchmark
+Measures time-to-first-token of POST /chat/stream versus POST /chat
+
+Run from the backend directory:
+    python -m benchmarks.bench_chat_stream --requests 50
+"""
+from benchmarks.common import free_port, serve_app, serve_module, summarize
+import argparse
+import httpx
+import json
+import time
+
+MESSAGE = {"message": "I have frequent headaches"}
+
+
+def _time_blocking(client: httpx.Client, base_url: str) -> float:
+    """
+    Time until the full /chat response is available (first byte == last byte)
+    """
+    start = time.perf_counter()
+    response = client.post(f"{base_url}/chat", json=MESSAGE)
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+def _time_streaming(client: httpx.Client, base_url: str) -> float:
+    """
+    Time until the first delta event arrives from /chat/stream
+    """
+    start = time.perf_counter()
+    with client.stream("POST", f"{base_url}/chat/stream", json=MESSAGE) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line.startswith("event: delta"):
+                return (time.perf_counter() - start) * 1000
+    raise RuntimeError("stream ended without a delta event")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--token-delay-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    mock_port, api_port = free_port(), free_port()
+    mock_args = ("--latency-ms", str(args.latency_ms), "--token-delay-ms", str(args.token_delay_ms))
+    with serve_module("benchmarks.mock_llm", mock_port, *mock_args) as mock_url:
+        env = {"OPENAI_API_KEY": "bench-key", "OPENAI_BASE_URL": f"{mock_url}/v1"}
+        with serve_app(api_port, env) as base_url, httpx.Client(timeout=60) as client:
+            for name, measure in (("/chat", _time_blocking), ("/chat/stream", _time_streaming)):
+                samples = [measure(client, base_url) for _ in range(args.requests)]
+                result = summarize(samples)
+                result["endpoint"] = name
+                result["metric"] = "time_to_first_token"
+                print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Circuit Breaker Benchmark
+Chat latency while the upstream hangs (simulated outage) and after it
+recovers, with the fixed 30s timeout versus circuit breaker + adaptive timeout
+
+Run from the backend directory:
+    python -m benchmarks.bench_circuit_breaker --outage-seconds 30 --rate 5
+"""
+from benchmarks.common import free_port, serve_app, serve_module, summarize
+import argparse
+import asyncio
+import httpx
+import json
+import time
+
+MODES = {
+    "fixed-timeout": {"LLM_CIRCUIT_FAILURE_THRESHOLD": "1000000", "LLM_ADAPTIVE_TIMEOUT": "false"},
+    "breaker+adaptive": {"LLM_CIRCUIT_RESET_TIMEOUT": "2"},
+}
+
+
+async def open_loop(base_url: str, seconds: float, rate: float) -> dict:
+    """
+    Send chats at a fixed rate regardless of how long earlier ones take
+    """
+    samples = []
+    outcomes = {"upstream": 0, "fallback": 0, "shed": 0}
+
+    async def one(client: httpx.AsyncClient, index: int) -> None:
+        start = time.perf_counter()
+        response = await client.post(f"{base_url}/chat", json={"message": f"Question number {index}"})
+        samples.append((time.perf_counter() - start) * 1000)
+        if response.status_code == 503:
+            outcomes["shed"] += 1
+        elif response.json()["response"].startswith("Headaches can"):
+            outcomes["upstream"] += 1
+        else:
+            outcomes["fallback"] += 1
+
+    async with httpx.AsyncClient(timeout=120, limits=httpx.Limits(max_connections=1000)) as client:
+        tasks = []
+        for index in range(int(seconds * rate)):
+            tasks.append(asyncio.ensure_future(one(client, index)))
+            await asyncio.sleep(1 / rate)
+        await asyncio.gather(*tasks)
+    result = summarize(samples)
+    result.update(outcomes)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--outage-seconds", type=float, default=30)
+    parser.add_argument("--rate", type=float, default=5, help="Chats per second")
+    parser.add_argument("--latency-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    mock_args = ("--latency-ms", str(args.latency_ms), "--token-delay-ms", "0")
+    with serve_module("benchmarks.mock_llm", free_port(), *mock_args) as mock_url, httpx.Client() as client:
+        for mode, overrides in MODES.items():
+            env = {
+                "OPENAI_API_KEY": "bench-key",
+                "OPENAI_BASE_URL": f"{mock_url}/v1",
+                "OPENAI_TIMEOUT": "30",
+                "RESPONSE_CACHE_ENABLED": "false",
+                "LLM_REQUESTS_PER_SECOND": "0",
+                **overrides,
+            }
+            with serve_app(free_port(), env) as base_url:
+                phases = (
+                    ("healthy", {"latency_ms": args.latency_ms}, 10),
+                    ("outage", {"latency_ms": 600000}, args.outage_seconds),
+                    ("recovered", {"latency_ms": args.latency_ms}, 10),
+                )
+                for phase, behaviour, seconds in phases:
+                    client.post(f"{mock_url}/control", json=behaviour)
+                    result = asyncio.run(open_loop(base_url, seconds, args.rate))
+                    result["mode"] = mode
+                    result["phase"] = phase
+                    print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
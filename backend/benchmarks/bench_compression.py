@@ -0,0 +1,101 @@
+"""
+Compression Benchmark
+Response size and per-request time for a 50-result /medicine/search and the
+OpenAPI schema, sent uncompressed, gzip-compressed and brotli-compressed; the
+schema is served behind the HTTP cache, so its compressed body is reused per ETag
+
+Run from the backend directory:
+    python -m benchmarks.bench_compression --entries 20000 --limit 50
+
+Requests are driven through the ASGI interface in-process
+"""
+from fastapi import FastAPI
+from app.core.compression import BROTLI_AVAILABLE, CompressionMiddleware
+from app.core.http_cache import CacheRule, HTTPCacheMiddleware
+from app.routers import medicine
+from benchmarks.bench_metrics import drive
+from benchmarks.bench_serialization import build_service
+import argparse
+import asyncio
+import json
+import statistics
+
+
+def build_app(compressed: bool) -> FastAPI:
+    """
+    Create an app serving the medicine router and a cached OpenAPI schema
+    """
+    app = FastAPI()
+    app.include_router(medicine.router)
+    app.add_middleware(HTTPCacheMiddleware, rules=[CacheRule("/openapi.json", lambda: "bench", 300)])
+    if compressed:
+        app.add_middleware(CompressionMiddleware)
+    return app
+
+
+async def response_size(app: FastAPI, target: str, accept_encoding: bytes) -> int:
+    """
+    Get the body size of one response as sent on the wire
+    """
+    size = 0
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    path, _, query = target.partition("?")
+    await app(
+        {
+            "type": "http", "method": "GET", "path": path, "query_string": query.encode(), "root_path": "",
+            "headers": [(b"accept-encoding", accept_encoding)], "scheme": "http", "server": ("bench", 80),
+        },
+        receive,
+        send,
+    )
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    service = build_service(args.entries)
+    # The router resolves the module-level service at call time
+    medicine.medicine_service = service
+    prefix = sorted({name[:2] for name, _ in service.formulary.names()})[0]
+    targets = {"medicine_search": f"/medicine/search?q={prefix}&limit={args.limit}", "openapi": "/openapi.json"}
+
+    plain, compressed = build_app(False), build_app(True)
+    modes = {"identity": (plain, b"identity"), "gzip": (compressed, b"gzip")}
+    if BROTLI_AVAILABLE:
+        modes["br"] = (compressed, b"br")
+
+    for name, target in targets.items():
+        results = {mode: [] for mode in modes}
+        sizes = {mode: asyncio.run(response_size(app, target, encoding)) for mode, (app, encoding) in modes.items()}
+        for _ in range(args.rounds):
+            for mode, (app, encoding) in modes.items():
+                results[mode].append(asyncio.run(drive(app, args.requests, target, [(b"accept-encoding", encoding)])))
+        baseline = statistics.median(results["identity"])
+        for mode, samples in results.items():
+            median = statistics.median(samples)
+            print(json.dumps({
+                "target": name,
+                "mode": mode,
+                "bytes": sizes[mode],
+                "size_pct": round(sizes[mode] / sizes["identity"] * 100, 1),
+                "per_request_us": round(median, 1),
+                "overhead_us": round(median - baseline, 1),
+            }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Conversation Memory Benchmark
+Sizes the in-memory conversation store for many active conversations
+
+Run from the backend directory:
+    python -m benchmarks.bench_conversation_memory --conversations 50000 --exchanges 8
+"""
+from app.services.conversation_store import ConversationMemory, InMemoryConversationStore
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+USER_MESSAGES = [
+    "I have had a mild headache since yesterday evening. Should I be worried?",
+    "My father is 78 and often feels tired after lunch, is that normal?",
+    "What can help with a dry cough at night?",
+    "I keep waking up at 3am and cannot fall back asleep.",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=50000)
+    parser.add_argument("--exchanges", type=int, default=8)
+    parser.add_argument("--context-tokens", type=int, default=1500)
+    parser.add_argument("--compact-after-turns", type=int, default=12)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    store = InMemoryConversationStore(max_conversations=args.conversations, ttl_seconds=86400)
+    memory = ConversationMemory(
+        store,
+        context_tokens=args.context_tokens,
+        compact_after_turns=args.compact_after_turns,
+        summary_tokens=200,
+    )
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    for exchange in range(args.exchanges):
+        for index in range(args.conversations):
+            conversation_id = f"conversation-{index}"
+            memory.build_context(conversation_id)
+            # Unique strings per turn so the measurement is not flattered by sharing
+            user = f"{rng.choice(USER_MESSAGES)} (turn {exchange})"
+            assistant = f"General information reply #{exchange} for {conversation_id}. " * 6
+            memory.append_exchange(conversation_id, user, assistant)
+    elapsed = time.perf_counter() - started
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = memory.stats()
+    result["traced_bytes"] = traced_bytes
+    result["traced_bytes_per_conversation"] = round(traced_bytes / max(1, len(store)), 1)
+    result["exchanges_per_second"] = round(args.conversations * args.exchanges / elapsed, 1)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Formulary Load Benchmark
+Reports startup time and RSS for loading and indexing a large formulary file,
+optionally compared with opening a prebuilt memory-mapped snapshot
+
+Run from the backend directory:
+    python -m benchmarks.bench_formulary_load --entries 500000 --snapshot
+"""
+from benchmarks.bench_medicine_search import synthetic_names
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+PRECAUTIONS = [
+    "Do not exceed the recommended dosage",
+    "Consult a doctor if symptoms persist",
+    "Avoid alcohol while taking this medication",
+    "Inform your doctor of all medications you are taking",
+    "Not recommended during pregnancy without medical supervision",
+    "May cause drowsiness",
+    "Take with food to reduce stomach upset",
+]
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size of this process in MB (Linux)
+    """
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def write_formulary(path: str, entries: int) -> None:
+    """
+    Write a synthetic JSONL formulary
+    """
+    rng = random.Random(11)
+    with open(path, "w", encoding="utf-8") as handle:
+        for name in synthetic_names(entries, rng):
+            row = {
+                "name": name.capitalize(),
+                "usage": f"{name.capitalize()} is used to treat {rng.choice(['pain', 'infections', 'high blood pressure', 'acid reflux'])}.",
+                "precautions": rng.sample(PRECAUTIONS, 4),
+                "aliases": [name + "-xr"] if rng.random() < 0.2 else [],
+            }
+            handle.write(json.dumps(row) + "\n")
+
+
+def measure(path: str, mode: str) -> dict:
+    """
+    Load a formulary in this (fresh) process and report time and memory
+    """
+    # Import application modules up front so only loading is measured
+    from app.schemas.medicine import MedicineInfo
+    from app.services.formulary import Formulary, iter_formulary_rows
+    from app.services.formulary_snapshot import open_snapshot
+    from app.services.medicine_index import MedicineIndex
+
+    baseline = rss_mb()
+    started = time.perf_counter()
+    if mode == "snapshot":
+        catalog, index = open_snapshot(path)
+        loaded = indexed = time.perf_counter()
+        # Touch the mapping the way the first searches would
+        searches = [index.search(name, limit=10) for name in ("abamab", "kopril", "zzqx")]
+        first_search_s = time.perf_counter() - indexed
+    elif mode == "pydantic":
+        catalog = [
+            MedicineInfo(name=row["name"], usage=row["usage"], precautions=row["precautions"])
+            for row in iter_formulary_rows(path)
+        ]
+        loaded = time.perf_counter()
+        indexed = loaded
+    else:
+        catalog = Formulary.from_file(path)
+        loaded = time.perf_counter()
+        MedicineIndex.build(catalog.names())
+        indexed = time.perf_counter()
+    result = {
+        "mode": mode,
+        "entries": len(catalog),
+        "load_s": round(loaded - started, 4),
+        "index_s": round(indexed - loaded, 2),
+        "rss_mb": round(rss_mb() - baseline, 1),
+    }
+    if mode == "snapshot":
+        result["first_searches_ms"] = round(first_search_s * 1000, 2)
+        result["file_mb"] = round(os.path.getsize(path) / 1024 / 1024, 1)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=500000)
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="compact", help=argparse.SUPPRESS)
+    parser.add_argument("--compare-pydantic", action="store_true", help="Also load one MedicineInfo per row")
+    parser.add_argument("--snapshot", action="store_true", help="Also build and open a mmap snapshot")
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.mode)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "formulary.jsonl")
+        write_formulary(path, args.entries)
+        runs = [("compact", path)]
+        if args.compare_pydantic:
+            runs.append(("pydantic", path))
+        if args.snapshot:
+            from app.services.formulary_snapshot import build_snapshot
+            snapshot_path = os.path.join(directory, "formulary.snap")
+            started = time.perf_counter()
+            build_snapshot(snapshot_path, path)
+            print(json.dumps({"mode": "build-snapshot", "build_s": round(time.perf_counter() - started, 2)}))
+            runs.append(("snapshot", snapshot_path))
+        for mode, data_path in runs:
+            # Fresh interpreter per mode so RSS is not skewed by earlier runs
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_formulary_load", "--measure", data_path, "--mode", mode],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
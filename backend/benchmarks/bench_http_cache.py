@@ -0,0 +1,91 @@
+"""
+HTTP Cache Benchmark
+Per-request time of GET /medicine/search without the cache middleware, when
+replayed from the response LRU, and when answered 304 to a conditional request
+
+Run from the backend directory:
+    python -m benchmarks.bench_http_cache --entries 20000 --limit 10
+
+Requests are driven through the ASGI interface in-process; every mode sends the
+same query so the cached modes measure the steady state of repeated searches
+"""
+from fastapi import FastAPI
+from app.core.http_cache import CacheRule, HTTPCacheMiddleware
+from app.routers import medicine
+from benchmarks.bench_metrics import drive
+from benchmarks.bench_serialization import build_service
+import argparse
+import asyncio
+import json
+import statistics
+
+
+def build_app(cached: bool) -> FastAPI:
+    """
+    Create an app serving the medicine router, optionally behind the cache
+    """
+    app = FastAPI()
+    app.include_router(medicine.router)
+    if cached:
+        app.add_middleware(
+            HTTPCacheMiddleware,
+            rules=[CacheRule("/medicine/search", lambda: medicine.medicine_service.catalog_version, 300, {"limit": "10"})],
+        )
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    service = build_service(args.entries)
+    # The router resolves the module-level service at call time
+    medicine.medicine_service = service
+    prefix = sorted({name[:2] for name, _ in service.formulary.names()})[0]
+    target = f"/medicine/search?q={prefix}&limit={args.limit}"
+
+    cached_app = build_app(True)
+    etag = None
+
+    async def capture(message: dict) -> None:
+        nonlocal etag
+        if message["type"] == "http.response.start":
+            etag = dict(message["headers"])[b"etag"]
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    path, _, query = target.partition("?")
+    asyncio.run(cached_app(
+        {"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": []},
+        receive,
+        capture,
+    ))
+
+    modes = {
+        "uncached": (build_app(False), None),
+        "lru_hit": (cached_app, None),
+        "not_modified": (cached_app, [(b"if-none-match", etag)]),
+    }
+    results = {mode: [] for mode in modes}
+    for _ in range(args.rounds):
+        for mode, (app, headers) in modes.items():
+            results[mode].append(asyncio.run(drive(app, args.requests, target, headers)))
+
+    baseline = statistics.median(results["uncached"])
+    for mode, samples in results.items():
+        median = statistics.median(samples)
+        print(json.dumps({
+            "mode": mode,
+            "limit": args.limit,
+            "per_request_us": round(median, 1),
+            "speedup": round(baseline / median, 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+HTTP Pool Benchmark
+Compares a new httpx.AsyncClient per chat against the shared connection pool
+
+Run from the backend directory:
+    python -m benchmarks.bench_http_pool --concurrency 200 --rounds 5
+"""
+from benchmarks.common import free_port, serve_module, summarize
+import argparse
+import asyncio
+import httpx
+import json
+import time
+
+
+async def _per_request_client(url: str, payload: dict) -> None:
+    """
+    Previous behaviour: open (and tear down) a client for every chat
+    """
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.post(url, json=payload)
+        response.raise_for_status()
+
+
+async def _run(mode: str, base_url: str, concurrency: int, rounds: int, max_connections: int) -> dict:
+    from app.core.config import settings
+    from app.core import http_client
+    from app.services.ai_service import AIService
+
+    settings.OPENAI_API_KEY = "bench-key"
+    settings.OPENAI_BASE_URL = f"{base_url}/v1"
+    settings.HTTP_POOL_MAX_CONNECTIONS = max_connections
+    settings.HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS = max_connections
+    service = AIService()
+    payload = {"model": "mock", "messages": [{"role": "user", "content": "I have a headache"}]}
+    samples = []
+
+    async def one() -> None:
+        start = time.perf_counter()
+        if mode == "per-request":
+            await _per_request_client(service.router.providers[0].completions_url, payload)
+        else:
+            await service.generate_response("I have a headache")
+        samples.append((time.perf_counter() - start) * 1000)
+
+    await http_client.start_http_client()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await http_client.close_http_client()
+
+    result = summarize(samples)
+    result["mode"] = mode
+    result["throughput_rps"] = round(len(samples) / elapsed, 1)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--max-connections", type=int, default=200)
+    args = parser.parse_args()
+
+    port = free_port()
+    with serve_module("benchmarks.mock_llm", port, "--latency-ms", str(args.latency_ms), "--token-delay-ms", "0") as base_url:
+        for mode in ("per-request", "pooled"):
+            result = asyncio.run(_run(mode, base_url, args.concurrency, args.rounds, args.max_connections))
+            print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+LLM Admission Benchmark
+Sends a burst of /chat requests at an upstream that answers 429 above a
+concurrency limit, with and without admission control and coalescing
+
+Run from the backend directory:
+    python -m benchmarks.bench_llm_admission --requests 400 --distinct 20 --upstream-limit 16
+"""
+from benchmarks.common import free_port, serve_app, serve_module, summarize
+import argparse
+import asyncio
+import httpx
+import json
+import time
+
+# Settings per mode; the response cache is off so only coalescing dedupes prompts
+MODES = {
+    "unlimited": {"LLM_MAX_CONCURRENCY": "100000", "LLM_REQUESTS_PER_SECOND": "0", "LLM_COALESCE_REQUESTS": "false"},
+    "admission": {"LLM_COALESCE_REQUESTS": "false"},
+    "admission+coalescing": {"LLM_COALESCE_REQUESTS": "true"},
+}
+
+
+async def burst(base_url: str, requests: int, distinct: int) -> dict:
+    samples = []
+    statuses = {}
+    fallbacks = 0
+
+    async def one(client: httpx.AsyncClient, index: int) -> None:
+        nonlocal fallbacks
+        body = {"message": f"I have had a headache for {index % distinct + 1} days"}
+        start = time.perf_counter()
+        response = await client.post(f"{base_url}/chat", json=body)
+        samples.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 200 and not response.json()["response"].startswith("Headaches can"):
+            fallbacks += 1
+
+    limits = httpx.Limits(max_connections=requests)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        await asyncio.gather(*(one(client, index) for index in range(requests)))
+    result = summarize(samples)
+    result["statuses"] = statuses
+    result["fallback_answers"] = fallbacks
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--distinct", type=int, default=20)
+    parser.add_argument("--upstream-limit", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    mock_port = free_port()
+    mock_args = ("--latency-ms", str(args.latency_ms), "--token-delay-ms", "0",
+                 "--max-concurrency", str(args.upstream_limit))
+    with serve_module("benchmarks.mock_llm", mock_port, *mock_args) as mock_url, httpx.Client() as client:
+        for mode, overrides in MODES.items():
+            env = {
+                "OPENAI_API_KEY": "bench-key",
+                "OPENAI_BASE_URL": f"{mock_url}/v1",
+                "RESPONSE_CACHE_ENABLED": "false",
+                "LLM_MAX_CONCURRENCY": str(args.upstream_limit),
+                "LLM_REQUESTS_PER_SECOND": "0",
+                "LLM_QUEUE_MAX_SIZE": str(args.requests),
+                "LLM_QUEUE_MAX_WAIT": "30",
+                **overrides,
+            }
+            before = client.get(f"{mock_url}/stats").json()
+            with serve_app(free_port(), env) as base_url:
+                result = asyncio.run(burst(base_url, args.requests, args.distinct))
+                admission = client.get(f"{base_url}/health/llm").json()
+            after = client.get(f"{mock_url}/stats").json()
+            result["mode"] = mode
+            result["upstream_calls"] = after["requests"] - before["requests"]
+            result["upstream_429"] = after["rate_limited"] - before["rate_limited"]
+            result["coalesced"] = admission["coalesced"]
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
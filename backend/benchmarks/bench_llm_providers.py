@@ -0,0 +1,90 @@
+"""
+LLM Provider Routing Benchmark
+Chat latency against a single upstream versus routing across three mock
+upstreams (one with a slow tail, one slower, one failing half its calls),
+with and without hedged requests
+
+Run from the backend directory:
+    python -m benchmarks.bench_llm_providers --requests 300 --concurrency 4
+"""
+from benchmarks.common import free_port, serve_app, serve_module, summarize
+from contextlib import ExitStack
+import argparse
+import asyncio
+import httpx
+import json
+import time
+
+# name -> mock_llm arguments
+UPSTREAMS = {
+    "primary": ("--latency-ms", "80", "--slow-rate", "0.03", "--slow-ms", "1500"),
+    "secondary": ("--latency-ms", "120", "--slow-rate", "0.03", "--slow-ms", "1500"),
+    "flaky": ("--latency-ms", "40", "--fail-rate", "0.5"),
+}
+
+
+async def load(base_url: str, requests: int, concurrency: int) -> dict:
+    samples = []
+    fallbacks = 0
+    counter = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal fallbacks
+        for index in counter:
+            start = time.perf_counter()
+            response = await client.post(f"{base_url}/chat", json={"message": f"Question number {index}"})
+            response.raise_for_status()
+            samples.append((time.perf_counter() - start) * 1000)
+            if not response.json()["response"].startswith("Headaches can"):
+                fallbacks += 1
+
+    async with httpx.AsyncClient(timeout=60) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    result = summarize(samples)
+    result["fallback_answers"] = fallbacks
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    with ExitStack() as stack, httpx.Client() as client:
+        urls = {
+            name: stack.enter_context(serve_module("benchmarks.mock_llm", free_port(), "--token-delay-ms", "0", *extra))
+            for name, extra in UPSTREAMS.items()
+        }
+        extra_providers = json.dumps([
+            {"name": name, "base_url": f"{urls[name]}/v1"} for name in ("secondary", "flaky")
+        ])
+        modes = {
+            "single": {},
+            "routed": {"LLM_PROVIDERS": extra_providers},
+            "routed+hedged": {"LLM_PROVIDERS": extra_providers, "LLM_HEDGE_ENABLED": "true"},
+        }
+        for mode, overrides in modes.items():
+            env = {
+                "OPENAI_API_KEY": "bench-key",
+                "OPENAI_BASE_URL": f"{urls['primary']}/v1",
+                "RESPONSE_CACHE_ENABLED": "false",
+                "LLM_REQUESTS_PER_SECOND": "0",
+                **overrides,
+            }
+            before = {name: client.get(f"{url}/stats").json()["requests"] for name, url in urls.items()}
+            with serve_app(free_port(), env) as base_url:
+                result = asyncio.run(load(base_url, args.requests, args.concurrency))
+                routing = client.get(f"{base_url}/health/llm").json()
+            result["mode"] = mode
+            result["upstream_calls"] = {
+                name: client.get(f"{url}/stats").json()["requests"] - before[name] for name, url in urls.items()
+            }
+            result["hedges"] = routing["hedges"]
+            result["hedge_wins"] = routing["hedge_wins"]
+            result["failovers"] = routing["failovers"]
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Medicine Search Benchmark
+Measures MedicineIndex search latency on a large synthetic formulary
+
+Run from the backend directory:
+    python -m benchmarks.bench_medicine_search --entries 100000 --queries 20000
+
+With --batch-size, also compares N sequential GET /medicine/search calls
+against one POST /medicine/search/batch (in-process ASGI, built-in catalog)
+"""
+from app.services.medicine_index import MedicineIndex
+from benchmarks.common import summarize
+import argparse
+import asyncio
+import json
+import random
+import time
+
+CONSONANTS = "bcdfghklmnprstvxz"
+VOWELS = "aeiouy"
+SUFFIXES = ["mab", "pril", "sartan", "olol", "azole", "cillin", "statin", "vir", "mycin", "dipine", "tide", "zepam"]
+
+
+def synthetic_names(count: int, rng: random.Random):
+    """
+    Generate unique pronounceable drug-like names
+    """
+    names = set()
+    while len(names) < count:
+        stem = "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(rng.randint(2, 3)))
+        names.add(stem + rng.choice(SUFFIXES))
+    return sorted(names)
+
+
+def _typo(name: str, rng: random.Random) -> str:
+    position = rng.randrange(1, len(name) - 1)
+    return name[:position] + name[position + 1:]
+
+
+async def bench_batch(batch_size: int, rounds: int, rng: random.Random) -> None:
+    """
+    Compare one batch request against the equivalent sequential requests
+    """
+    import httpx
+    from app.main import app
+    from app.services.medicine_service import MEDICINE_ALIASES, MEDICINE_DATABASE
+
+    vocabulary = list(MEDICINE_DATABASE) + list(MEDICINE_ALIASES)
+    queries = [rng.choice(vocabulary) for _ in range(batch_size)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in ("sequential", "batch"):
+            samples = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                if mode == "batch":
+                    await client.post("/medicine/search/batch", json={"queries": queries, "limit": 5})
+                else:
+                    for query in queries:
+                        await client.get("/medicine/search", params={"q": query, "limit": 5})
+                samples.append((time.perf_counter() - start) * 1000)
+            result = summarize(samples)
+            result.update({"mode": mode, "batch_size": batch_size})
+            print(json.dumps(result))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=0)
+    parser.add_argument("--batch-rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    names = synthetic_names(args.entries, rng)
+    started = time.perf_counter()
+    index = MedicineIndex.build((name, entry_id) for entry_id, name in enumerate(names))
+    build_s = time.perf_counter() - started
+
+    def pick():
+        entry_id = rng.randrange(len(names))
+        return names[entry_id], entry_id
+
+    # Each generator returns (query, expected entry id or None)
+    query_kinds = {
+        "exact": lambda: pick(),
+        "prefix": lambda: (pick()[0][:4], None),
+        "typo": lambda: (lambda name, entry_id: (_typo(name, rng), entry_id))(*pick()),
+        "miss": lambda: ("zzqx" + pick()[0], None),
+    }
+    print(json.dumps({"entries": len(names), "keys": len(index), "build_s": round(build_s, 2)}))
+    for kind, make_query in query_kinds.items():
+        queries = [make_query() for _ in range(args.queries)]
+        samples = []
+        found = 0
+        for query, expected in queries:
+            start = time.perf_counter()
+            results = index.search(query, limit=10)
+            samples.append((time.perf_counter() - start) * 1000)
+            found += expected is not None and expected in results
+        result = summarize(samples)
+        result["query_kind"] = kind
+        if queries[0][1] is not None:
+            result["recall_at_10"] = round(found / len(queries), 3)
+        print(json.dumps(result))
+
+    if args.batch_size:
+        asyncio.run(bench_batch(args.batch_size, args.batch_rounds, rng))
+
+
+if __name__ == "__main__":
+    main()
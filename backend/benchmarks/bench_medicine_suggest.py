@@ -0,0 +1,88 @@
+"""
+Medicine Suggest Benchmark
+Measures autocomplete latency per keystroke and /medicine/suggest throughput
+
+Run from the backend directory:
+    python -m benchmarks.bench_medicine_suggest --entries 100000 --queries 20000
+"""
+from app.services.formulary import Formulary, MedicineRecord
+from app.services.medicine_index import MedicineIndex
+from app.services.medicine_suggest import MedicineSuggester
+from benchmarks.bench_medicine_search import synthetic_names
+from benchmarks.common import summarize
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+def _keystrokes(names, count: int, rng: random.Random):
+    """
+    Simulate typing: every prefix of randomly chosen names
+    """
+    prefixes = []
+    while len(prefixes) < count:
+        name = rng.choice(names)
+        prefixes.extend(name[:length] for length in range(1, len(name) + 1))
+    return prefixes[:count]
+
+
+def bench_service(formulary, index, prefixes, cache_size: int) -> None:
+    suggester = MedicineSuggester(index, formulary, precompute_depth=3, cache_size=cache_size)
+    started = time.perf_counter()
+    suggester.warm()
+    print(json.dumps({"table_build_s": round(time.perf_counter() - started, 2)}))
+
+    for label in ("cold", "warm"):
+        samples = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            suggester.suggest(prefix, limit=8)
+            samples.append((time.perf_counter() - start) * 1000)
+        result = summarize(samples)
+        result["pass"] = label
+        print(json.dumps(result))
+
+
+async def bench_endpoint(prefixes, requests: int) -> None:
+    """
+    Drive the ASGI app in-process (no sockets) to isolate per-request cost
+    """
+    import httpx
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get("/medicine/suggest", params={"prefix": prefixes[0]})
+        etag = response.headers["etag"]
+        for label, headers in (("200", {}), ("304", {"If-None-Match": etag})):
+            started = time.perf_counter()
+            for position in range(requests):
+                prefix = prefixes[0] if headers else prefixes[position % len(prefixes)]
+                await client.get("/medicine/suggest", params={"prefix": prefix}, headers=headers)
+            elapsed = time.perf_counter() - started
+            print(json.dumps({"endpoint_status": label, "requests_per_s": round(requests / elapsed)}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    names = [name.capitalize() for name in synthetic_names(args.entries, rng)]
+    formulary = Formulary([MedicineRecord(name, "", ()) for name in names], source="synthetic")
+    index = MedicineIndex.build(formulary.names())
+    prefixes = _keystrokes(names, args.queries, rng)
+    print(json.dumps({"entries": len(names), "keystrokes": len(prefixes)}))
+
+    bench_service(formulary, index, prefixes, args.cache_size)
+    asyncio.run(bench_endpoint(prefixes, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Metrics Overhead Benchmark
+Measures the per-request cost of MetricsMiddleware and of the individual
+counter/histogram updates
+
+Run from the backend directory:
+    python -m benchmarks.bench_metrics --requests 20000
+
+Requests are driven straight through the ASGI interface (no sockets), so the
+difference between the plain and instrumented apps is the instrumentation itself
+"""
+from fastapi import FastAPI
+from app.core.metrics import Counter, Histogram, MetricsMiddleware
+from app.routers import health
+from typing import List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    """
+    Create an app serving the health router, optionally instrumented
+    """
+    app = FastAPI()
+    app.include_router(health.router)
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def drive(
+    app: FastAPI,
+    requests: int,
+    target: str = "/health",
+    headers: Optional[List[Tuple[bytes, bytes]]] = None,
+) -> float:
+    """
+    Send GET requests through the ASGI interface
+
+    Returns:
+        Mean microseconds per request
+    """
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    path, _, query = target.partition("?")
+
+    def scope() -> dict:
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "root_path": "", "query_string": query.encode(), "headers": [(b"host", b"bench"), *(headers or ())],
+            "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+        }
+
+    for _ in range(200):
+        await app(scope(), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(scope(), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def bench_updates(iterations: int) -> dict:
+    """
+    Time labelled counter increments and histogram observations
+
+    Returns:
+        Mean nanoseconds per update
+    """
+    counter = Counter("bench_total", "bench", ("method", "route", "status"))
+    histogram = Histogram("bench_seconds", "bench", ("method", "route"))
+    started = time.perf_counter()
+    for _ in range(iterations):
+        counter.labels("GET", "/health", "200").inc()
+    counter_ns = (time.perf_counter() - started) / iterations * 1e9
+    started = time.perf_counter()
+    for index in range(iterations):
+        histogram.labels("GET", "/health").observe((index % 1000) / 10000)
+    histogram_ns = (time.perf_counter() - started) / iterations * 1e9
+    return {"counter_inc_ns": round(counter_ns, 1), "histogram_observe_ns": round(histogram_ns, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps(bench_updates(args.requests * 10)))
+
+    apps = {"plain": build_app(False), "instrumented": build_app(True)}
+    results = {mode: [] for mode in apps}
+    # Interleave rounds so drift (CPU frequency, GC) affects both apps alike
+    for _ in range(args.rounds):
+        for mode, app in apps.items():
+            results[mode].append(asyncio.run(drive(app, args.requests)))
+    plain = statistics.median(results["plain"])
+    instrumented = statistics.median(results["instrumented"])
+    print(json.dumps({
+        "requests": args.requests,
+        "plain_us": round(plain, 2),
+        "instrumented_us": round(instrumented, 2),
+        "overhead_us": round(instrumented - plain, 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
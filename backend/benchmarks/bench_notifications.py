@@ -0,0 +1,94 @@
+"""
+Notification Outbox Benchmark
+POST /appointment/request latency with notifications off vs on (slow, flaky
+SMTP stand-in), and how long the outbox takes to drain
+
+Run from the backend directory:
+    python -m benchmarks.bench_notifications --requests 500 --concurrency 20 --smtp-latency-ms 200
+"""
+from benchmarks.common import free_port, serve_app, serve_module, summarize
+from datetime import date, timedelta
+import argparse
+import asyncio
+import httpx
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+
+async def send_requests(base_url: str, requests: int, concurrency: int) -> list:
+    samples = []
+    counter = iter(range(requests))
+    first_day = date.today() + timedelta(days=1)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        for index in counter:
+            body = {
+                "name": f"Patient {index}",
+                "email": f"patient{index}@example.com",
+                "phone": "+1-555-000-0000",
+                "category": "General Physician",
+                "preferred_date": (first_day + timedelta(days=index % 60)).isoformat(),
+            }
+            start = time.perf_counter()
+            response = await client.post(f"{base_url}/appointment/request", json=body)
+            response.raise_for_status()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    async with httpx.AsyncClient(timeout=60) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return samples
+
+
+def outbox_counts(path: str) -> dict:
+    with sqlite3.connect(path) as conn:
+        try:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        except sqlite3.OperationalError:
+            return {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--smtp-latency-ms", type=float, default=200)
+    parser.add_argument("--smtp-fail-rate", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    smtp_port = free_port()
+    smtp_args = ("--latency-ms", str(args.smtp_latency_ms), "--fail-rate", str(args.smtp_fail_rate))
+    with tempfile.TemporaryDirectory() as directory, serve_module("benchmarks.mock_smtp", smtp_port, *smtp_args):
+        for mode in ("disabled", "outbox"):
+            path = os.path.join(directory, f"{mode}.sqlite3")
+            env = {"APPOINTMENT_SQLITE_PATH": path}
+            if mode == "outbox":
+                env.update({
+                    "NOTIFICATION_SMTP_HOST": "127.0.0.1",
+                    "NOTIFICATION_SMTP_PORT": str(smtp_port),
+                    "NOTIFICATION_WORKERS": str(args.workers),
+                    "NOTIFICATION_POLL_INTERVAL": "0.1",
+                    "NOTIFICATION_BACKOFF_BASE": "0.2",
+                })
+            with serve_app(free_port(), env) as base_url:
+                started = time.perf_counter()
+                samples = asyncio.run(send_requests(base_url, args.requests, args.concurrency))
+                result = summarize(samples)
+                result["mode"] = mode
+                if mode == "outbox":
+                    deadline = time.monotonic() + 300
+                    while time.monotonic() < deadline:
+                        counts = outbox_counts(path)
+                        if counts.get("sent", 0) + counts.get("failed", 0) >= args.requests:
+                            break
+                        time.sleep(0.2)
+                    result["drain_s"] = round(time.perf_counter() - started, 2)
+                    result["outbox"] = counts
+                print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
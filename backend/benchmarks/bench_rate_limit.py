@@ -0,0 +1,120 @@
+"""
+Rate Limit Benchmark
+Per-request cost of RateLimitMiddleware with the in-process and the SQLite
+store, and memory per tracked client of the in-process store
+
+Run from the backend directory:
+    python -m benchmarks.bench_rate_limit --requests 50000 --clients 100000
+
+Requests go through the middleware in-process to a trivial ASGI app, with a
+policy high enough that every request is allowed, so the difference to the
+bare app is the limiter itself
+"""
+from app.core.rate_limit import (
+    InMemoryRateLimitStore,
+    RateLimitMiddleware,
+    RateLimitPolicy,
+    RateLimiter,
+    SQLiteRateLimitStore,
+)
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+
+async def bare_app(scope: dict, receive, send) -> None:
+    """
+    Minimal ASGI app answering every request with an empty JSON object
+    """
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def drive(app, requests: int) -> float:
+    """
+    Send requests from one client through an ASGI app
+
+    Returns:
+        Mean microseconds per request
+    """
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    def scope() -> dict:
+        return {"type": "http", "method": "POST", "path": "/chat", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1)}
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(scope(), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def memory_per_client(clients: int) -> dict:
+    """
+    Track distinct clients in the in-process store and measure its size and check cost
+    """
+    policy = RateLimitPolicy("/chat", 20, 5)
+    addresses = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)]
+
+    limiter = RateLimiter(InMemoryRateLimitStore(max_keys=clients), [policy])
+    started = time.perf_counter()
+    for address in addresses:
+        limiter.check(policy, address)
+    elapsed = time.perf_counter() - started
+
+    # Measured separately: tracing allocations slows the loop down
+    limiter = RateLimiter(InMemoryRateLimitStore(max_keys=clients), [policy])
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for address in addresses:
+        limiter.check(policy, address)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return {
+        "clients": clients,
+        "bytes_per_client": round(used / clients, 1),
+        "check_us": round(elapsed / clients * 1e6, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--clients", type=int, default=100000)
+    args = parser.parse_args()
+
+    policy = [RateLimitPolicy("/chat", 1e12, 1000)]
+    path = os.path.join(tempfile.mkdtemp(), "rate_limits.sqlite3")
+    modes = {
+        "plain": bare_app,
+        "memory": RateLimitMiddleware(bare_app, RateLimiter(InMemoryRateLimitStore(max_keys=100000), policy)),
+        "sqlite": RateLimitMiddleware(bare_app, RateLimiter(SQLiteRateLimitStore(path), policy)),
+    }
+    results = {mode: [] for mode in modes}
+    for _ in range(args.rounds):
+        for mode, app in modes.items():
+            results[mode].append(asyncio.run(drive(app, args.requests)))
+
+    plain = statistics.median(results["plain"])
+    for mode, samples in results.items():
+        median = statistics.median(samples)
+        print(json.dumps({
+            "mode": mode,
+            "requests": args.requests,
+            "per_request_us": round(median, 2),
+            "overhead_us": round(median - plain, 2),
+        }))
+    print(json.dumps(memory_per_client(args.clients)))
+
+
+if __name__ == "__main__":
+    main()
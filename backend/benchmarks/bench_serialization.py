@@ -0,0 +1,114 @@
+"""
+Serialization Benchmark
+Per-request CPU time of GET /medicine/search with the previous response path
+(pydantic models re-validated through response_model, stdlib json) vs the
+pre-serialized path (cached entry JSON, precomputed disclaimer, orjson)
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization --entries 20000 --limit 10
+
+Requests are driven through the ASGI interface in-process, so the measured
+time is application CPU only
+"""
+from fastapi import APIRouter, FastAPI, Query
+from app.routers import medicine
+from app.schemas.medicine import MedicineSearchResponse
+from app.services.formulary import Formulary
+from app.services.medicine_service import MedicineService
+from app.utils.disclaimers import get_medicine_disclaimer
+from app.utils.serialization import ORJSON_AVAILABLE
+from benchmarks.bench_medicine_search import synthetic_names
+from benchmarks.bench_metrics import drive
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+PRECAUTIONS = "Do not exceed the recommended dose|Consult a pharmacist if pregnant or breastfeeding|Keep out of reach of children|Stop use and ask a doctor if symptoms persist"
+
+
+def build_service(entries: int) -> MedicineService:
+    """
+    Build a medicine service over a synthetic formulary
+    """
+    names = synthetic_names(entries, random.Random(5))
+    rows = (
+        {
+            "name": name,
+            "usage": f"{name.title()} is used for the short-term relief of common symptoms. " * 3,
+            "precautions": PRECAUTIONS,
+        }
+        for name in names
+    )
+    return MedicineService(Formulary.from_rows(rows, source="synthetic"))
+
+
+def legacy_app(service: MedicineService) -> FastAPI:
+    """
+    App serving /medicine/search the way it was served before pre-serialization
+    """
+    router = APIRouter(prefix="/medicine")
+
+    @router.get("/search", response_model=MedicineSearchResponse)
+    async def search_medicine(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(10, ge=1, le=50)):
+        return MedicineSearchResponse(
+            results=service.search_medicines(q, limit),
+            disclaimer=get_medicine_disclaimer(),
+            query=q,
+        )
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def current_app() -> FastAPI:
+    """
+    App serving the current medicine router
+    """
+    app = FastAPI()
+    app.include_router(medicine.router)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    service = build_service(args.entries)
+    # The router resolves the module-level service at call time
+    medicine.medicine_service = service
+    # Short prefixes so every query returns a full page of results
+    prefixes = sorted({name[:2] for name, _ in service.formulary.names()})
+    target = f"/medicine/search?q={prefixes[0]}&limit={args.limit}"
+    print(json.dumps({"orjson": ORJSON_AVAILABLE, "results_per_request": len(service.search_medicines(prefixes[0], args.limit))}))
+
+    apps = {"pydantic": legacy_app(service), "preserialized": current_app()}
+    wall = {mode: [] for mode in apps}
+    cpu = {mode: [] for mode in apps}
+    for _ in range(args.rounds):
+        for mode, app in apps.items():
+            started = time.process_time()
+            wall[mode].append(asyncio.run(drive(app, args.requests, target)))
+            cpu[mode].append((time.process_time() - started) / (args.requests + 200) * 1e6)
+
+    baseline = statistics.median(cpu["pydantic"])
+    for mode in apps:
+        per_request = statistics.median(cpu[mode])
+        print(json.dumps({
+            "mode": mode,
+            "limit": args.limit,
+            "cpu_us_per_request": round(per_request, 1),
+            "wall_us_per_request": round(statistics.median(wall[mode]), 1),
+            "cpu_saved_pct": round((1 - per_request / baseline) * 100, 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
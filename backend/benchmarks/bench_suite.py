@@ -0,0 +1,279 @@
+"""
+API Benchmark Suite
+Throughput and latency percentiles for /health, /medicine/search,
+/appointment/request and /chat (against a local mock LLM), with results saved
+as JSON and compared against a stored baseline
+
+Run from the backend directory:
+    # In-process ASGI client (no sockets: measures the application itself)
+    python -m benchmarks.bench_suite --mode asgi --output results.json
+
+    # App under uvicorn in a separate process, driven over HTTP
+    python -m benchmarks.bench_suite --mode http --concurrency 32
+
+    # Record a baseline, then flag regressions against it (exit code 1)
+    python -m benchmarks.bench_suite --output benchmarks/baseline.json
+    python -m benchmarks.bench_suite --baseline benchmarks/baseline.json --tolerance 0.2
+
+Each scenario sends --requests requests from --concurrency closed-loop clients
+after --warmup untimed requests. Compare results only between runs on the same
+machine with the same mode and options
+"""
+from benchmarks.common import free_port, serve_app, serve_module, summarize
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import httpx
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+SCENARIOS = ("health", "medicine_search", "appointment_request", "chat")
+
+MEDICINE_QUERIES = ("paracetamol", "ibuprofen", "aspirin", "amoxicilin", "tylenol", "metf", "cetirizine", "zzqx")
+CHAT_MESSAGES = (
+    "I have a headache",
+    "What can help with a sore throat?",
+    "I have been feeling tired lately",
+    "How much water should I drink a day?",
+    "I have a mild fever and a cough",
+)
+CATEGORIES = ("General Physician", "Cardiologist", "Dermatologist", "Pediatrician")
+
+# Request builder: request index -> (method, path, JSON body)
+RequestBuilder = Callable[[int], Tuple[str, str, Optional[dict]]]
+
+
+def build_requests() -> Dict[str, RequestBuilder]:
+    """
+    Get the request generator of every scenario
+    Requests vary deterministically with their index so runs are reproducible
+    """
+    first_day = date.today() + timedelta(days=1)
+
+    def appointment(index: int) -> Tuple[str, str, Optional[dict]]:
+        return "POST", "/appointment/request", {
+            "name": f"Patient {index}",
+            "email": f"patient{index}@example.com",
+            "phone": "+1-555-000-0000",
+            "category": CATEGORIES[index % len(CATEGORIES)],
+            "preferred_date": (first_day + timedelta(days=index % 60)).isoformat(),
+        }
+
+    return {
+        "health": lambda index: ("GET", "/health", None),
+        "medicine_search": lambda index: (
+            "GET", f"/medicine/search?q={MEDICINE_QUERIES[index % len(MEDICINE_QUERIES)]}&limit=10", None
+        ),
+        "appointment_request": appointment,
+        # Numbered so every chat reaches the upstream instead of the response cache
+        "chat": lambda index: ("POST", "/chat", {"message": f"{CHAT_MESSAGES[index % len(CHAT_MESSAGES)]} ({index})"}),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    build: RequestBuilder,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> Dict[str, Any]:
+    """
+    Drive one scenario with closed-loop clients
+
+    Returns:
+        Throughput, error count and latency percentiles
+    """
+    async def send(index: int) -> bool:
+        method, path, body = build(index)
+        response = await client.request(method, path, json=body)
+        return response.status_code < 400
+
+    for index in range(warmup):
+        await send(index)
+
+    samples: List[float] = []
+    errors = 0
+    counter = iter(range(warmup, warmup + requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in counter:
+            start = time.perf_counter()
+            try:
+                ok = await send(index)
+            except httpx.HTTPError:
+                ok = False
+            samples.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        **summarize(samples),
+        "errors": errors,
+        "mean_ms": round(sum(samples) / len(samples), 3) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 1),
+    }
+
+
+async def run_suite(args: argparse.Namespace, base_url: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the selected scenarios against an in-process app (base_url None) or a server
+    """
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if base_url is None:
+        # Imported only now so the environment configured in main() applies
+        from app.main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+        await app.router.startup()
+    else:
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+
+    builders = build_requests()
+    results = {}
+    try:
+        for name in args.scenarios:
+            result = await run_scenario(client, builders[name], args.requests, args.concurrency, args.warmup)
+            results[name] = result
+            print(json.dumps({"scenario": name, **result}), flush=True)
+    finally:
+        await client.aclose()
+        if base_url is None:
+            await app.router.shutdown()
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Compare a run against a baseline run
+
+    Args:
+        results: This run (as written to --output)
+        baseline: Earlier run to compare with
+        tolerance: Allowed relative change, e.g. 0.2 for 20%
+
+    Returns:
+        Per-scenario comparisons; "regression" is set when throughput fell or
+        p50/p99 latency rose by more than the tolerance
+    """
+    comparisons = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        throughput = current["throughput_rps"] / previous["throughput_rps"] - 1 if previous["throughput_rps"] else 0.0
+        p50 = current["p50_ms"] / previous["p50_ms"] - 1 if previous["p50_ms"] else 0.0
+        p99 = current["p99_ms"] / previous["p99_ms"] - 1 if previous["p99_ms"] else 0.0
+        reasons = []
+        if throughput < -tolerance:
+            reasons.append(f"throughput {throughput:+.0%}")
+        if p50 > tolerance:
+            reasons.append(f"p50 {p50:+.0%}")
+        if p99 > tolerance:
+            reasons.append(f"p99 {p99:+.0%}")
+        if current["errors"] > previous.get("errors", 0):
+            reasons.append(f"errors {previous.get('errors', 0)} -> {current['errors']}")
+        comparisons.append({
+            "scenario": name,
+            "throughput_change": round(throughput, 3),
+            "p50_change": round(p50, 3),
+            "p99_change": round(p99, 3),
+            "regression": bool(reasons),
+            "reasons": reasons,
+        })
+    return comparisons
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=("asgi", "http"), default="asgi")
+    parser.add_argument("--url", help="Benchmark an already running server instead of starting one (http mode)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000, help="Timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative change before flagging")
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        directory = stack.enter_context(tempfile.TemporaryDirectory())
+        env = {
+            "APPOINTMENT_SQLITE_PATH": os.path.join(directory, "appointments.sqlite3"),
+            # Measure the application, not the admission or rate limits or the response cache
+            "LLM_REQUESTS_PER_SECOND": "0",
+            "RESPONSE_CACHE_ENABLED": "false",
+            "RATE_LIMIT_ENABLED": "false",
+        }
+        if "chat" in args.scenarios and args.url is None:
+            llm_port = free_port()
+            stack.enter_context(serve_module(
+                "benchmarks.mock_llm", llm_port, "--latency-ms", str(args.llm_latency_ms), "--token-delay-ms", "0"
+            ))
+            env.update({"OPENAI_API_KEY": "bench", "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1"})
+
+        if args.mode == "asgi":
+            os.environ.update(env)
+            base_url = None
+        elif args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            base_url = stack.enter_context(serve_app(free_port(), env))
+        scenarios = asyncio.run(run_suite(args, base_url))
+
+    results = {
+        "meta": {
+            "mode": args.mode,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "llm_latency_ms": args.llm_latency_ms,
+            "git_commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "scenarios": scenarios,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+            handle.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        for key in ("mode", "concurrency", "requests"):
+            if baseline.get("meta", {}).get(key) != results["meta"][key]:
+                print(json.dumps({"warning": f"baseline {key} differs", "baseline": baseline["meta"].get(key)}))
+        comparisons = compare(results, baseline, args.tolerance)
+        for comparison in comparisons:
+            print(json.dumps(comparison))
+        if any(comparison["regression"] for comparison in comparisons):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
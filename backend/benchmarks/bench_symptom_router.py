@@ -0,0 +1,84 @@
+"""
+Symptom Router Benchmark
+Compares the compiled keyword router with the previous substring scan chain
+
+Run from the backend directory:
+    python -m benchmarks.bench_symptom_router --messages 100000 --extra-topics 500
+"""
+from app.services.symptom_router import (
+    DEFAULT_FALLBACK_RESPONSE,
+    FALLBACK_TOPICS,
+    SymptomRouter,
+    SymptomTopic,
+)
+import argparse
+import json
+import random
+import time
+
+WORDS = (
+    "i have been feeling a bit off since yesterday my mother says the pain in my "
+    "back and head is worse at night with some fever cough and tired legs after "
+    "walking ahead to the shop where i got a flu shot last week"
+).split()
+
+
+def _legacy_route(topics, message: str) -> str:
+    """
+    Previous behaviour: per-topic any(substring in message) scans
+    """
+    message_lower = message.lower()
+    for topic in topics:
+        if any(word in message_lower for word in topic.keywords):
+            return topic.response
+    return DEFAULT_FALLBACK_RESPONSE
+
+
+def _synthetic_topics(count: int, rng: random.Random):
+    """
+    Build extra topics with random made-up keywords (never present in messages)
+    """
+    alphabet = "bcdfghjklmnpqrstvwxz"
+    return [
+        SymptomTopic(
+            name=f"topic-{index}",
+            keywords={"".join(rng.choice(alphabet) for _ in range(7)): 2 for _ in range(6)},
+            priority=0,
+            response=f"Synthetic response {index}",
+        )
+        for index in range(count)
+    ]
+
+
+def _time(route, messages) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        route(message)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--extra-topics", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    messages = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))) for _ in range(args.messages)]
+
+    for extra in (0, args.extra_topics):
+        topics = FALLBACK_TOPICS + _synthetic_topics(extra, rng)
+        router = SymptomRouter(topics, DEFAULT_FALLBACK_RESPONSE)
+        legacy_s = _time(lambda message: _legacy_route(topics, message), messages)
+        compiled_s = _time(router.route, messages)
+        print(json.dumps({
+            "messages": len(messages),
+            "topics": len(topics),
+            "legacy_us_per_message": round(legacy_s / len(messages) * 1e6, 2),
+            "compiled_us_per_message": round(compiled_s / len(messages) * 1e6, 2),
+            "speedup": round(legacy_s / compiled_s, 2),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Tracing Overhead Benchmark
+Measures the per-request cost of TracingMiddleware with tracing off (request
+ids only), with every request traced to a JSON lines file, and with 10% sampling
+
+Run from the backend directory:
+    python -m benchmarks.bench_tracing --requests 20000
+"""
+from fastapi import FastAPI
+from app.core.tracing import JsonlSpanExporter, TracingMiddleware, tracer
+from app.routers import medicine
+from benchmarks.bench_metrics import drive
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    """
+    Create an app serving the medicine router, optionally with tracing middleware
+    """
+    app = FastAPI()
+    app.include_router(medicine.router)
+    if instrumented:
+        app.add_middleware(TracingMiddleware)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+    modes = {
+        "plain": (False, None, 1.0),
+        "request_id_only": (True, None, 1.0),
+        "traced_10pct": (True, JsonlSpanExporter(path), 0.1),
+        "traced_all": (True, JsonlSpanExporter(path), 1.0),
+    }
+    results = {mode: [] for mode in modes}
+    for _ in range(args.rounds):
+        for mode, (instrumented, exporter, ratio) in modes.items():
+            # Reconfigure the shared tracer in place (services hold a reference to it)
+            tracer.exporter = exporter
+            tracer.sample_ratio = ratio
+            tracer.start()
+            results[mode].append(asyncio.run(drive(build_app(instrumented), args.requests, "/medicine/search?q=aspirin")))
+            tracer.stop()
+
+    plain = statistics.median(results["plain"])
+    for mode, samples in results.items():
+        median = statistics.median(samples)
+        print(json.dumps({
+            "mode": mode,
+            "requests": args.requests,
+            "per_request_us": round(median, 2),
+            "overhead_us": round(median - plain, 2),
+        }))
+    print(json.dumps({"spans_written": sum(1 for _ in open(path))}))
+
+
+if __name__ == "__main__":
+    main()
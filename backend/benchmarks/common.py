@@ -0,0 +1,156 @@
+"""
+Benchmark Helpers
+Shared utilities for running local servers and summarising latencies
+"""
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+
+def free_port() -> int:
+    """
+    Find a free local TCP port
+
+    Returns:
+        Port number
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve_in_thread(app, port: int, **uvicorn_kwargs) -> Iterator[str]:
+    """
+    Run an ASGI app with uvicorn in a background thread
+
+    Args:
+        app: ASGI application
+        port: Port to listen on
+        **uvicorn_kwargs: Extra uvicorn.Config options
+
+    Yields:
+        Base URL of the running server
+    """
+    import uvicorn
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", **uvicorn_kwargs)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+@contextmanager
+def serve_process(command: List[str], port: int, env: Optional[Dict[str, str]] = None) -> Iterator[str]:
+    """
+    Run a server command in a separate process and wait until it accepts connections
+    Keeps server work off the load generator's interpreter (no shared GIL)
+
+    Args:
+        command: Command line to execute
+        port: Port the server listens on
+        env: Extra environment variables for the server process
+
+    Yields:
+        Base URL of the running server
+    """
+    process = subprocess.Popen(command, env={**os.environ, **(env or {})})
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                    break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError(f"{' '.join(command)} did not start on port {port}")
+                time.sleep(0.05)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def serve_module(module: str, port: int, *args: str, env: Optional[Dict[str, str]] = None):
+    """
+    Run a benchmark server module (``python -m module --port N``) in a separate process
+
+    Args:
+        module: Module path that accepts a --port option
+        port: Port to listen on
+        *args: Extra command line arguments
+        env: Extra environment variables
+
+    Returns:
+        Context manager yielding the server base URL
+    """
+    return serve_process([sys.executable, "-m", module, "--port", str(port), *args], port, env)
+
+
+def serve_app(port: int, env: Optional[Dict[str, str]] = None):
+    """
+    Run the API (app.main:app) under uvicorn in a separate process
+
+    Args:
+        port: Port to listen on
+        env: Extra environment variables (e.g. settings overrides)
+
+    Returns:
+        Context manager yielding the API base URL
+    """
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--port", str(port), "--log-level", "warning", "--no-access-log",
+    ]
+    # Every benchmark client shares one address, so per-client limits stay off
+    # unless the caller turns them on
+    return serve_process(command, port, {"RATE_LIMIT_ENABLED": "false", **(env or {})})
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of samples
+
+    Args:
+        samples: Measured values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Percentile value (0.0 for an empty list)
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """
+    Summarise latency samples in milliseconds
+
+    Args:
+        samples_ms: Latencies in milliseconds
+
+    Returns:
+        Dictionary with count, p50, p95, p99 and max
+    """
+    return {
+        "count": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "max_ms": round(max(samples_ms), 3) if samples_ms else 0.0,
+    }
@@ -0,0 +1,140 @@
+"""
+Mock LLM Upstream
+Local OpenAI-compatible stand-in for benchmarks (no API key or network needed)
+
+Run standalone:
+    python -m benchmarks.mock_llm --port 9100 --latency-ms 50
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import argparse
+import asyncio
+import json
+import os
+import random
+
+# Simulated upstream behaviour (overridable via environment variables)
+LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", "50"))
+TOKEN_DELAY_MS = float(os.getenv("MOCK_LLM_TOKEN_DELAY_MS", "10"))
+# Concurrent requests served before answering 429 like a provider rate limit (0 = unlimited)
+MAX_CONCURRENCY = int(os.getenv("MOCK_LLM_MAX_CONCURRENCY", "0"))
+# Fraction of requests delayed by SLOW_MS extra (tail latency) and failed with 500
+SLOW_RATE = float(os.getenv("MOCK_LLM_SLOW_RATE", "0"))
+SLOW_MS = float(os.getenv("MOCK_LLM_SLOW_MS", "1000"))
+FAIL_RATE = float(os.getenv("MOCK_LLM_FAIL_RATE", "0"))
+REPLY = (
+    "Headaches can have many causes, including stress, dehydration and lack of sleep. "
+    "Resting, drinking water and managing stress may help. If headaches are frequent "
+    "or severe, please consult a healthcare professional."
+)
+
+app = FastAPI(title="Mock LLM Upstream")
+
+# Request counters reported by GET /stats
+stats = {"requests": 0, "rate_limited": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+def _chunk(content: str, model: str) -> str:
+    """
+    Format one streaming delta as an OpenAI-style SSE line
+    """
+    payload = {
+        "object": "chat.completion.chunk",
+        "model": model,
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """
+    OpenAI-compatible chat completions endpoint
+    Sleeps for the configured latency, then returns a canned reply
+    Non-streamed replies also wait for the whole simulated generation time
+    """
+    body = await request.json()
+    model = body.get("model", "mock")
+    stats["requests"] += 1
+    if MAX_CONCURRENCY and stats["in_flight"] >= MAX_CONCURRENCY:
+        stats["rate_limited"] += 1
+        return JSONResponse({"error": {"message": "Rate limit reached"}}, status_code=429)
+    if FAIL_RATE and random.random() < FAIL_RATE:
+        stats["failed"] += 1
+        return JSONResponse({"error": {"message": "Internal error"}}, status_code=500)
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    slow = SLOW_MS if SLOW_RATE and random.random() < SLOW_RATE else 0
+    try:
+        await asyncio.sleep((LATENCY_MS + slow) / 1000)
+    except asyncio.CancelledError:
+        stats["in_flight"] -= 1
+        raise
+
+    if body.get("stream"):
+        async def stream():
+            try:
+                for word in REPLY.split(" "):
+                    yield _chunk(word + " ", model)
+                    await asyncio.sleep(TOKEN_DELAY_MS / 1000)
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    try:
+        await asyncio.sleep(len(REPLY.split(" ")) * TOKEN_DELAY_MS / 1000)
+    finally:
+        stats["in_flight"] -= 1
+    return JSONResponse({
+        "object": "chat.completion",
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 60, "completion_tokens": 40, "total_tokens": 100},
+    })
+
+
+@app.post("/control")
+async def control(request: Request):
+    """
+    Change simulated behaviour at runtime (e.g. start or end an outage)
+    Accepts any of latency_ms, slow_rate, slow_ms and fail_rate
+    """
+    global LATENCY_MS, SLOW_RATE, SLOW_MS, FAIL_RATE
+    body = await request.json()
+    LATENCY_MS = float(body.get("latency_ms", LATENCY_MS))
+    SLOW_RATE = float(body.get("slow_rate", SLOW_RATE))
+    SLOW_MS = float(body.get("slow_ms", SLOW_MS))
+    FAIL_RATE = float(body.get("fail_rate", FAIL_RATE))
+    return {"latency_ms": LATENCY_MS, "slow_rate": SLOW_RATE, "slow_ms": SLOW_MS, "fail_rate": FAIL_RATE}
+
+
+@app.get("/stats")
+async def get_stats():
+    """
+    Request counters since startup
+    """
+    return stats
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the mock LLM upstream")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    parser.add_argument("--token-delay-ms", type=float, default=TOKEN_DELAY_MS)
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--slow-rate", type=float, default=SLOW_RATE)
+    parser.add_argument("--slow-ms", type=float, default=SLOW_MS)
+    parser.add_argument("--fail-rate", type=float, default=FAIL_RATE)
+    args = parser.parse_args()
+    LATENCY_MS = args.latency_ms
+    TOKEN_DELAY_MS = args.token_delay_ms
+    MAX_CONCURRENCY = args.max_concurrency
+    SLOW_RATE = args.slow_rate
+    SLOW_MS = args.slow_ms
+    FAIL_RATE = args.fail_rate
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", backlog=4096)
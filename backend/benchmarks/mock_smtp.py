@@ -0,0 +1,72 @@
+"""
+Mock SMTP Server
+Local SMTP stand-in for notification benchmarks: accepts and discards mail
+
+Run standalone:
+    python -m benchmarks.mock_smtp --port 2525 --latency-ms 200 --fail-rate 0.1
+"""
+import argparse
+import asyncio
+import random
+
+# Simulated server behaviour
+LATENCY_MS = 200.0
+FAIL_RATE = 0.0
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """
+    Speak just enough SMTP for smtplib: greet, accept one or more messages,
+    wait LATENCY_MS per message and reject FAIL_RATE of them with a 451
+    """
+    writer.write(b"220 mock-smtp ready\r\n")
+    await writer.drain()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                writer.write(b"250 mock-smtp\r\n")
+            elif command in (b"MAIL", b"RCPT", b"RSET", b"NOOP"):
+                writer.write(b"250 OK\r\n")
+            elif command == b"DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                while (await reader.readline()) not in (b".\r\n", b""):
+                    pass
+                await asyncio.sleep(LATENCY_MS / 1000)
+                if random.random() < FAIL_RATE:
+                    writer.write(b"451 Temporary failure\r\n")
+                else:
+                    writer.write(b"250 Queued\r\n")
+            elif command == b"QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"502 Command not implemented\r\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int) -> None:
+    server = await asyncio.start_server(handle, host, port, backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the mock SMTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    parser.add_argument("--fail-rate", type=float, default=FAIL_RATE)
+    args = parser.parse_args()
+    LATENCY_MS = args.latency_ms
+    FAIL_RATE = args.fail_rate
+    asyncio.run(serve(args.host, args.port))
@@ -0,0 +1,21 @@
+"""
+Test configuration
+Makes the app package importable and keeps every SQLite file the app opens at
+import time in a temporary directory instead of the working directory
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+_DATA_DIR = tempfile.mkdtemp(prefix="medicare-tests-")
+for _name, _file in (
+    ("APPOINTMENT_SQLITE_PATH", "appointments.sqlite3"),
+    ("RESPONSE_CACHE_SQLITE_PATH", "response_cache.sqlite3"),
+    ("CONVERSATION_SQLITE_PATH", "conversations.sqlite3"),
+    ("RATE_LIMIT_SQLITE_PATH", "rate_limits.sqlite3"),
+):
+    os.environ.setdefault(_name, os.path.join(_DATA_DIR, _file))
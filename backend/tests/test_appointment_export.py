@@ -0,0 +1,38 @@
+"""
+Appointment export: the category filter matches however the category was typed
+"""
+import asyncio
+from datetime import date, timedelta
+
+from app.schemas.appointment import AppointmentRequest
+from app.services.appointment_bulk import import_appointments
+from app.services.appointment_service import AppointmentService
+from app.services.appointment_store import AppointmentStore
+
+
+def _request(category: str, index: int) -> dict:
+    return {
+        "name": f"Patient {index}",
+        "email": f"patient{index}@example.com",
+        "phone": "+1-555-000-0000",
+        "category": category,
+        "preferred_date": (date.today() + timedelta(days=7)).isoformat(),
+    }
+
+
+def test_export_category_filter_matches_any_spelling(tmp_path):
+    service = AppointmentService(store=AppointmentStore(str(tmp_path / "appointments.sqlite3"), write_behind=False))
+    try:
+        result = asyncio.run(service.process_appointment_request(AppointmentRequest(**_request("Cardiologist ", 1))))
+        assert result["valid"]
+        rows = [(2, _request("cardiologist", 2)), (3, _request("Dermatologist", 3))]
+        summary = list(import_appointments(service, rows))[-1]["summary"]
+        assert summary["imported"] == 2
+
+        for typed in ("cardiologist", "CARDIOLOGIST ", "Cardiologist"):
+            category = service.canonical_category(typed)
+            records = list(service.store.iter_records(category=category))
+            assert sorted(record.name for record in records) == ["Patient 1", "Patient 2"]
+            assert {record.category for record in records} == {"Cardiologist"}
+    finally:
+        service.close()
@@ -0,0 +1,104 @@
+"""
+Appointment store: failed commits give their slots back, a slot is never
+booked twice across processes, and write errors never stop the writer
+"""
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from app.schemas.appointment import AppointmentRequest
+from app.services.appointment_service import AppointmentService
+from app.services.appointment_store import AppointmentStore, AppointmentStoreError
+
+
+def _next_monday() -> date:
+    today = date.today()
+    return today + timedelta(days=7 - today.weekday())
+
+
+def _request(day: date) -> AppointmentRequest:
+    return AppointmentRequest(
+        name="Jane Doe",
+        email="jane@example.com",
+        phone="+1-555-123-4567",
+        category="Dermatologist",
+        preferred_date=day,
+        preferred_time="09:00",
+    )
+
+
+def test_failed_reserved_commit_releases_slot(tmp_path, monkeypatch):
+    day = _next_monday()
+    service = AppointmentService(store=AppointmentStore(str(tmp_path / "appointments.sqlite3")))
+    try:
+        # Reserved records are committed before add() returns
+        monkeypatch.setattr(service.store, "write_many", lambda records: None)
+        with pytest.raises(AppointmentStoreError):
+            asyncio.run(service.process_appointment_request(_request(day)))
+        assert "09:00" in service.availability.free_times("Dermatologist", day)
+    finally:
+        service.close()
+
+
+def test_dropped_batch_does_not_stop_writer(tmp_path):
+    day = _next_monday()
+    service = AppointmentService(store=AppointmentStore(str(tmp_path / "appointments.sqlite3")))
+    try:
+        # Outside working hours: queued without a reservation
+        request = _request(day).model_copy(update={"preferred_time": "22:00"})
+        record, error = service.prepare_record(request)
+        assert error is None and record.status != "reserved"
+
+        # NOT NULL violation: every commit attempt fails
+        record.name = None
+        asyncio.run(service.store.add(record))
+        assert service.store.flush(timeout=10)
+        assert service.store.records_lost == 1
+
+        # The writer survived and still commits
+        result = asyncio.run(service.process_appointment_request(request))
+        assert result["valid"]
+        assert service.store.flush(timeout=10)
+        assert service.store.records_committed == 1
+    finally:
+        service.close()
+
+
+def test_slot_booked_by_another_process_is_not_double_booked(tmp_path):
+    day = _next_monday()
+    path = str(tmp_path / "appointments.sqlite3")
+    # Two services on one file stand in for two workers
+    first = AppointmentService(store=AppointmentStore(path))
+    second = AppointmentService(store=AppointmentStore(path))
+    try:
+        second.availability  # loaded before the first booking, like a running worker
+        assert asyncio.run(first.process_appointment_request(_request(day)))["valid"]
+
+        result = asyncio.run(second.process_appointment_request(_request(day)))
+        assert not result["valid"]
+        assert "not available" in result["message"]
+        assert "09:00" not in second.availability.free_times("Dermatologist", day)
+
+        reserved = [record for record in first.store.iter_records() if record.status == "reserved"]
+        assert len(reserved) == 1
+    finally:
+        first.close()
+        second.close()
+
+
+def test_outbox_builder_error_does_not_stop_writer(tmp_path):
+    def broken_builder(record):
+        raise ValueError("template missing")
+
+    store = AppointmentStore(str(tmp_path / "appointments.sqlite3"), outbox_builder=broken_builder)
+    service = AppointmentService(store=store)
+    try:
+        for offset in (0, 7):
+            result = asyncio.run(service.process_appointment_request(_request(_next_monday() + timedelta(days=offset))))
+            assert result["valid"]
+            assert store.flush(timeout=10)
+        assert store.records_committed == 2
+        assert store.records_lost == 0
+    finally:
+        service.close()
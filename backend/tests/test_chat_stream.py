@@ -0,0 +1,97 @@
+"""
+Streaming chat: an upstream failure after partial output must surface as an
+error, not as a complete answer
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.dependencies import get_ai_service, get_conversation_memory
+from app.main import app
+from app.services import ai_service as ai_service_module
+from app.services.ai_service import AIService, StreamInterrupted
+from app.services.conversation_store import issue_conversation_id
+
+
+class _BrokenStream(httpx.AsyncByteStream):
+    """
+    SSE body that sends one delta and then drops the connection
+    """
+
+    async def __aiter__(self):
+        event = {"choices": [{"delta": {"content": "Rest and "}}]}
+        yield f"data: {json.dumps(event)}\n\n".encode()
+        raise httpx.ReadError("connection reset")
+
+
+def _broken_upstream(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=_BrokenStream())
+
+
+def test_stream_response_raises_after_partial_output(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "OPENAI_BASE_URL", "http://llm.test/v1")
+    monkeypatch.setattr(settings, "LLM_PROVIDERS", [])
+    service = AIService()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_broken_upstream))
+    monkeypatch.setattr(ai_service_module, "get_http_client", lambda: client)
+
+    async def consume():
+        deltas = []
+        with pytest.raises(StreamInterrupted):
+            async for delta in service.stream_response("I have a headache"):
+                deltas.append(delta)
+        await client.aclose()
+        return deltas
+
+    assert asyncio.run(consume()) == ["Rest and "]
+
+
+class _InterruptedService:
+    """
+    AI service stand-in whose stream fails after one delta
+    """
+
+    async def stream_response(self, message, history=None):
+        yield "Rest and "
+        raise StreamInterrupted("openai", httpx.ReadError("connection reset"))
+
+
+def _events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_chat_stream_sends_error_and_skips_memory():
+    conversation_id = issue_conversation_id()
+    app.dependency_overrides[get_ai_service] = lambda: _InterruptedService()
+    try:
+        with TestClient(app) as client:
+            response = client.post(
+                "/chat/stream", json={"message": "I have a headache", "conversation_id": conversation_id}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    events = _events(response.text)
+    assert [name for name, _ in events] == ["delta", "error"]
+    assert get_conversation_memory().build_context(conversation_id) == []
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+def test_chat_rejects_ids_not_issued_by_server(path):
+    app.dependency_overrides[get_ai_service] = lambda: _InterruptedService()
+    try:
+        with TestClient(app) as client:
+            response = client.post(path, json={"message": "I have a headache", "conversation_id": "interrupted-1"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 400
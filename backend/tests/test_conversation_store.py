@@ -0,0 +1,51 @@
+"""
+Conversation memory: concurrent turns of one conversation are all stored, and
+only server-issued conversation ids are accepted
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.conversation_store import (
+    ConversationMemory,
+    InMemoryConversationStore,
+    SQLiteConversationStore,
+    issue_conversation_id,
+    verify_conversation_id,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def memory(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteConversationStore(str(tmp_path / "conversations.sqlite3"), max_conversations=100, ttl_seconds=3600)
+    else:
+        store = InMemoryConversationStore(max_conversations=100, ttl_seconds=3600)
+    return ConversationMemory(store, context_tokens=10000, compact_after_turns=1000, summary_tokens=200)
+
+
+def test_concurrent_exchanges_are_all_kept(memory):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for index in range(40):
+            pool.submit(memory.append_exchange, "shared", f"question {index}", f"answer {index}")
+
+    messages = memory.build_context("shared")
+    assert len(messages) == 80
+    assert {message["content"] for message in messages if message["role"] == "user"} == {
+        f"question {index}" for index in range(40)
+    }
+
+
+def test_issued_conversation_id_is_accepted():
+    assert verify_conversation_id(issue_conversation_id())
+
+
+@pytest.mark.parametrize("conversation_id", [
+    "interrupted-1",
+    "123e4567-e89b-42d3-a456-426614174000",
+    "123e4567-e89b-12d3-a456-426614174000.00000000000000000000000000000000",
+    issue_conversation_id().split(".")[0] + "." + "0" * 32,
+    issue_conversation_id().upper(),
+])
+def test_forged_conversation_ids_are_rejected(conversation_id):
+    assert not verify_conversation_id(conversation_id)
@@ -0,0 +1,37 @@
+"""
+HTTP caching with compression: a 304 carries the validators of the 200, and
+autocomplete is served through the cache with its table built at startup
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services.medicine_service import medicine_service
+
+
+@pytest.mark.parametrize("path", ["/medicine/search?q=aspirin", "/medicine/suggest?prefix=zzz"])
+def test_not_modified_repeats_the_etag_of_the_compressed_response(path):
+    with TestClient(app) as client:
+        headers = {"Accept-Encoding": "gzip"}
+        first = client.get(path, headers=headers)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+
+        revalidated = client.get(path, headers={**headers, "If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == etag
+        assert revalidated.headers["vary"] == "Accept-Encoding"
+
+
+def test_suggest_is_cached_by_the_middleware_after_startup_warmup():
+    with TestClient(app) as client:
+        assert medicine_service.suggester._table is not None
+
+        implicit = client.get("/medicine/suggest?prefix=para")
+        explicit = client.get("/medicine/suggest?prefix=para&limit=8")
+
+    assert implicit.json()["suggestions"] == ["Paracetamol"]
+    assert implicit.headers["cache-control"] == f"public, max-age={settings.MEDICINE_SUGGEST_MAX_AGE}"
+    assert implicit.headers["etag"] == explicit.headers["etag"]
@@ -0,0 +1,20 @@
+"""
+Medicine service: an empty formulary snapshot loads and finds nothing
+"""
+from app.services.formulary import Formulary
+from app.services.formulary_snapshot import open_snapshot, write_snapshot
+from app.services.medicine_index import MedicineIndex
+from app.services.medicine_service import MedicineService
+
+
+def test_empty_snapshot_keeps_its_index(tmp_path):
+    path = str(tmp_path / "empty.snapshot")
+    empty = Formulary()
+    write_snapshot(empty, MedicineIndex.build(empty.names()), path)
+    formulary, index = open_snapshot(path)
+
+    service = MedicineService(formulary, index)
+
+    assert service.index is index
+    assert service.search_medicines("aspirin") == []
+    assert service.suggest_medicines("asp") == []
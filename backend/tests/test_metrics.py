@@ -0,0 +1,22 @@
+"""
+Metrics: updates from executor threads are not lost
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.metrics import Counter, Histogram
+
+
+def test_concurrent_updates_are_all_counted():
+    counter = Counter("test_updates_total", "Updates", ("worker",))
+    histogram = Histogram("test_update_seconds", "Update latency", buckets=(0.5,))
+
+    def update(worker: int) -> None:
+        for _ in range(20000):
+            counter.labels(str(worker % 2)).inc()
+            histogram.observe(0.1)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(update, range(8)))
+
+    assert counter.labels("0").value + counter.labels("1").value == 160000
+    assert histogram._default.counts[0] == 160000
@@ -0,0 +1,44 @@
+"""
+Notifications: deterministic delivery errors stop after max_attempts, and
+header injection is rejected before anything is queued
+"""
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.appointment import AppointmentRequest
+from app.services.notifications import DeliveryError, NotificationDispatcher, OutboxMessage, SMTPTransport
+
+
+class _BrokenTransport:
+    async def send(self, message: OutboxMessage) -> None:
+        raise RuntimeError("template bug")
+
+
+def test_unexpected_error_fails_after_max_attempts():
+    dispatcher = NotificationDispatcher(outbox=None, transports={"email": _BrokenTransport()}, max_attempts=3)
+
+    asyncio.run(dispatcher._deliver(OutboxMessage("ref:email", "email", {}, id=1, attempts=1)))
+    assert dispatcher._outcomes[-1][1] == "pending"
+
+    asyncio.run(dispatcher._deliver(OutboxMessage("ref:email", "email", {}, id=1, attempts=2)))
+    assert dispatcher._outcomes[-1][:3] == (1, "failed", 3)
+    assert dispatcher.failed == 1
+
+
+def test_email_header_injection_is_rejected():
+    with pytest.raises(ValidationError):
+        AppointmentRequest(
+            name="Jane Doe",
+            email="jane@example.com\r\nBcc: everyone@example.com",
+            phone="+1-555-123-4567",
+            category="Dermatologist",
+            preferred_date="2030-01-07",
+        )
+
+    transport = SMTPTransport("localhost", 25, "clinic@example.com")
+    message = OutboxMessage("ref:email", "email", {"to": "a@example.com\nBcc: b@example.com", "subject": "s", "body": "b"})
+    with pytest.raises(DeliveryError) as error:
+        transport._send_blocking(message)
+    assert error.value.permanent
@@ -0,0 +1,62 @@
+"""
+Rate limiting: RateLimit-* headers on allowed responses and Retry-After on 429
+"""
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit import (
+    InMemoryRateLimitStore,
+    RateLimiter,
+    RateLimitMiddleware,
+    RateLimitPolicy,
+    RateLimitStore,
+    SQLiteRateLimitStore,
+)
+
+
+def _client(requests_per_minute: float, burst: int, store: Optional[RateLimitStore] = None) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/chat")
+    async def chat() -> dict:
+        return {"ok": True}
+
+    policy = RateLimitPolicy("/chat", requests_per_minute, burst)
+    app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(store or InMemoryRateLimitStore(max_keys=100), [policy]))
+    return TestClient(app)
+
+
+def test_allowed_responses_report_limit_and_reset():
+    client = _client(requests_per_minute=6, burst=3)
+
+    first = client.get("/chat")
+    assert first.status_code == 200
+    assert first.headers["ratelimit-limit"] == "6"
+    assert first.headers["ratelimit-policy"] == "6;w=60;burst=3"
+    assert first.headers["ratelimit-remaining"] == "2"
+    # One request of 10 seconds was spent, so the burst is full again in 10s
+    assert first.headers["ratelimit-reset"] == "10"
+    assert "retry-after" not in first.headers
+
+    client.get("/chat")
+    last = client.get("/chat")
+    assert last.status_code == 200
+    assert last.headers["ratelimit-remaining"] == "0"
+    assert last.headers["ratelimit-reset"] == "30"
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_limited_response_has_retry_after(backend, tmp_path):
+    store = SQLiteRateLimitStore(str(tmp_path / "rate_limits.sqlite3")) if backend == "sqlite" else None
+    client = _client(requests_per_minute=6, burst=1, store=store)
+    assert client.get("/chat").status_code == 200
+
+    limited = client.get("/chat")
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == "10"
+    assert limited.headers["ratelimit-remaining"] == "0"
+    assert limited.headers["ratelimit-reset"] == "10"
+    assert "10 seconds" in limited.json()["detail"]
@@ -0,0 +1,26 @@
+"""
+Symptom router: inflected symptom words reach their topic
+"""
+import pytest
+
+from app.services.symptom_router import symptom_router
+
+
+@pytest.mark.parametrize("message, topic", [
+    ("I have been coughing all night", "respiratory"),
+    ("I feel nauseated", "digestive"),
+    ("I am always sleepy", "sleep"),
+    ("I keep vomiting", "digestive"),
+    ("My headaches are getting worse", "headache"),
+    ("I have a sore throat", "respiratory"),
+    ("She had sore throats all week", "respiratory"),
+    ("I had chills and a fever", "fever"),
+])
+def test_inflected_symptoms_match_their_topic(message, topic):
+    assert symptom_router.topics[symptom_router.match(message)].name == topic
+
+
+@pytest.mark.parametrize("message", ["I walked ahead to get a flu shot", "What are your opening hours?"])
+def test_whole_words_only(message):
+    index = symptom_router.match(message)
+    assert index < 0 or symptom_router.topics[index].name not in ("headache", "fever")